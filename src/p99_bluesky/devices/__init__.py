@@ -1,4 +1,5 @@
 from .andorAd import Andor2Ad, Andor3Ad
+from .epics import DetectorROI
 from .stages import ThreeAxisStage
 
-__all__ = ["Andor2Ad", "Andor3Ad", "ThreeAxisStage"]
+__all__ = ["Andor2Ad", "Andor3Ad", "DetectorROI", "ThreeAxisStage"]
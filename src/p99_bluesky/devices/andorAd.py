@@ -1,17 +1,68 @@
 from collections.abc import Sequence
 
 from bluesky.protocols import Hints
-from ophyd_async.core import PathProvider, SignalR, StandardDetector
-from ophyd_async.epics.adcore import ADBaseDatasetDescriber, ADHDFWriter, NDFileHDFIO
+from ophyd_async.core import (
+    AsyncStatus,
+    DetectorTrigger,
+    PathProvider,
+    SignalR,
+    SignalRW,
+    StandardDetector,
+    TriggerInfo,
+    soft_signal_rw,
+)
+from ophyd_async.epics.adcore import ADHDFWriter, NDFileHDFIO
 
 from p99_bluesky.devices.epics import Andor2Controller, Andor3Controller
 from p99_bluesky.devices.epics.drivers import Andor2DriverIO, Andor3DriverIO
+from p99_bluesky.devices.epics.roi import ROIDatasetDescriber
 
 
-class Andor2Ad(StandardDetector):
+class _AndorAd(StandardDetector):
+    """
+    Fly scan kickoff and unstage shared by Andor2Ad and Andor3Ad.
+
+    The detector is armed at kickoff for internally triggered frames, externally
+    triggered ones are already armed in prepare. Unstage sets the software_trigger
+    signal made by the subclass back to False.
+    """
+
+    software_trigger: SignalRW[bool]
+    _writer: ADHDFWriter
+    _internal_trigger = False
+
+    @AsyncStatus.wrap
+    async def prepare(self, value: TriggerInfo) -> None:
+        """Prepare as a StandardDetector, noting whether kickoff has to arm."""
+        await super().prepare(value)
+        self._internal_trigger = value.trigger is DetectorTrigger.INTERNAL
+
+    @AsyncStatus.wrap
+    async def kickoff(self):
+        """Arm the detector for internally triggered frames."""
+        await super().kickoff()
+        if self._internal_trigger:
+            await self.controller.arm()
+
+    @AsyncStatus.wrap
+    async def unstage(self) -> None:
+        """Disarm and go back to arming the detector for every frame."""
+        await super().unstage()
+        await self.software_trigger.set(False)
+
+    @property
+    def hints(self) -> Hints:
+        return self._writer.hints
+
+
+class Andor2Ad(_AndorAd):
     """
     Andor 2 area detector device
 
+    Frames triggered one at a time are taken with the software trigger while the
+    software_trigger signal is True, see Andor2Controller, it is set back to False
+    on unstage.
+
     Parameters
     ----------
     prefix: str
@@ -27,7 +78,6 @@ class Andor2Ad(StandardDetector):
     """
 
     _controller: Andor2Controller
-    _writer: ADHDFWriter
 
     def __init__(
         self,
@@ -39,34 +89,37 @@ class Andor2Ad(StandardDetector):
     ):
         self.drv = Andor2DriverIO(prefix + "CAM:")
         self.hdf = NDFileHDFIO(prefix + "HDF5:")
+        self.software_trigger = soft_signal_rw(bool, False)
         super().__init__(
-            Andor2Controller(self.drv),
+            Andor2Controller(self.drv, software_trigger=self.software_trigger),
             ADHDFWriter(
                 self.hdf,
                 path_provider,
                 lambda: self.name,
-                ADBaseDatasetDescriber(self.drv),
+                ROIDatasetDescriber(self.drv),
                 # sum="StatsTotal",
                 # more="morestuff",
                 # **scalar_sigs,
             ),
-            config_sigs=[self.drv.acquire_time],
+            config_sigs=[
+                self.drv.acquire_time,
+                self.software_trigger,
+                *_roi_signals(self.drv),
+            ],
             name=name,
         )
 
-    @property
-    def hints(self) -> Hints:
-        return self._writer.hints
-
 
-class Andor3Ad(StandardDetector):
+class Andor3Ad(_AndorAd):
     """
     Andor 3 area detector device
 
+    Frames triggered one at a time are taken with the software trigger while the
+    software_trigger signal is True, see Andor3Controller, it is set back to False
+    on unstage.
     """
 
     _controller: Andor3Controller
-    _writer: ADHDFWriter
 
     def __init__(
         self,
@@ -92,21 +145,25 @@ class Andor3Ad(StandardDetector):
         self.drv = Andor3DriverIO(prefix + "CAM:")
         self.hdf = NDFileHDFIO(prefix + "HDF5:")
         self.counter = 0
+        self.software_trigger = soft_signal_rw(bool, False)
 
         super().__init__(
-            Andor3Controller(self.drv),
+            Andor3Controller(self.drv, software_trigger=self.software_trigger),
             ADHDFWriter(
                 self.hdf,
                 path_provider,
                 lambda: self.name,
-                ADBaseDatasetDescriber(self.drv),
+                ROIDatasetDescriber(self.drv),
                 # sum="StatsTotal",
                 **scalar_sigs,
             ),
-            config_sigs=config_sigs,
+            config_sigs=[*config_sigs, self.software_trigger, *_roi_signals(self.drv)],
             name=name,
         )
 
-    @property
-    def hints(self) -> Hints:
-        return self._writer.hints
+
+def _roi_signals(drv: Andor2DriverIO | Andor3DriverIO) -> list[SignalR]:
+    """Region and binning of the sensor, recorded as configuration, see
+    DetectorROI."""
+    return [drv.min_x, drv.min_y, drv.size_x, drv.size_y, drv.bin_x, drv.bin_y]
+
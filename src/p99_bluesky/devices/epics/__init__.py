@@ -1,4 +1,5 @@
 from .andor2_controller import Andor2Controller
 from .andor3_controller import Andor3Controller
+from .roi import DetectorROI
 
-__all__ = ["Andor2Controller", "Andor3Controller"]
+__all__ = ["Andor2Controller", "Andor3Controller", "DetectorROI"]
@@ -1,6 +1,7 @@
 import asyncio
+import re
 
-from ophyd_async.core import DetectorController, DetectorTrigger
+from ophyd_async.core import DetectorController, DetectorTrigger, SignalR
 from ophyd_async.core._detector import TriggerInfo
 from ophyd_async.epics import adcore
 from ophyd_async.epics.adcore import (
@@ -14,12 +15,49 @@ from p99_bluesky.devices.epics.drivers.andor2_driver import (
     Andor2TriggerMode,
     ImageMode,
 )
+from p99_bluesky.devices.epics.roi import DetectorROI, apply_roi
+
+# Time to read the whole sensor out until the settings are read
+_READOUT_TIME = 0.1
+# Time to shift the charge down one row, slowest vertical shift speed of the DU897
+FAST_KINETICS_ROW_SHIFT_TIME = 3.3e-6
 
 
 class Andor2Controller(DetectorController):
     """
     Andor 2 controller
 
+    In Fast Kinetics, see use_fast_kinetics, only a window of window_height rows
+    at the top of the sensor is exposed. After each exposure the charge is shifted
+    down by one window, which takes window_height row shifts instead of a readout,
+    and the whole series is read out once the sensor is full. So the frames of a
+    series are a sub-millisecond apart, but there can only be as many as fit in
+    the height of the sensor.
+
+    The deadtime between frames is the readout, every row shifted down and every
+    pixel digitised at the ADC speed, binning and frame size included. The
+    settings are read in prepare, or with update_deadtime, until then it is taken
+    as 0.1 s.
+
+    With a region of interest, see use_roi, prepare sets it on the sensor first,
+    outside of Fast Kinetics which sets its own frame.
+
+    With the software_trigger signal True when prepared, frames triggered one at
+    a time, as in a step scan, are taken with the detector armed once in
+    continuous acquisition and the software trigger sent for each, instead of
+    starting and stopping the acquisition every time. It stays armed until
+    disarmed, on unstage.
+
+    Parameters
+    ----------
+    driver: Andor2DriverIO
+        Driver of the camera.
+    good_states: set[DetectorState] | None
+        States the detector can finish in without an error.
+    row_shift_time: float
+        Time in second to shift the charge down one row.
+    software_trigger: SignalR[bool] | None
+        Whether to use the software trigger, never if None.
     """
 
     _supported_trigger_types = {
@@ -32,22 +70,100 @@ class Andor2Controller(DetectorController):
         self,
         driver: Andor2DriverIO,
         good_states: set[DetectorState] | None = None,
+        row_shift_time: float = FAST_KINETICS_ROW_SHIFT_TIME,
+        software_trigger: SignalR[bool] | None = None,
     ) -> None:
         if good_states is None:
             good_states = set(DEFAULT_GOOD_STATES)
         self._drv = driver
         self.good_states = good_states
+        self.row_shift_time = row_shift_time
+        self.fast_kinetics_height: int | None = None
+        self._readout_time = _READOUT_TIME
+        self._size_y_before_fast_kinetics: int | None = None
+        self.roi: DetectorROI | None = None
+        self._software_trigger = software_trigger
+        self._software_triggered = False
+        self._software_armed = False
+
+    def use_fast_kinetics(self, window_height: int | None) -> None:
+        """Take the next series in Fast Kinetics with windows of window_height
+        rows, or back in the normal mode if None."""
+        if window_height is not None and window_height <= 0:
+            raise ValueError(f"Fast Kinetics window height: {window_height} <= 0")
+        self.fast_kinetics_height = window_height
+
+    def use_roi(self, roi: DetectorROI | None) -> None:
+        """Read only roi out from the next prepare on, or the sensor as it is set if
+        None."""
+        self.roi = roi
 
     def get_deadtime(self, exposure: float | None) -> float:
-        if exposure is None:
-            return 0.1
-        return exposure + 0.1
+        if self.fast_kinetics_height is not None:
+            return self.fast_kinetics_height * self.row_shift_time
+        return self._readout_time
+
+    def fast_kinetics_duration(self, exposure: float, series_length: int) -> float:
+        """Time from the start of a Fast Kinetics series to the end of its readout,
+        every frame exposed then shifted down, then the sensor read out once."""
+        return (
+            series_length * (exposure + self.get_deadtime(exposure)) + self._readout_time
+        )
+
+    async def update_deadtime(self) -> float:
+        """Work the readout time out from the current driver settings, the
+        deadtime from then on, and return it."""
+        adc_speed, size_x, size_y, bin_x, bin_y = await asyncio.gather(
+            self._drv.adc_speed.get_value(),
+            self._drv.size_x.get_value(),
+            self._drv.size_y.get_value(),
+            self._drv.bin_x.get_value(),
+            self._drv.bin_y.get_value(),
+        )
+        pixel_rate = _pixel_rate(adc_speed)
+        if pixel_rate is None or size_x <= 0 or size_y <= 0:
+            self._readout_time = _READOUT_TIME
+        else:
+            rows = size_y / max(bin_y, 1)
+            columns = size_x / max(bin_x, 1)
+            # every row of the frame is shifted down, only the binned ones read
+            self._readout_time = (
+                size_y * self.row_shift_time + rows * columns / pixel_rate
+            )
+        return self._readout_time
 
     async def prepare(self, trigger_info: TriggerInfo):
+        if self._software_armed:
+            # stop the acquisition left running before setting it up again
+            await self.disarm()
+        self._software_triggered = (
+            self._software_trigger is not None
+            and await self._software_trigger.get_value()
+            and self.fast_kinetics_height is None
+            and trigger_info.trigger is DetectorTrigger.INTERNAL
+            and trigger_info.total_number_of_triggers == 1
+        )
+        if self.fast_kinetics_height is None:
+            if self._size_y_before_fast_kinetics is not None:
+                # back to the frame size from before Fast Kinetics
+                await self._drv.size_y.set(self._size_y_before_fast_kinetics)
+                self._size_y_before_fast_kinetics = None
+            if self.roi is not None:
+                await apply_roi(self._drv, self.roi)
+        await self.update_deadtime()
         if trigger_info.livetime is not None:
             await adcore.set_exposure_time_and_acquire_period_if_supplied(
                 self, self._drv, trigger_info.livetime
             )
+        if self.fast_kinetics_height is not None:
+            await self._prepare_fast_kinetics(trigger_info, self.fast_kinetics_height)
+            return
+        if self._software_triggered:
+            await asyncio.gather(
+                self._drv.trigger_mode.set(Andor2TriggerMode.SOFT),
+                self._drv.image_mode.set(ImageMode.CONTINUOUS),
+            )
+            return
         await asyncio.gather(
             self._drv.trigger_mode.set(self._get_trigger_mode(trigger_info.trigger)),
             self._drv.num_images.set(
@@ -58,13 +174,52 @@ class Andor2Controller(DetectorController):
             self._drv.image_mode.set(ImageMode.MULTIPLE),
         )
 
+    async def _prepare_fast_kinetics(
+        self, trigger_info: TriggerInfo, window_height: int
+    ) -> None:
+        """One series of as many frames as triggers, started by the trigger if it
+        is external, checked to fit in the height of the sensor."""
+        if trigger_info.trigger not in (
+            DetectorTrigger.INTERNAL,
+            DetectorTrigger.CONSTANT_GATE,
+        ):
+            raise ValueError(
+                f"Fast Kinetics can not be triggered by {trigger_info.trigger}."
+            )
+        series_length = trigger_info.total_number_of_triggers
+        sensor_height = await self._drv.max_size_y.get_value()
+        if series_length == 0 or series_length * window_height > sensor_height:
+            raise ValueError(
+                f"A Fast Kinetics series of {series_length} windows of {window_height}"
+                f" rows does not fit in the {sensor_height} rows of the sensor."
+            )
+        if self._size_y_before_fast_kinetics is None:
+            self._size_y_before_fast_kinetics = await self._drv.size_y.get_value()
+        await asyncio.gather(
+            self._drv.trigger_mode.set(self._get_trigger_mode(trigger_info.trigger)),
+            self._drv.num_images.set(series_length),
+            self._drv.size_y.set(window_height),
+            self._drv.image_mode.set(ImageMode.FAST_KINETICS),
+        )
+
     async def arm(self) -> None:
+        if self._software_triggered:
+            if not self._software_armed:
+                self._arm_status = await adcore.start_acquiring_driver_and_ensure_status(
+                    self._drv
+                )
+                self._software_armed = True
+            await self._drv.software_trigger.trigger()
+            return
         # Standard arm the detector and wait for the acquire PV to be True
         self._arm_status = await adcore.start_acquiring_driver_and_ensure_status(
             self._drv
         )
 
     async def wait_for_idle(self):
+        # the frame of a software trigger is waited for by the writer
+        if self._software_triggered:
+            return
         if self._arm_status:
             await self._arm_status
 
@@ -79,4 +234,14 @@ class Andor2Controller(DetectorController):
         return cls._supported_trigger_types[trigger]
 
     async def disarm(self):
+        self._software_armed = False
         await stop_busy_record(self._drv.acquire, False, timeout=1)
+
+
+def _pixel_rate(adc_speed: str) -> float | None:
+    """Pixels per second of an ADC speed such as "1.00 MHz", None if it is not
+    one."""
+    match = re.match(r"\s*([0-9.]+)\s*([kM]?)Hz", adc_speed)
+    if match is None:
+        return None
+    return float(match.group(1)) * {"": 1, "k": 1e3, "M": 1e6}[match.group(2)]
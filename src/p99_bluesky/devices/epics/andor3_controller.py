@@ -3,6 +3,7 @@ import asyncio
 from ophyd_async.core import (
     DetectorController,
     DetectorTrigger,
+    SignalR,
 )
 from ophyd_async.core._detector import TriggerInfo
 from ophyd_async.epics import adcore
@@ -14,15 +15,41 @@ from ophyd_async.epics.adcore import (
 
 from p99_bluesky.devices.epics.drivers.andor3_driver import (
     Andor3DriverIO,
+    Andor3ShutterMode,
     Andor3TriggerMode,
     ImageMode,
 )
+from p99_bluesky.devices.epics.roi import DetectorROI, apply_roi
+
+# Deadtime until the readout time is read from the driver
+_READOUT_TIME = 0.1
 
 
 class Andor3Controller(DetectorController):
     """
     Andor 3 controller
 
+    The readout time is what the driver works out from the current settings,
+    shutter mode, pixel readout rate, binning and frame size. It is read in
+    prepare, or with update_deadtime, until then it is taken as 0.1 s.
+
+    In overlap mode the next frame is exposed while the last one is read out, so
+    frames only have a gap between them if the exposure is shorter than the
+    readout, which is the shortest deadtime, see get_deadtime. That is with the
+    rolling shutter, the global shutter exposes every row at once, so it can only
+    overlap exposures at least as long as the readout, shorter ones are still a
+    readout time apart. The shutter mode is read along with the readout time.
+    prepare turns overlap on when the TriggerInfo asks for more than one frame
+    with less deadtime than the readout time and the shutter allows it for the
+    livetime, and off otherwise, when the frames are a readout time apart.
+
+    With a region of interest, see use_roi, prepare sets it on the sensor first.
+
+    With the software_trigger signal True when prepared, frames triggered one at
+    a time, as in a step scan, are taken with the detector armed once in
+    continuous acquisition and the software trigger sent for each, instead of
+    starting and stopping the acquisition every time. It stays armed until
+    disarmed, on unstage.
     """
 
     _supported_trigger_types = {
@@ -35,23 +62,91 @@ class Andor3Controller(DetectorController):
         self,
         driver: Andor3DriverIO,
         good_states: set[DetectorState] | None = None,
+        software_trigger: SignalR[bool] | None = None,
     ) -> None:
         if good_states is None:
             good_states = set(DEFAULT_GOOD_STATES)
         self._drv = driver
         self.good_states = good_states
+        self._readout_time = _READOUT_TIME
+        self._shutter_mode = Andor3ShutterMode.ROLLING
+        self.roi: DetectorROI | None = None
+        self._software_trigger = software_trigger
+        self._software_triggered = False
+        self._software_armed = False
+
+    def use_roi(self, roi: DetectorROI | None) -> None:
+        """Read only roi out from the next prepare on, or the sensor as it is set if
+        None."""
+        self.roi = roi
+
+    @property
+    def readout_time(self) -> float:
+        """Time to read a frame out, the deadtime outside of overlap mode."""
+        return self._readout_time
 
     def get_deadtime(self, exposure: float | None) -> float:
-        if exposure is None:
-            return 0.1
-        return exposure + 0.1
+        """Shortest deadtime between frames, in overlap mode, the part of the
+        readout not hidden behind the next exposure."""
+        if exposure is None or not self._can_overlap(exposure):
+            return self._readout_time
+        return max(self._readout_time - exposure, 0.0)
+
+    def _can_overlap(self, exposure: float) -> bool:
+        """Whether the readout can be hidden behind an exposure of that length
+        with the current shutter mode."""
+        return (
+            self._shutter_mode != Andor3ShutterMode.GLOBAL
+            or exposure >= self._readout_time
+        )
+
+    async def update_deadtime(self) -> float:
+        """Read the readout time and shutter mode of the current driver settings,
+        used from then on, and return the readout time."""
+        readout_time, self._shutter_mode = await asyncio.gather(
+            self._drv.readout_time.get_value(), self._drv.shutter_mode.get_value()
+        )
+        self._readout_time = readout_time if readout_time > 0 else _READOUT_TIME
+        return self._readout_time
 
     async def prepare(self, trigger_info: TriggerInfo):
+        if self._software_armed:
+            # stop the acquisition left running before setting it up again
+            await self.disarm()
+        self._software_triggered = (
+            self._software_trigger is not None
+            and await self._software_trigger.get_value()
+            and trigger_info.trigger is DetectorTrigger.INTERNAL
+            and trigger_info.total_number_of_triggers == 1
+        )
+        if self.roi is not None:
+            await apply_roi(self._drv, self.roi)
+        await self.update_deadtime()
+        overlap = (
+            trigger_info.total_number_of_triggers != 1
+            and trigger_info.deadtime is not None
+            and trigger_info.deadtime < self._readout_time
+            and self._can_overlap(trigger_info.livetime or 0.0)
+        )
         if trigger_info.livetime is not None:
-            await adcore.set_exposure_time_and_acquire_period_if_supplied(
-                self, self._drv, trigger_info.livetime
+            deadtime = (
+                self.get_deadtime(trigger_info.livetime)
+                if overlap
+                else self._readout_time
+            )
+            await asyncio.gather(
+                self._drv.acquire_time.set(trigger_info.livetime),
+                self._drv.acquire_period.set(trigger_info.livetime + deadtime),
+            )
+        if self._software_triggered:
+            await asyncio.gather(
+                self._drv.overlap.set(False),
+                self._drv.trigger_mode.set(Andor3TriggerMode.SOFT),
+                self._drv.image_mode.set(ImageMode.CONTINUOUS),
             )
+            return
         await asyncio.gather(
+            self._drv.overlap.set(overlap),
             self._drv.trigger_mode.set(self._get_trigger_mode(trigger_info.trigger)),
             self._drv.num_images.set(
                 999_999
@@ -62,12 +157,23 @@ class Andor3Controller(DetectorController):
         )
 
     async def arm(self) -> None:
+        if self._software_triggered:
+            if not self._software_armed:
+                self._arm_status = await adcore.start_acquiring_driver_and_ensure_status(
+                    self._drv
+                )
+                self._software_armed = True
+            await self._drv.software_trigger.trigger()
+            return
         # Standard arm the detector and wait for the acquire PV to be True
         self._arm_status = await adcore.start_acquiring_driver_and_ensure_status(
             self._drv
         )
 
     async def wait_for_idle(self):
+        # the frame of a software trigger is waited for by the writer
+        if self._software_triggered:
+            return
         if self._arm_status:
             await self._arm_status
 
@@ -82,4 +188,5 @@ class Andor3Controller(DetectorController):
         return cls._supported_trigger_types[trigger]
 
     async def disarm(self):
+        self._software_armed = False
         await stop_busy_record(self._drv.acquire, False, timeout=1)
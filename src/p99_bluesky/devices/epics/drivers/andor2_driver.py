@@ -4,6 +4,7 @@ from ophyd_async.epics.core import (
     epics_signal_r,
     epics_signal_rw,
     epics_signal_rw_rbv,
+    epics_signal_x,
 )
 
 
@@ -39,9 +40,19 @@ class Andor2DriverIO(ADBaseIO):
     def __init__(self, prefix: str) -> None:
         super().__init__(prefix)
         self.trigger_mode = epics_signal_rw(Andor2TriggerMode, prefix + "TriggerMode")
+        self.software_trigger = epics_signal_x(prefix + "SoftwareTrigger")
         self.data_type = epics_signal_r(ADBaseDataType, prefix + "DataType_RBV")
         self.accumulate_period = epics_signal_r(
             float, prefix + "AndorAccumulatePeriod_RBV"
         )
         self.image_mode = epics_signal_rw_rbv(ImageMode, prefix + "ImageMode")
+        self.min_x = epics_signal_rw_rbv(int, prefix + "MinX")
+        self.min_y = epics_signal_rw_rbv(int, prefix + "MinY")
+        self.size_x = epics_signal_rw_rbv(int, prefix + "SizeX")
+        self.size_y = epics_signal_rw_rbv(int, prefix + "SizeY")
+        self.max_size_x = epics_signal_r(int, prefix + "MaxSizeX_RBV")
+        self.max_size_y = epics_signal_r(int, prefix + "MaxSizeY_RBV")
+        self.bin_x = epics_signal_rw_rbv(int, prefix + "BinX")
+        self.bin_y = epics_signal_rw_rbv(int, prefix + "BinY")
+        self.adc_speed = epics_signal_rw_rbv(str, prefix + "AndorADCSpeed")
         self.stat_mean = epics_signal_r(int, prefix[:-4] + "STAT:MeanValue_RBV")
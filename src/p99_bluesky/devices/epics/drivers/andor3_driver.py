@@ -1,6 +1,11 @@
 from ophyd_async.core import StrictEnum
 from ophyd_async.epics.adcore._core_io import ADBaseIO
-from ophyd_async.epics.core import epics_signal_rw, epics_signal_rw_rbv
+from ophyd_async.epics.core import (
+    epics_signal_r,
+    epics_signal_rw,
+    epics_signal_rw_rbv,
+    epics_signal_x,
+)
 
 
 class Andor3TriggerMode(StrictEnum):
@@ -11,6 +16,11 @@ class Andor3TriggerMode(StrictEnum):
     EXT_TRIGGER = "External"
 
 
+class Andor3ShutterMode(StrictEnum):
+    ROLLING = "Rolling"
+    GLOBAL = "Global"
+
+
 class ImageMode(StrictEnum):
     FIXED = "Fixed"
     CONTINUOUS = "Continuous"
@@ -24,4 +34,18 @@ class Andor3DriverIO(ADBaseIO):
     def __init__(self, prefix: str) -> None:
         super().__init__(prefix)
         self.trigger_mode = epics_signal_rw(Andor3TriggerMode, prefix + "TriggerMode")
+        self.software_trigger = epics_signal_x(prefix + "SoftwareTrigger")
         self.image_mode = epics_signal_rw_rbv(ImageMode, prefix + "ImageMode")
+        self.min_x = epics_signal_rw_rbv(int, prefix + "MinX")
+        self.min_y = epics_signal_rw_rbv(int, prefix + "MinY")
+        self.size_x = epics_signal_rw_rbv(int, prefix + "SizeX")
+        self.size_y = epics_signal_rw_rbv(int, prefix + "SizeY")
+        self.max_size_x = epics_signal_r(int, prefix + "MaxSizeX_RBV")
+        self.max_size_y = epics_signal_r(int, prefix + "MaxSizeY_RBV")
+        self.bin_x = epics_signal_rw_rbv(int, prefix + "BinX")
+        self.bin_y = epics_signal_rw_rbv(int, prefix + "BinY")
+        self.shutter_mode = epics_signal_rw_rbv(
+            Andor3ShutterMode, prefix + "A3ShutterMode"
+        )
+        self.overlap = epics_signal_rw_rbv(bool, prefix + "Overlap")
+        self.readout_time = epics_signal_r(float, prefix + "ReadoutTime")
@@ -0,0 +1,124 @@
+import asyncio
+
+from ophyd_async.epics.adcore import ADBaseDatasetDescriber
+
+from p99_bluesky.devices.epics.drivers.andor2_driver import Andor2DriverIO
+from p99_bluesky.devices.epics.drivers.andor3_driver import Andor3DriverIO
+
+
+class DetectorROI:
+    """
+    Region of the sensor to read out, in unbinned pixels, and the hardware binning.
+
+    Each frame is size_y / bin_y rows of size_x / bin_x pixels, so a small binned
+    region reads out faster and writes less to file than the whole sensor.
+
+    Parameters
+    ----------
+    min_x: int = 0
+        First column of the region.
+    min_y: int = 0
+        First row of the region.
+    size_x: int | None = None
+        Number of columns, up to the edge of the sensor if None.
+    size_y: int | None = None
+        Number of rows, up to the edge of the sensor if None.
+    bin_x: int = 1
+        Number of columns binned into one pixel.
+    bin_y: int = 1
+        Number of rows binned into one pixel.
+    """
+
+    def __init__(
+        self,
+        min_x: int = 0,
+        min_y: int = 0,
+        size_x: int | None = None,
+        size_y: int | None = None,
+        bin_x: int = 1,
+        bin_y: int = 1,
+    ) -> None:
+        if min_x < 0 or min_y < 0:
+            raise ValueError(f"ROI start: ({min_x}, {min_y}) is before the sensor.")
+        if (size_x is not None and size_x <= 0) or (size_y is not None and size_y <= 0):
+            raise ValueError(f"ROI size: ({size_x}, {size_y}) is not above 0.")
+        if bin_x <= 0 or bin_y <= 0:
+            raise ValueError(f"Binning: ({bin_x}, {bin_y}) is not above 0.")
+        self.min_x = min_x
+        self.min_y = min_y
+        self.size_x = size_x
+        self.size_y = size_y
+        self.bin_x = bin_x
+        self.bin_y = bin_y
+
+    def sizes(self, max_size_x: int, max_size_y: int) -> tuple[int, int]:
+        """Number of columns and rows of the region on a sensor of max_size_x by
+        max_size_y pixels, raises ValueError if it does not fit."""
+        size_x = max_size_x - self.min_x if self.size_x is None else self.size_x
+        size_y = max_size_y - self.min_y if self.size_y is None else self.size_y
+        if (
+            size_x <= 0
+            or size_y <= 0
+            or self.min_x + size_x > max_size_x
+            or self.min_y + size_y > max_size_y
+        ):
+            raise ValueError(
+                f"{self} does not fit in the {max_size_x} by {max_size_y} sensor."
+            )
+        if size_x < self.bin_x or size_y < self.bin_y:
+            raise ValueError(f"{self} is smaller than one binned pixel.")
+        return size_x, size_y
+
+    def shape(self, max_size_x: int, max_size_y: int) -> tuple[int, int]:
+        """Rows and columns of the binned frames, see sizes."""
+        size_x, size_y = self.sizes(max_size_x, max_size_y)
+        return size_y // self.bin_y, size_x // self.bin_x
+
+    def __repr__(self) -> str:
+        return (
+            f"DetectorROI(min_x={self.min_x}, min_y={self.min_y},"
+            + f" size_x={self.size_x}, size_y={self.size_y},"
+            + f" bin_x={self.bin_x}, bin_y={self.bin_y})"
+        )
+
+
+async def apply_roi(driver: Andor2DriverIO | Andor3DriverIO, roi: DetectorROI) -> None:
+    """Set the region and binning of roi on the driver, checked to fit in the
+    sensor."""
+    max_size_x, max_size_y = await asyncio.gather(
+        driver.max_size_x.get_value(), driver.max_size_y.get_value()
+    )
+    size_x, size_y = roi.sizes(max_size_x, max_size_y)
+    await asyncio.gather(
+        driver.min_x.set(roi.min_x),
+        driver.min_y.set(roi.min_y),
+        driver.size_x.set(size_x),
+        driver.size_y.set(size_y),
+        driver.bin_x.set(roi.bin_x),
+        driver.bin_y.set(roi.bin_y),
+    )
+
+
+class ROIDatasetDescriber(ADBaseDatasetDescriber):
+    """
+    Shape of the frames from the region and binning set on the driver, rather than
+    from the size of the last array, which only changes once a frame is taken.
+    Falls back to the last array size if no region is set.
+    """
+
+    _driver: Andor2DriverIO | Andor3DriverIO
+
+    def __init__(self, driver: Andor2DriverIO | Andor3DriverIO) -> None:
+        super().__init__(driver)
+
+    async def shape(self) -> tuple[int, int]:
+        size_x, size_y, bin_x, bin_y = await asyncio.gather(
+            self._driver.size_x.get_value(),
+            self._driver.size_y.get_value(),
+            self._driver.bin_x.get_value(),
+            self._driver.bin_y.get_value(),
+        )
+        if size_x <= 0 or size_y <= 0:
+            rows, columns = await super().shape()
+            return rows, columns
+        return size_y // max(bin_y, 1), size_x // max(bin_x, 1)
@@ -0,0 +1,100 @@
+from collections.abc import Iterator
+from typing import Any
+
+import bluesky.plan_stubs as bps
+from ophyd_async.core import StandardDetector
+
+from p99_bluesky.devices.andorAd import Andor2Ad, Andor3Ad
+from p99_bluesky.devices.epics.andor2_controller import Andor2Controller
+from p99_bluesky.devices.epics.andor3_controller import Andor3Controller
+from p99_bluesky.devices.epics.roi import DetectorROI
+from p99_bluesky.log import LOGGER
+
+
+def get_deadtime(
+    det: StandardDetector, exposure: float | None, overlap: bool = False
+) -> Iterator[Any]:
+    """
+    Deadtime between frames of det at exposure, for the settings the detector has
+    now.
+
+    The Andor controllers work their readout time out from the driver settings, so
+    these are read first, other detectors give the deadtime of their controller.
+    An Andor3 gives its readout time, or with overlap, for frames taken back to
+    back, its deadtime in overlap mode, which it is then prepared in.
+
+    Parameters
+    ----------
+    det: StandardDetector
+        Detector to get the deadtime of.
+    exposure: float | None
+        Exposure time of each frame.
+    overlap: bool = False
+        Whether the frames are taken back to back.
+    """
+    controller = det.controller
+    if isinstance(controller, Andor2Controller | Andor3Controller):
+        yield from bps.wait_for([controller.update_deadtime])
+    if isinstance(controller, Andor3Controller) and not overlap:
+        deadtime = controller.readout_time
+    else:
+        deadtime = controller.get_deadtime(exposure)
+    LOGGER.info(f"{det.name} deadtime {deadtime} s.")
+    return deadtime
+
+
+def set_roi(det: Andor2Ad | Andor3Ad, roi: DetectorROI) -> Iterator[Any]:
+    """
+    Read only roi of the sensor of det out, checked to fit in it.
+
+    The region stays set until changed, the next start document records it as
+    configuration and the frames described have its binned shape.
+
+    Parameters
+    ----------
+    det: Andor2Ad | Andor3Ad
+        Detector to set the region of.
+    roi: DetectorROI
+        Region and binning to read out.
+    """
+    max_size_x = yield from bps.rd(det.drv.max_size_x)
+    max_size_y = yield from bps.rd(det.drv.max_size_y)
+    size_x, size_y = roi.sizes(max_size_x, max_size_y)
+    LOGGER.info(f"Set {det.name} to {roi}.")
+    yield from bps.mv(
+        det.drv.min_x,
+        roi.min_x,
+        det.drv.min_y,
+        roi.min_y,
+        det.drv.size_x,
+        size_x,
+        det.drv.size_y,
+        size_y,
+        det.drv.bin_x,
+        roi.bin_x,
+        det.drv.bin_y,
+        roi.bin_y,
+    )
+
+
+def set_software_trigger(
+    dets: list[Andor2Ad | Andor3Ad], enable: bool = True
+) -> Iterator[Any]:
+    """
+    Take the frames of dets triggered one at a time with their software trigger,
+    armed once rather than for every frame, until they are unstaged.
+
+    Used once the detectors are staged, as their unstage goes back to arming for
+    every frame, whether the plan finishes or fails, or before they are staged with
+    a final plan setting it back.
+
+    Parameters
+    ----------
+    dets: list[Andor2Ad | Andor3Ad]
+        Detectors to software trigger.
+    enable: bool = True
+        If False, go back to arming them for every frame.
+    """
+    for det in dets:
+        LOGGER.info(f"Software trigger {det.name}: {enable}.")
+        yield from bps.mv(det.software_trigger, enable)
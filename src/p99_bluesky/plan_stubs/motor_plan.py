@@ -6,6 +6,10 @@ from ophyd_async.epics.motor import Motor
 
 from p99_bluesky.log import LOGGER
 from p99_bluesky.sim.sim_stages import p99SimMotor
+from p99_bluesky.utility.region_order import order_regions, regions_travel_time
+from p99_bluesky.utility.row_checkpoint import RowCheckpoint
+from p99_bluesky.utility.row_speed_controller import RowSpeedController
+from p99_bluesky.utility.trajectory import GridTrajectory, PathTrajectory
 
 
 def check_within_limit(values: list, motor: Motor | p99SimMotor):
@@ -20,6 +24,16 @@ def check_within_limit(values: list, motor: Motor | p99SimMotor):
             )
 
 
+def chain_move(motor: Motor | p99SimMotor, position: float, speed: float):
+    """Send motor on to position at speed from wherever it is, without waiting for
+    or stopping the move it is on, so a path of them is flown without stopping at
+    each point."""
+    yield from bps.mv(motor.velocity, speed)
+    # No put callback, it would hold the next setpoint until the motor stops. The
+    # wait keyword belongs to abs_set, so it goes to the setpoint as an argument.
+    yield from bps.abs_set(motor.user_setpoint, position, False)
+
+
 def get_motor_positions(*arg):
     """store motor position in an list so it can be pass to move later"""
     motor_position = []
@@ -54,3 +68,304 @@ def get_velocity_and_step_size(
         ideal_velocity = max_velocity
 
     return ideal_velocity, ideal_step_size
+
+
+def get_grid_trajectory(
+    step_motor: Motor | p99SimMotor,
+    step_start: float,
+    step_end: float,
+    num_step: int,
+    scan_motor: Motor | p99SimMotor,
+    scan_start: float,
+    scan_end: float,
+    motor_speed: float | None = None,
+    snake_axes: bool = False,
+    row_overhead: float = 0.0,
+) -> Iterator[Any]:
+    """Read the motor parameters, build the GridTrajectory of a grid fly scan and
+    check all of it against the motor limits before anything moves.
+
+    Parameters
+    ----------
+    step_motor: Motor,
+        The motor stepping between rows.
+    step_start: float,
+        Starting position for step motor.
+    step_end: float,
+        Ending position for step motor.
+    num_step: int,
+        Number of rows.
+    scan_motor: Motor,
+        The motor which will move continuously.
+    scan_start: float,
+        Starting position for scan motor.
+    scan_end: float,
+        Ending position for scan motor.
+    motor_speed: float | None = None,
+        Scan motor speed, current speed if None.
+    snake_axes: bool = False,
+        If true, every other row is scanned backward.
+    row_overhead: float = 0.0,
+        Fixed time in second lost on every row.
+    """
+    LOGGER.info(f"Plan grid trajectory for {step_motor.name} and {scan_motor.name}.")
+    speed = motor_speed if motor_speed else (yield from bps.rd(scan_motor.velocity))
+    motors = yield from _read_grid_motors(step_motor, scan_motor)
+    trajectory = GridTrajectory(
+        step_start,
+        step_end,
+        num_step,
+        scan_start,
+        scan_end,
+        speed,
+        acceleration_time=motors["acceleration_time"],
+        snake_axes=snake_axes,
+        step_speed=motors["step_speed"],
+        max_speed=motors["max_speed"],
+        row_overhead=row_overhead,
+    )
+    trajectory.check_limits(
+        motors["step_limits"], motors["scan_limits"], step_motor.name, scan_motor.name
+    )
+    LOGGER.info(f"Estimated grid duration = {trajectory.total_duration} s.")
+    return trajectory
+
+
+def get_stxm_trajectory(
+    step_motor: Motor | p99SimMotor,
+    step_start: float,
+    step_end: float,
+    scan_motor: Motor | p99SimMotor,
+    scan_start: float,
+    scan_end: float,
+    plan_time: float,
+    count_time: float,
+    step_size: float | None = None,
+    snake_axes: bool = False,
+    row_overhead: float = 0.0,
+) -> Iterator[Any]:
+    """Read the motor parameters and work out the step size and scan speed of a
+    grid fly scan that takes plan_time, acceleration, run-up, turnaround and row
+    overhead included, see GridTrajectory.for_plan_time. The grid is checked
+    against the motor limits before anything moves.
+
+    Parameters
+    ----------
+    step_motor: Motor,
+        The motor stepping between rows.
+    step_start: float,
+        Starting position for step motor.
+    step_end: float,
+        Ending position for step motor.
+    scan_motor: Motor,
+        The motor which will move continuously.
+    scan_start: float,
+        Starting position for scan motor.
+    scan_end: float,
+        Ending position for scan motor.
+    plan_time: float,
+        How long the grid should take in second.
+    count_time: float,
+        Detector count time.
+    step_size: float | None = None,
+        Step size between rows, points are spaced evenly on both axes if None.
+    snake_axes: bool = False,
+        If true, every other row is scanned backward.
+    row_overhead: float = 0.0,
+        Fixed time in second lost on every row.
+    """
+    LOGGER.info(f"Plan {plan_time} s grid for {step_motor.name} and {scan_motor.name}.")
+    motors = yield from _read_grid_motors(step_motor, scan_motor)
+    trajectory = GridTrajectory.for_plan_time(
+        plan_time,
+        count_time,
+        step_start,
+        step_end,
+        scan_start,
+        scan_end,
+        motors["max_speed"],
+        step_size=step_size,
+        acceleration_time=motors["acceleration_time"],
+        snake_axes=snake_axes,
+        step_speed=motors["step_speed"],
+        row_overhead=row_overhead,
+    )
+    trajectory.check_limits(
+        motors["step_limits"], motors["scan_limits"], step_motor.name, scan_motor.name
+    )
+    if trajectory.total_duration > plan_time:
+        LOGGER.warning(
+            f"A single row takes {trajectory.total_duration} s, over the plan time"
+            + f" of {plan_time} s."
+        )
+    LOGGER.info(
+        f"{trajectory.num_rows} rows at {trajectory.speed}, estimated grid duration"
+        + f" = {trajectory.total_duration} s."
+    )
+    return trajectory
+
+
+def get_row_speed_controller(
+    trajectory: GridTrajectory,
+    plan_time: float,
+    scan_motor: Motor | p99SimMotor,
+) -> Iterator[Any]:
+    """RowSpeedController of a grid fly scan, its speed kept under the motor
+    maximum speed and low enough for the run-up to stay within the limits.
+
+    Parameters
+    ----------
+    trajectory: GridTrajectory,
+        The grid as planned.
+    plan_time: float,
+        How long the grid should take in second.
+    scan_motor: Motor,
+        The motor which will move continuously.
+    """
+    max_speed = yield from bps.rd(scan_motor.max_velocity)
+    scan_limits = (
+        (yield from bps.rd(scan_motor.low_limit_travel)),
+        (yield from bps.rd(scan_motor.high_limit_travel)),
+    )
+    max_speed = min(max_speed, trajectory.speed_limit(scan_limits))
+    LOGGER.info(f"Correct row speed of {scan_motor.name} up to {max_speed}.")
+    return RowSpeedController(trajectory, plan_time, max_speed, name="speed_correction")
+
+
+def check_grid_trajectories(
+    step_motor: Motor | p99SimMotor,
+    scan_motor: Motor | p99SimMotor,
+    trajectories: list[GridTrajectory],
+) -> Iterator[Any]:
+    """Check a set of grids against the motor limits, read once for all of them,
+    before anything moves.
+
+    Parameters
+    ----------
+    step_motor: Motor,
+        The motor stepping between rows.
+    scan_motor: Motor,
+        The motor which will move continuously.
+    trajectories: list[GridTrajectory],
+        The grids to scan.
+    """
+    LOGGER.info(
+        f"Check {len(trajectories)} grids for {step_motor.name} and {scan_motor.name}."
+    )
+    motors = yield from _read_grid_motors(step_motor, scan_motor)
+    for trajectory in trajectories:
+        trajectory.check_limits(
+            motors["step_limits"], motors["scan_limits"], step_motor.name, scan_motor.name
+        )
+
+
+def get_region_order(
+    step_motor: Motor | p99SimMotor,
+    scan_motor: Motor | p99SimMotor,
+    trajectories: list[GridTrajectory],
+) -> Iterator[Any]:
+    """Order of a set of grids, and the corner each starts from, that keeps the
+    travel between them shortest from where the motors are now, see order_regions.
+
+    Parameters
+    ----------
+    step_motor: Motor,
+        The motor stepping between rows.
+    scan_motor: Motor,
+        The motor which will move continuously.
+    trajectories: list[GridTrajectory],
+        The grids to scan.
+    """
+    start = (
+        (yield from bps.rd(step_motor.user_readback)),
+        (yield from bps.rd(scan_motor.user_readback)),
+    )
+    step_speed = yield from bps.rd(step_motor.velocity)
+    scan_speed = yield from bps.rd(scan_motor.max_velocity)
+    order = order_regions(trajectories, start, step_speed, scan_speed)
+    given = regions_travel_time(trajectories, start, step_speed, scan_speed)
+    ordered = regions_travel_time(
+        [trajectory for _, trajectory in order], start, step_speed, scan_speed
+    )
+    LOGGER.info(
+        f"Scan regions in order {[index for index, _ in order]}, travel {ordered} s"
+        + f" instead of {given} s."
+    )
+    return order
+
+
+def checkpoint_row(row_checkpoint: RowCheckpoint, step_position: float) -> Iterator[Any]:
+    """Record the row of a grid at step_position as complete, in the
+    "row_checkpoint" stream and as a checkpoint.
+
+    Parameters
+    ----------
+    row_checkpoint: RowCheckpoint,
+        Row numbering of the grid.
+    step_position: float,
+        Step motor position of the row.
+    """
+    row_checkpoint.mark(step_position)
+    yield from bps.trigger_and_read([row_checkpoint], name="row_checkpoint")
+    yield from bps.checkpoint()
+
+
+def _read_grid_motors(
+    step_motor: Motor | p99SimMotor, scan_motor: Motor | p99SimMotor
+) -> Iterator[Any]:
+    """Motor parameters a GridTrajectory is worked out from."""
+    return {
+        "acceleration_time": (yield from bps.rd(scan_motor.acceleration_time)),
+        "max_speed": (yield from bps.rd(scan_motor.max_velocity)),
+        "step_speed": (yield from bps.rd(step_motor.velocity)),
+        "scan_limits": (
+            (yield from bps.rd(scan_motor.low_limit_travel)),
+            (yield from bps.rd(scan_motor.high_limit_travel)),
+        ),
+        "step_limits": (
+            (yield from bps.rd(step_motor.low_limit_travel)),
+            (yield from bps.rd(step_motor.high_limit_travel)),
+        ),
+    }
+
+
+def check_path_trajectory(
+    trajectory: PathTrajectory,
+    x_motor: Motor | p99SimMotor,
+    y_motor: Motor | p99SimMotor,
+) -> Iterator[Any]:
+    """Check a two axis path, with the run-up and run-down of both motors, against
+    their limits and maximum speed before anything moves.
+
+    Parameters
+    ----------
+    trajectory: PathTrajectory,
+        The path to fly.
+    x_motor: Motor,
+        Motor for the x axis of the path.
+    y_motor: Motor,
+        Motor for the y axis of the path.
+    """
+    LOGGER.info(f"Check {trajectory.kind} path for {x_motor.name} and {y_motor.name}.")
+    limits = []
+    for motor in (x_motor, y_motor):
+        limits.append(
+            (
+                (yield from bps.rd(motor.low_limit_travel)),
+                (yield from bps.rd(motor.high_limit_travel)),
+                (yield from bps.rd(motor.max_velocity)),
+                (yield from bps.rd(motor.acceleration_time)),
+            )
+        )
+    (x_low, x_high, x_max_speed, x_accel), (y_low, y_high, y_max_speed, y_accel) = limits
+    trajectory.check_limits(
+        (x_low, x_high),
+        (y_low, y_high),
+        x_max_speed,
+        y_max_speed,
+        x_motor.name,
+        y_motor.name,
+        x_accel,
+        y_accel,
+    )
+    LOGGER.info(f"Estimated path duration = {trajectory.total_duration} s.")
@@ -1,10 +1,30 @@
 from .ad_plans import takeImg, tiggerImg
-from .stxm import fast_scan_grid, stxm_fast, stxm_step
+from .fast_scan import (
+    adaptive_fast_scan_grid,
+    fast_scan_grid,
+    fast_scan_lissajous,
+    fast_scan_spiral,
+)
+from .stxm import (
+    resume_stxm_fast,
+    resume_stxm_step,
+    stxm_fast,
+    stxm_multi_region,
+    stxm_stack,
+    stxm_step,
+)
 
 __all__ = [
     "takeImg",
     "tiggerImg",
     "fast_scan_grid",
+    "adaptive_fast_scan_grid",
+    "fast_scan_lissajous",
+    "fast_scan_spiral",
     "stxm_fast",
     "stxm_step",
+    "stxm_multi_region",
+    "stxm_stack",
+    "resume_stxm_fast",
+    "resume_stxm_step",
 ]
@@ -1,10 +1,12 @@
 from blueapi.core import MsgGenerator
 from bluesky import plan_stubs as bps
 from bluesky import preprocessors as bpp
+from bluesky.preprocessors import finalize_wrapper
 from bluesky.utils import Msg, short_uid
 from ophyd_async.core import DetectorTrigger, TriggerInfo
 
 from p99_bluesky.devices.andorAd import Andor2Ad, Andor3Ad
+from p99_bluesky.plan_stubs.detector_plan import get_deadtime
 
 
 def takeImg(
@@ -12,28 +14,67 @@ def takeImg(
     exposure: float,
     n_img: int = 1,
     det_trig: DetectorTrigger = DetectorTrigger.INTERNAL,
+    fast_kinetics_height: int | None = None,
 ) -> MsgGenerator:
     """
     Bare minimum to take an image using prepare plan with full detector control
     e.g. Able to change tigger_info unlike tigger
+
+    With a fast_kinetics_height an Andor2Ad takes the n_img images as one Fast
+    Kinetics series of windows that many rows high, see Andor2Controller, and the
+    window height, series length and expected duration of the series go into the
+    "fast_kinetics" of the start document. The detector is back in its normal mode
+    at the end, with the image mode and frame height it had before, even if the
+    plan fails.
     """
-    grp = short_uid("prepare")
-    deadtime: float = det.controller.get_deadtime(exposure)
-    tigger_info = TriggerInfo(
-        number_of_triggers=n_img,
-        trigger=det_trig,
-        deadtime=deadtime,
-        livetime=exposure,
-        frame_timeout=None,
-    )
-
-    @bpp.stage_decorator([det])
-    @bpp.run_decorator()
-    def innerTakeImg():
-        yield from bps.prepare(det, tigger_info, group=grp, wait=True)
-        yield from bps.trigger_and_read([det])
+    if fast_kinetics_height is not None and not isinstance(det, Andor2Ad):
+        raise ValueError(f"Fast Kinetics needs an Andor2Ad, got {det.name}.")
+    # driver settings from before Fast Kinetics, written back at the end
+    normal_settings: dict = {}
+
+    def setupAndTakeImg():
+        _md: dict = {}
+        if fast_kinetics_height is not None:
+            normal_settings["image_mode"] = yield from bps.rd(det.drv.image_mode)
+            normal_settings["size_y"] = yield from bps.rd(det.drv.size_y)
+            det.controller.use_fast_kinetics(fast_kinetics_height)
+        grp = short_uid("prepare")
+        deadtime: float = yield from get_deadtime(det, exposure)
+        if fast_kinetics_height is not None:
+            _md["fast_kinetics"] = {
+                "window_height": fast_kinetics_height,
+                "series_length": n_img,
+                "duration": det.controller.fast_kinetics_duration(exposure, n_img),
+            }
+        tigger_info = TriggerInfo(
+            number_of_triggers=n_img,
+            trigger=det_trig,
+            deadtime=deadtime,
+            livetime=exposure,
+            frame_timeout=None,
+        )
+
+        @bpp.stage_decorator([det])
+        @bpp.run_decorator(md=_md)
+        def innerTakeImg():
+            yield from bps.prepare(det, tigger_info, group=grp, wait=True)
+            yield from bps.trigger_and_read([det])
+
+        yield from innerTakeImg()
+
+    def normal_mode():
+        if fast_kinetics_height is not None:
+            det.controller.use_fast_kinetics(None)
+        if normal_settings:
+            yield from bps.mv(
+                det.drv.image_mode,
+                normal_settings["image_mode"],
+                det.drv.size_y,
+                normal_settings["size_y"],
+            )
+        yield from bps.null()
 
-    yield from innerTakeImg()
+    yield from finalize_wrapper(plan=setupAndTakeImg(), final_plan=normal_mode())
 
 
 def tiggerImg(dets: Andor2Ad | Andor3Ad, value: int) -> MsgGenerator:
@@ -1,17 +1,65 @@
+import time
+from collections.abc import Iterable
+from enum import Enum
 from typing import Any
 
 import bluesky.plan_stubs as bps
 import bluesky.preprocessors as bpp
+import numpy as np
 from blueapi.core import MsgGenerator
 from bluesky.preprocessors import (
     finalize_wrapper,
 )
+from bluesky.protocols import Triggerable
 from bluesky.utils import short_uid
-from numpy import linspace
+from ophyd_async.core import (
+    DEFAULT_TIMEOUT,
+    DetectorTrigger,
+    StandardDetector,
+    TriggerInfo,
+)
 from ophyd_async.epics.motor import FlyMotorInfo, Motor
 
+from p99_bluesky.devices.andorAd import Andor2Ad, Andor3Ad
 from p99_bluesky.log import LOGGER
-from p99_bluesky.plan_stubs.motor_plan import check_within_limit
+from p99_bluesky.plan_stubs.detector_plan import get_deadtime, set_software_trigger
+from p99_bluesky.plan_stubs.motor_plan import (
+    chain_move,
+    check_grid_trajectories,
+    check_path_trajectory,
+    check_within_limit,
+    checkpoint_row,
+    get_grid_trajectory,
+    get_region_order,
+    get_row_speed_controller,
+)
+from p99_bluesky.utility import plan_clock
+from p99_bluesky.utility.event_page_buffer import EventPageBuffer
+from p99_bluesky.utility.plan_timer import PlanTimer
+from p99_bluesky.utility.position_monitor import PositionMonitor
+from p99_bluesky.utility.refinement import (
+    GridDataCollector,
+    RefineMetric,
+    metric_map,
+    refine_rows,
+    regrid_rows,
+)
+from p99_bluesky.utility.row_checkpoint import RowCheckpoint
+from p99_bluesky.utility.row_speed_controller import RowSpeedController
+from p99_bluesky.utility.sample_clock import SampleClock
+from p99_bluesky.utility.trajectory import GridTrajectory, PathTrajectory
+
+
+class FlyTriggerMode(str, Enum):
+    """How the detectors are triggered while the motor is flying.
+
+    SOFTWARE: trigger_and_read in a loop until the motor stops.
+    HARDWARE: detectors prepared once for the whole move and left to run
+        at their own frame rate, frames collected at the end.
+    """
+
+    SOFTWARE = "software"
+    HARDWARE = "hardware"
 
 
 def fast_scan_1d(
@@ -20,6 +68,11 @@ def fast_scan_1d(
     start: float,
     end: float,
     motor_speed: float | None = None,
+    trigger_mode: FlyTriggerMode = FlyTriggerMode.SOFTWARE,
+    sample_period: float | None = None,
+    batch_size: int | None = None,
+    batch_time: float = 1.0,
+    software_trigger: bool = False,
 ) -> MsgGenerator:
     """
     One axis fast scan, using _fast_scan_1d.
@@ -37,7 +90,28 @@ def fast_scan_1d(
 
     motor_speed: Optional[float] = None,
         The speed of the motor during scan
+    trigger_mode: FlyTriggerMode = FlyTriggerMode.SOFTWARE,
+        Software triggering or hardware timed acquisition, see _fast_scan_1d. In
+        hardware the frames of the move go into one HDF file.
+    sample_period: float | None = None,
+        Time between software triggers, if None trigger back to back.
+        The sampling statistics go into the "sampling" stream at the end. Not with
+        a hardware fly, see _check_software_options.
+    batch_size: int | None = None,
+        Emit the software triggered points as event pages of up to batch_size
+        points instead of one event each, if None every point is an event. Not
+        with a StandardDetector, see _event_buffer.
+    batch_time: float = 1.0,
+        Longest time in second a point is held back when batching.
+    software_trigger: bool = False,
+        Keep the area detectors armed and take each point with their software
+        trigger, see _software_triggered.
     """
+    _check_software_options(trigger_mode, sample_period)
+    sample_clock = SampleClock(sample_period, name="sampling") if sample_period else None
+    position_monitor = PositionMonitor(motor.user_readback, name=motor.user_readback.name)
+    event_buffer = _event_buffer(dets, [position_monitor], batch_size, batch_time)
+    software_triggered = _software_triggered(dets, software_trigger, trigger_mode)
 
     @bpp.stage_decorator(dets)
     @bpp.run_decorator()
@@ -49,7 +123,19 @@ def fast_scan_1d(
         motor_speed: float | None = None,
     ):
         yield from check_within_limit([start, end], motor)
-        yield from _fast_scan_1d(dets, motor, start, end, motor_speed)
+        yield from set_software_trigger(software_triggered)
+        yield from _fast_scan_1d(
+            dets,
+            motor,
+            start,
+            end,
+            motor_speed,
+            trigger_mode,
+            sample_clock=sample_clock,
+            position_monitor=position_monitor,
+            event_buffer=event_buffer,
+        )
+        yield from _read_sample_clock(sample_clock)
 
     yield from finalize_wrapper(
         plan=inner_fast_scan_1d(dets, motor, start, end, motor_speed),
@@ -69,6 +155,17 @@ def fast_scan_grid(
     motor_speed: float | None = None,
     snake_axes: bool = False,
     md: dict | None = None,
+    trigger_mode: FlyTriggerMode = FlyTriggerMode.SOFTWARE,
+    sample_period: float | None = None,
+    batch_size: int | None = None,
+    batch_time: float = 1.0,
+    plan_time: float | None = None,
+    row_overhead: float = 0.0,
+    correct_speed: bool = False,
+    row_checkpoints: bool = False,
+    first_row: int = 0,
+    position_lag: float = 0.0,
+    software_trigger: bool = False,
 ) -> MsgGenerator:
     """
     Same as fast_scan_1d with an extra axis to step through forming a grid.
@@ -97,61 +194,692 @@ def fast_scan_grid(
     snake_axes:
         If Ture. Scan motor will start an other line where it ended.
     md:
-        place holder for meta data for future.
+        Extra metadata for the start document, which also holds the
+        precomputed "trajectory" of the grid, see GridTrajectory.
+    trigger_mode:
+        Software triggering or hardware timed acquisition, see _fast_scan_1d. In
+        hardware the detectors are prepared for the frames of each row as it
+        starts, so each row goes into an HDF file of its own.
+    sample_period:
+        Time between software triggers, if None trigger back to back.
+        The sampling statistics go into the "sampling" stream at the end. Not with
+        a hardware fly, see _check_software_options.
+    batch_size:
+        Emit the software triggered points as event pages of up to batch_size
+        points instead of one event each, if None every point is an event. Not
+        with a StandardDetector, see _event_buffer.
+    batch_time:
+        Longest time in second a point is held back when batching.
+    plan_time:
+        Time in second the grid was given, if set the plan time, the estimated
+        duration and the actual duration go into the "duration" stream at the end.
+    row_overhead:
+        Fixed time in second lost on every row, for the estimated duration.
+    correct_speed:
+        If True and plan_time is set, time every row and refit the speed, or the
+        step size if the motor is too slow, of the rows left so the grid still
+        finishes in plan_time, see RowSpeedController. Every correction goes into
+        the "speed_correction" stream.
+    row_checkpoints:
+        If True, every row is put into the "row_checkpoint" stream once done and
+        followed by a checkpoint, see RowCheckpoint.
+    first_row:
+        Index of the first row in the row checkpoints, for a grid that carries on
+        from an interrupted one.
+    position_lag:
+        Time in second the detector data is behind the scan position read with it
+        by software triggers, the position is taken that much earlier. The shift
+        estimate_snake_lag finds between snaking rows over the scan speed. Not
+        with a hardware fly, see _check_software_options.
+    software_trigger:
+        Keep the area detectors armed and take each point with their software
+        trigger, see _software_triggered.
+    """
+    # Work out every row and check it against the limits before anything moves.
+    trajectory: GridTrajectory = yield from get_grid_trajectory(
+        step_motor,
+        step_start,
+        step_end,
+        num_step,
+        scan_motor,
+        scan_start,
+        scan_end,
+        motor_speed,
+        snake_axes,
+        row_overhead,
+    )
+    yield from fast_scan_trajectory(
+        dets,
+        step_motor,
+        scan_motor,
+        trajectory,
+        md=md,
+        trigger_mode=trigger_mode,
+        sample_period=sample_period,
+        batch_size=batch_size,
+        batch_time=batch_time,
+        plan_time=plan_time,
+        correct_speed=correct_speed,
+        row_checkpoints=row_checkpoints,
+        first_row=first_row,
+        position_lag=position_lag,
+        software_trigger=software_trigger,
+    )
+
+
+def fast_scan_trajectory(
+    dets: list[Any],
+    step_motor: Motor,
+    scan_motor: Motor,
+    trajectory: GridTrajectory,
+    md: dict | None = None,
+    trigger_mode: FlyTriggerMode = FlyTriggerMode.SOFTWARE,
+    sample_period: float | None = None,
+    batch_size: int | None = None,
+    batch_time: float = 1.0,
+    plan_time: float | None = None,
+    correct_speed: bool = False,
+    row_checkpoints: bool = False,
+    first_row: int = 0,
+    position_lag: float = 0.0,
+    software_trigger: bool = False,
+) -> MsgGenerator:
+    """
+    Fly a grid already worked out and checked against the limits, e.g. by
+    get_stxm_trajectory, at its own speed.
+
+    Everything but the grid is as fast_scan_grid, which works the trajectory out
+    from the positions first.
+
+    Parameters
+    ----------
+    dets: list
+        list of 'readable' objects
+    step_motor: Motor
+        The motor stepping between rows.
+    scan_motor: Motor
+        The motor that will not stop during measurements.
+    trajectory: GridTrajectory
+        The grid, see GridTrajectory.
     """
+    _check_software_options(trigger_mode, sample_period, position_lag)
+    sample_clock = SampleClock(sample_period, name="sampling") if sample_period else None
+    software_triggered = _software_triggered(dets, software_trigger, trigger_mode)
+    plan_timer = (
+        PlanTimer(plan_time, trajectory.total_duration, name="duration")
+        if plan_time
+        else None
+    )
+    row_controller = (
+        (yield from get_row_speed_controller(trajectory, plan_time, scan_motor))
+        if plan_time and correct_speed
+        else None
+    )
+    row_checkpoint = (
+        RowCheckpoint(first_row, name="row_checkpoint") if row_checkpoints else None
+    )
+    position_monitor = PositionMonitor(
+        scan_motor.user_readback, lag=position_lag, name=scan_motor.user_readback.name
+    )
+    event_buffer = _event_buffer(
+        dets, [step_motor, position_monitor], batch_size, batch_time
+    )
+    _md = {
+        "trajectory": trajectory.to_md(),
+        "hints": _grid_hints(step_motor, scan_motor),
+        "position_lag": position_lag,
+    }
+    _md.update(md or {})
 
     @bpp.stage_decorator(dets)
-    @bpp.run_decorator()
-    def inner_fast_scan_grid(
+    @bpp.run_decorator(md=_md)
+    def inner_fast_scan_trajectory(
         dets: list[Any],
         step_motor: Motor,
-        step_start: float,
-        step_end: float,
-        num_step: int,
         scan_motor: Motor,
-        scan_start: float,
-        scan_end: float,
-        motor_speed: float | None = None,
-        snake_axes: bool = False,
     ):
-        yield from check_within_limit([step_start, step_end], step_motor)
-        yield from check_within_limit([scan_start, scan_end], scan_motor)
-        steps = linspace(step_start, step_end, num_step, endpoint=True)
-        if snake_axes:
-            for cnt, step in enumerate(steps):
-                yield from bps.abs_set(step_motor, step)
-                if cnt % 2 == 0:
-                    yield from _fast_scan_1d(
-                        dets + [step_motor], scan_motor, scan_start, scan_end, motor_speed
-                    )
-                else:
-                    yield from _fast_scan_1d(
-                        dets + [step_motor], scan_motor, scan_end, scan_start, motor_speed
-                    )
-        else:
-            for step in steps:
-                yield from bps.abs_set(step_motor, step)
-                yield from _fast_scan_1d(
-                    dets + [step_motor], scan_motor, scan_start, scan_end, motor_speed
+        yield from set_software_trigger(software_triggered)
+        # The scan motor speed is read once and restored once for the whole grid.
+        fly_velocity = yield from get_fly_velocity(scan_motor, trajectory.speed)
+        if plan_timer is not None:
+            plan_timer.start()
+        if row_controller is not None:
+            row_controller.start()
+
+        def grid_rows():
+            yield from _fly_grid_rows(
+                dets,
+                step_motor,
+                scan_motor,
+                row_controller
+                if row_controller is not None
+                else zip(
+                    trajectory.step_positions,
+                    trajectory.row_starts,
+                    trajectory.row_ends,
+                    strict=True,
+                ),
+                fly_velocity,
+                trigger_mode,
+                sample_clock=sample_clock,
+                position_monitor=position_monitor,
+                event_buffer=event_buffer,
+                row_controller=row_controller,
+                row_checkpoint=row_checkpoint,
+            )
+            yield from _read_sample_clock(sample_clock)
+            yield from _read_plan_timer(plan_timer)
+
+        yield from finalize_wrapper(
+            plan=grid_rows(),
+            final_plan=reset_speed(fly_velocity.original_speed, scan_motor),
+        )
+
+    yield from finalize_wrapper(
+        plan=inner_fast_scan_trajectory(dets, step_motor, scan_motor),
+        final_plan=clean_up(),
+    )
+
+
+def fast_scan_regions(
+    dets: list[Any],
+    step_motor: Motor,
+    scan_motor: Motor,
+    trajectories: list[GridTrajectory],
+    stream_names: list[str] | None = None,
+    md: dict | None = None,
+    trigger_mode: FlyTriggerMode = FlyTriggerMode.SOFTWARE,
+    optimise_order: bool = True,
+) -> MsgGenerator:
+    """
+    Several grids flown one after the other in a single run, each into its own
+    stream, the detectors staged once for all of them.
+
+    Every grid is checked against the motor limits before anything moves. With
+    optimise_order the grids are reordered, and each started from whichever corner
+    keeps the travel between them shortest, see order_regions. The scan motor speed
+    is read once and restored once at the end, each grid is flown at its own speed.
+    The start document has a "regions" entry with, in scan order, the index and
+    stream of every grid and its "trajectory" from its chosen corner.
+
+    Parameters
+    ----------
+    dets: list
+        list of 'readable' objects
+    step_motor: Motor
+        The motor stepping between rows.
+    scan_motor: Motor
+        The motor that will not stop during measurements.
+    trajectories: list[GridTrajectory]
+        The grids, see GridTrajectory.
+    stream_names: list[str] | None
+        Stream of each grid, "region0", "region1"... in the order given if None.
+    md: dict | None
+        Extra metadata for the start document.
+    trigger_mode: FlyTriggerMode
+        Software triggering or hardware timed acquisition, see _fast_scan_1d.
+    optimise_order: bool
+        If True, reorder the grids to keep the travel between them short, else
+        scan them as given.
+    """
+    if not trajectories:
+        raise ValueError("No region to scan.")
+    if stream_names is None:
+        stream_names = [f"region{index}" for index in range(len(trajectories))]
+    if len(stream_names) != len(trajectories):
+        raise ValueError(
+            f"{len(stream_names)} stream names for {len(trajectories)} regions."
+        )
+    yield from check_grid_trajectories(step_motor, scan_motor, trajectories)
+    order = (
+        (yield from get_region_order(step_motor, scan_motor, trajectories))
+        if optimise_order
+        else list(enumerate(trajectories))
+    )
+    position_monitor = PositionMonitor(
+        scan_motor.user_readback, name=scan_motor.user_readback.name
+    )
+    _md = {
+        "regions": [
+            {
+                "index": index,
+                "stream_name": stream_names[index],
+                "trajectory": trajectory.to_md(),
+            }
+            for index, trajectory in order
+        ]
+    }
+    _md.update(md or {})
+
+    @bpp.stage_decorator(dets)
+    @bpp.run_decorator(md=_md)
+    def inner_fast_scan_regions():
+        fly_velocity = yield from get_fly_velocity(scan_motor, order[0][1].speed)
+
+        def regions():
+            for index, trajectory in order:
+                LOGGER.info(f"Scan region {index} into {stream_names[index]}.")
+                fly_velocity.set_speed(trajectory.speed)
+                yield from _fly_grid_rows(
+                    dets,
+                    step_motor,
+                    scan_motor,
+                    zip(
+                        trajectory.step_positions,
+                        trajectory.row_starts,
+                        trajectory.row_ends,
+                        strict=True,
+                    ),
+                    fly_velocity,
+                    trigger_mode,
+                    position_monitor=position_monitor,
+                    stream_name=stream_names[index],
                 )
 
+        yield from finalize_wrapper(
+            plan=regions(),
+            final_plan=reset_speed(fly_velocity.original_speed, scan_motor),
+        )
+
+    yield from finalize_wrapper(plan=inner_fast_scan_regions(), final_plan=clean_up())
+
+
+def adaptive_fast_scan_grid(
+    dets: list[Any],
+    step_motor: Motor,
+    step_start: float,
+    step_end: float,
+    num_step: int,
+    scan_motor: Motor,
+    scan_start: float,
+    scan_end: float,
+    signal: str,
+    threshold: float = 0.5,
+    refine: int = 2,
+    metric: RefineMetric = RefineMetric.GRADIENT,
+    num_bins: int | None = None,
+    motor_speed: float | None = None,
+    snake_axes: bool = False,
+    md: dict | None = None,
+) -> MsgGenerator:
+    """
+    fast_scan_grid that goes back over the interesting part of the map.
+
+    A coarse grid of num_step rows is flown first. The signal of its points is
+    averaged onto a map of one row per step and num_bins columns along the scan
+    axis, and the metric of that map decides where to look closer: every gap
+    between two coarse rows where the metric goes over threshold times its
+    largest value gets refine extra rows, flown only over the part of the scan
+    axis that went over. All the rows are in the same run and stream.
+
+    Parameters
+    ----------
+    detectors : list
+        list of 'readable' objects
+    step_motor :
+        Motor (moveable, readable)
+    step_start :
+        Starting position for slow/stepping motor.
+    step_end :
+        Ending position for step motor.
+    num_step:
+        Number of coarse rows.
+    scan_motor:  Motor (moveable, readable)
+        The motor that will not stop during measurements.
+    scan_start:
+        Scan motor starting position.
+    scan_end:
+        Scan motor ending position.
+    signal:
+        Data key in the primary stream that the map is made of.
+    threshold:
+        Fraction of the largest metric value above which a gap is refined.
+    refine:
+        Number of extra rows in each refined gap.
+    metric:
+        How the map is turned into the metric, see RefineMetric.
+    num_bins:
+        Number of columns of the map, if None the average number of points
+        in a coarse row.
+    motor_speed: float optional.
+        Speed of the scanning motor during measurements.
+        If None, it will use current speed.
+    snake_axes:
+        If True, scan motor will start an other line where it ended.
+    md:
+        Extra metadata for the start document, which also holds the coarse
+        "trajectory" and the "refinement" settings.
+    """
+    if num_step < 2:
+        raise ValueError(f"Adaptive grid needs at least 2 coarse rows, got {num_step}.")
+    trajectory: GridTrajectory = yield from get_grid_trajectory(
+        step_motor,
+        step_start,
+        step_end,
+        num_step,
+        scan_motor,
+        scan_start,
+        scan_end,
+        motor_speed,
+        snake_axes,
+    )
+    position_monitor = PositionMonitor(
+        scan_motor.user_readback, name=scan_motor.user_readback.name
+    )
+    collector = GridDataCollector(
+        step_motor.user_readback.name, position_monitor.name, signal
+    )
+    _md = {
+        "trajectory": trajectory.to_md(),
+        "hints": _grid_hints(step_motor, scan_motor),
+        "refinement": {
+            "signal": signal,
+            "threshold": threshold,
+            "refine": refine,
+            "metric": metric.value,
+        },
+    }
+    _md.update(md or {})
+
+    def fine_rows() -> list[tuple[float, float, float]]:
+        if not len(collector):
+            raise ValueError(f"No {signal} data in the coarse grid to refine on.")
+        steps, scans, values = collector.arrays()
+        bins = num_bins or max(2, len(collector) // num_step)
+        scan_edges = np.linspace(scan_start, scan_end, bins + 1)
+        image = regrid_rows(steps, scans, values, trajectory.step_positions, scan_edges)
+        rows = refine_rows(
+            trajectory.step_positions,
+            scan_edges,
+            metric_map(image, metric),
+            threshold,
+            refine,
+        )
+        if snake_axes:
+            # carry on from the end of the last coarse row, then alternate
+            reverse_first = trajectory.directions[-1] == trajectory.directions[0]
+            rows = [
+                (step, end, start)
+                if (cnt % 2 == 0) == reverse_first
+                else (step, start, end)
+                for cnt, (step, start, end) in enumerate(rows)
+            ]
+        LOGGER.info(f"Refining {signal} map with {len(rows)} extra rows.")
+        return rows
+
+    @bpp.subs_decorator(collector)
+    @bpp.stage_decorator(dets)
+    @bpp.run_decorator(md=_md)
+    def inner_adaptive_fast_scan_grid():
+        fly_velocity = yield from get_fly_velocity(scan_motor, motor_speed)
+
+        def grid_rows():
+            coarse_rows = zip(
+                trajectory.step_positions,
+                trajectory.row_starts,
+                trajectory.row_ends,
+                strict=True,
+            )
+            yield from _fly_grid_rows(
+                dets,
+                step_motor,
+                scan_motor,
+                coarse_rows,
+                fly_velocity,
+                position_monitor=position_monitor,
+            )
+            yield from _fly_grid_rows(
+                dets,
+                step_motor,
+                scan_motor,
+                fine_rows(),
+                fly_velocity,
+                new_stream=False,
+                position_monitor=position_monitor,
+            )
+
+        yield from finalize_wrapper(
+            plan=grid_rows(),
+            final_plan=reset_speed(fly_velocity.original_speed, scan_motor),
+        )
+
     yield from finalize_wrapper(
-        plan=inner_fast_scan_grid(
-            dets,
-            step_motor,
-            step_start,
-            step_end,
-            num_step,
-            scan_motor,
-            scan_start,
-            scan_end,
-            motor_speed,
-            snake_axes,
-        ),
+        plan=inner_adaptive_fast_scan_grid(),
         final_plan=clean_up(),
     )
 
 
+def fast_scan_spiral(
+    dets: list[Any],
+    x_motor: Motor,
+    y_motor: Motor,
+    x_centre: float,
+    y_centre: float,
+    radius: float,
+    pitch: float,
+    speed: float,
+    segments_per_turn: int = 16,
+    md: dict | None = None,
+) -> MsgGenerator:
+    """
+    Fly both motors together along an Archimedean spiral, see fast_scan_path.
+
+    Parameters
+    ----------
+    detectors : list
+        list of 'readable' objects
+    x_motor: Motor (moveable, readable)
+        Motor for the x axis.
+    y_motor: Motor (moveable, readable)
+        Motor for the y axis.
+    x_centre:
+        x position of the centre of the spiral.
+    y_centre:
+        y position of the centre of the spiral.
+    radius:
+        Radius the spiral goes out to.
+    pitch:
+        Distance between turns.
+    speed:
+        Speed along the path.
+    segments_per_turn:
+        Number of straight segments each turn is flown as.
+    md:
+        Extra metadata for the start document.
+    """
+    trajectory = PathTrajectory.spiral(
+        x_centre, y_centre, radius, pitch, speed, segments_per_turn
+    )
+    yield from fast_scan_path(dets, x_motor, y_motor, trajectory, md)
+
+
+def fast_scan_lissajous(
+    dets: list[Any],
+    x_motor: Motor,
+    y_motor: Motor,
+    x_centre: float,
+    y_centre: float,
+    x_amplitude: float,
+    y_amplitude: float,
+    x_frequency: int,
+    y_frequency: int,
+    period: float,
+    num_segments: int = 200,
+    md: dict | None = None,
+) -> MsgGenerator:
+    """
+    Fly both motors together over one period of a Lissajous figure, see
+    fast_scan_path.
+
+    Parameters
+    ----------
+    detectors : list
+        list of 'readable' objects
+    x_motor: Motor (moveable, readable)
+        Motor for the x axis.
+    y_motor: Motor (moveable, readable)
+        Motor for the y axis.
+    x_centre:
+        Centre of the x oscillation.
+    y_centre:
+        Centre of the y oscillation.
+    x_amplitude:
+        Amplitude of the x oscillation.
+    y_amplitude:
+        Amplitude of the y oscillation.
+    x_frequency:
+        Number of x oscillations in the period.
+    y_frequency:
+        Number of y oscillations in the period.
+    period:
+        Time for the whole figure in second.
+    num_segments:
+        Number of straight segments the figure is flown as.
+    md:
+        Extra metadata for the start document.
+    """
+    trajectory = PathTrajectory.lissajous(
+        x_centre,
+        y_centre,
+        x_amplitude,
+        y_amplitude,
+        x_frequency,
+        y_frequency,
+        period,
+        num_segments,
+    )
+    yield from fast_scan_path(dets, x_motor, y_motor, trajectory, md)
+
+
+def fast_scan_path(
+    dets: list[Any],
+    x_motor: Motor,
+    y_motor: Motor,
+    trajectory: PathTrajectory,
+    md: dict | None = None,
+) -> MsgGenerator:
+    """
+    Software triggered fly scan with both motors moving along a two axis path.
+
+    Both motors are moved to one run-up before the first vertex, then sent on from
+    vertex to vertex without stopping: at the time each segment is due to start,
+    every axis that moves over it is given the segment velocity and the next
+    vertex as its setpoint, while it is still on its way to the current one. The
+    last segment goes on for a run-down past the last vertex, which is waited for.
+    The detectors are triggered and read back to back all along the path, with
+    both positions interpolated from their readback monitors onto the time of each
+    reading, ready to be regridded. There is no row turnaround, only the change of
+    velocity between segments. An axis that does not move over a segment is held
+    where it is.
+
+    Parameters
+    ----------
+    detectors : list
+        list of 'readable' objects
+    x_motor: Motor (moveable, readable)
+        Motor for the x axis.
+    y_motor: Motor (moveable, readable)
+        Motor for the y axis.
+    trajectory: PathTrajectory
+        Vertices and timing of the path.
+    md:
+        Extra metadata for the start document, which also holds the "path".
+    """
+    yield from check_path_trajectory(trajectory, x_motor, y_motor)
+    motors = (x_motor, y_motor)
+    monitors = [
+        PositionMonitor(motor.user_readback, name=motor.user_readback.name)
+        for motor in motors
+    ]
+    _md = {"path": trajectory.to_md()}
+    _md.update(md or {})
+
+    @bpp.stage_decorator(dets)
+    @bpp.run_decorator(md=_md)
+    def inner_fast_scan_path():
+        original_speeds = []
+        acceleration_times = []
+        for motor in motors:
+            original_speeds.append((yield from bps.rd(motor.velocity)))
+            acceleration_times.append((yield from bps.rd(motor.acceleration_time)))
+
+        def fly_segments():
+            prepared = trajectory.prepared_positions(*acceleration_times)
+            completed = trajectory.completed_positions(*acceleration_times)
+            yield from bps.mv(x_motor, prepared[0], y_motor, prepared[1])
+            for monitor in monitors:
+                yield from bps.kickoff(monitor, wait=True)
+            # Up to speed at the first vertex one acceleration time after the start
+            path_start = plan_clock.monotonic() + max(acceleration_times)
+            grp = short_uid("path")
+            for segment in range(trajectory.num_segments):
+                yield from _fly_segment(
+                    dets,
+                    motors,
+                    monitors,
+                    trajectory,
+                    segment,
+                    path_start,
+                    completed,
+                    grp,
+                )
+            yield from bps.wait(group=grp)
+            for monitor in monitors:
+                yield from bps.complete(monitor, wait=True)
+
+        def reset_speeds():
+            for original_speed, motor in zip(original_speeds, motors, strict=True):
+                yield from reset_speed(original_speed, motor)
+
+        yield from finalize_wrapper(plan=fly_segments(), final_plan=reset_speeds())
+
+    yield from finalize_wrapper(plan=inner_fast_scan_path(), final_plan=clean_up())
+
+
+class FlyVelocity:
+    """
+    Speed of a flying motor shared by every row of a scan.
+
+    Holds the speed the motor had before the scan, so it is only read and restored
+    once, and the FlyMotorInfo for each direction so rows going the same way reuse
+    it.
+
+    Parameters
+    ----------
+    original_speed: float
+        Motor speed before the scan.
+    speed: float
+        Motor speed during the fly.
+    """
+
+    def __init__(self, original_speed: float, speed: float) -> None:
+        self.original_speed = original_speed
+        self.speed = speed
+        self._fly_infos: dict[tuple[float, float], FlyMotorInfo] = {}
+
+    def fly_info(self, start: float, end: float) -> FlyMotorInfo:
+        if (start, end) not in self._fly_infos:
+            self._fly_infos[(start, end)] = FlyMotorInfo(
+                start_position=start,
+                end_position=end,
+                time_for_move=abs(start - end) / self.speed,
+            )
+        return self._fly_infos[(start, end)]
+
+    def set_speed(self, speed: float) -> None:
+        """Fly the rows from now on at speed."""
+        if speed != self.speed:
+            self.speed = speed
+            self._fly_infos.clear()
+
+
+def get_fly_velocity(motor: Motor, motor_speed: float | None = None) -> MsgGenerator:
+    """Read the current motor speed into a FlyVelocity, flying at motor_speed or
+    at the current speed if it is not given."""
+    old_speed: float = yield from bps.rd(motor.velocity)
+    return FlyVelocity(old_speed, motor_speed if motor_speed else old_speed)
+
+
 def reset_speed(old_speed, motor: Motor):
     LOGGER.info(f"Clean up: setting motor speed to {old_speed}.")
     if old_speed:
@@ -170,23 +898,43 @@ def _fast_scan_1d(
     start: float,
     end: float,
     motor_speed: float | None = None,
+    trigger_mode: FlyTriggerMode = FlyTriggerMode.SOFTWARE,
+    new_stream: bool = True,
+    sample_clock: SampleClock | None = None,
+    group: str | None = None,
+    fly_velocity: FlyVelocity | None = None,
+    position_monitor: PositionMonitor | None = None,
+    event_buffer: EventPageBuffer | None = None,
+    stream_name: str = "primary",
 ) -> MsgGenerator:
     """
     The logic for one axis fast scan, used in fast_scan_1d and fast_scan_grid
 
     In this scan:
-    1) The motor moves to the starting point.
+    1) The motor moves to the starting point, together with anything already
+        started in group.
     2) The motor speed is changed
     3) The motor is set in motion toward the end point
     4) During this movement detectors are triggered and read out until
-        the endpoint is reached or stopped.
-    5) Clean up, reset motor speed.
+        the endpoint is reached or stopped. The motor position of each point is
+        interpolated from a monitor on its readback onto the time of the
+        detector reading, rather than read separately.
+    5) Clean up, reset motor speed, unless fly_velocity is given in which case
+        the caller restores it once for the whole scan.
 
     Note: This is purely software triggering which result in variable accuracy.
     However, fast scan does not require encoder and hardware setup and should
     work for all motor. It is most frequently use for alignment and
     slow motion measurements.
 
+    With trigger_mode HARDWARE step 4 is replaced by preparing the detectors once
+    for the number of frames that fit in the move, kicking them off together with
+    the motor and collecting the frames as they are written, so the point rate is
+    set by the detector rather than by the RunEngine round trip. Each prepare opens
+    a new HDF file, so every move, e.g. each row of a grid, has a file of its own.
+    No position is read with the frames, sample_clock and position_monitor are
+    not used.
+
     Parameters
     ----------
     detectors : list
@@ -200,43 +948,409 @@ def _fast_scan_1d(
 
     motor_speed: Optional[float] = None,
         The speed of the motor during scan
+    trigger_mode: FlyTriggerMode = FlyTriggerMode.SOFTWARE,
+        How the detectors are triggered during the move.
+    new_stream: bool = True,
+        Declare the collected stream, only needed on the first row of a grid.
+    sample_clock: SampleClock | None = None,
+        Pace the software triggers to the clock period instead of back to back.
+    group: str | None = None,
+        Group to add the move to the starting point to, so that moves already
+        started in it, e.g. the next step of a grid, are waited on together.
+    fly_velocity: FlyVelocity | None = None,
+        Scan level speed from get_fly_velocity, motor_speed is then ignored.
+        If None the speed is read here and reset at the end of the move.
+    position_monitor: PositionMonitor | None = None,
+        Monitor on the motor readback, reused by every row of a scan so they
+        all read the same device. If None one is made for this move.
+    event_buffer: EventPageBuffer | None = None,
+        Batch the software triggered points into event pages, the buffer is
+        declared as the stream and is emptied by the end of the move.
+        If None each point is emitted as an event.
+    stream_name: str = "primary",
+        Stream the detector data goes into.
     """
 
-    # read the current speed and store it
-    old_speed: float = yield from bps.rd(motor.velocity)
+    restore_speed = fly_velocity is None
+    if fly_velocity is None:
+        # read the current speed and store it
+        fly_velocity = yield from get_fly_velocity(motor, motor_speed)
+    assert fly_velocity is not None
+    if position_monitor is None:
+        position_monitor = PositionMonitor(
+            motor.user_readback, name=motor.user_readback.name
+        )
 
     def inner_fast_scan_1d(
         dets: list[Any],
         motor: Motor,
         start: float,
         end: float,
-        motor_speed: float | None = None,
     ):
-        if not motor_speed:
-            motor_speed = old_speed
-
         LOGGER.info(
             f"Starting 1d fly scan with {motor.name}:"
             + f" start position = {start}, end position = {end}."
         )
 
-        grp = short_uid("prepare")
-        fly_info = FlyMotorInfo(
-            start_position=start,
-            end_position=end,
-            time_for_move=abs(start - end) / motor_speed,
-        )
+        fly_info = fly_velocity.fly_info(start, end)
+        grp = group if group is not None else short_uid("prepare")
+        if trigger_mode == FlyTriggerMode.HARDWARE:
+            yield from _hardware_fly_1d(
+                dets, motor, fly_info, new_stream, grp, stream_name
+            )
+            return
         yield from bps.prepare(motor, fly_info, group=grp, wait=True)
         yield from bps.wait(group=grp)
-        yield from bps.kickoff(motor, group=grp, wait=True)
-        LOGGER.info(f"flying motor =  {motor.name} at speed = {motor_speed}")
+        if event_buffer is not None and new_stream:
+            yield from bps.declare_stream(event_buffer, name=stream_name, collect=True)
+        yield from bps.kickoff(position_monitor, wait=True)
+        yield from finalize_wrapper(
+            plan=software_fly(),
+            final_plan=end_software_fly(),
+        )
+
+    def software_fly():
+        yield from bps.kickoff(motor, wait=True)
+        LOGGER.info(f"flying motor =  {motor.name} at speed = {fly_velocity.speed}")
         done = yield from bps.complete(motor)
-        yield from bps.trigger_and_read(dets + [motor])
+        if sample_clock is not None:
+            sample_clock.start_row()
+        yield from _paced_trigger_and_read(
+            dets, position_monitor, sample_clock, event_buffer, stream_name
+        )
         while not done.done:
-            yield from bps.trigger_and_read(dets + [motor])
+            yield from _paced_trigger_and_read(
+                dets, position_monitor, sample_clock, event_buffer, stream_name
+            )
             yield from bps.checkpoint()
 
-    yield from finalize_wrapper(
-        plan=inner_fast_scan_1d(dets, motor, start, end, motor_speed),
-        final_plan=reset_speed(old_speed, motor),
+    def end_software_fly():
+        yield from bps.complete(position_monitor, wait=True)
+        # emit whatever is left of the last page of the row
+        if event_buffer is not None and len(event_buffer):
+            yield from bps.collect(event_buffer, name=stream_name)
+
+    if restore_speed:
+        yield from finalize_wrapper(
+            plan=inner_fast_scan_1d(dets, motor, start, end),
+            final_plan=reset_speed(fly_velocity.original_speed, motor),
+        )
+    else:
+        yield from inner_fast_scan_1d(dets, motor, start, end)
+
+
+def _fly_segment(
+    dets: list[Any],
+    motors: tuple[Motor, Motor],
+    position_monitors: list[PositionMonitor],
+    trajectory: PathTrajectory,
+    segment: int,
+    path_start: float,
+    completed_positions: tuple[float, float],
+    group: str,
+) -> MsgGenerator:
+    """Fly one segment of a two axis path, used in fast_scan_path.
+
+    The moving axes are sent on to the end of the segment at its start time, then
+    the detectors are read until it is due to end. The last segment ends on the
+    completed_positions, with a set in group, and is read until both motors stop
+    there."""
+    last = segment == trajectory.num_segments - 1
+    stopping = []
+    for motor, positions, velocities, completed in zip(
+        motors,
+        (trajectory.x, trajectory.y),
+        (trajectory.x_velocities, trajectory.y_velocities),
+        completed_positions,
+        strict=True,
+    ):
+        if last:
+            if velocities[segment]:
+                yield from bps.mv(motor.velocity, float(velocities[segment]))
+            stopping.append((yield from bps.abs_set(motor, completed, group=group)))
+        elif velocities[segment]:
+            yield from chain_move(
+                motor, float(positions[segment + 1]), float(velocities[segment])
+            )
+    segment_end = path_start + float(trajectory.times[segment + 1] - trajectory.times[0])
+    yield from _trigger_and_read_at_position(dets, position_monitors)
+    while plan_clock.monotonic() < segment_end or not all(
+        status.done for status in stopping
+    ):
+        yield from _trigger_and_read_at_position(dets, position_monitors)
+        yield from bps.checkpoint()
+    if last:
+        # Once more where the motors stopped
+        yield from _trigger_and_read_at_position(dets, position_monitors)
+
+
+def _fly_grid_rows(
+    dets: list[Any],
+    step_motor: Motor,
+    scan_motor: Motor,
+    rows: Iterable[tuple[float, float, float]],
+    fly_velocity: FlyVelocity,
+    trigger_mode: FlyTriggerMode = FlyTriggerMode.SOFTWARE,
+    new_stream: bool = True,
+    sample_clock: SampleClock | None = None,
+    position_monitor: PositionMonitor | None = None,
+    event_buffer: EventPageBuffer | None = None,
+    row_controller: RowSpeedController | None = None,
+    row_checkpoint: RowCheckpoint | None = None,
+    stream_name: str = "primary",
+) -> MsgGenerator:
+    """
+    Fly the scan motor over each row of step position, scan start and scan end
+    with _fast_scan_1d, the step motor is read with the detectors into
+    stream_name. The stream is declared on the first row if new_stream. With a
+    row_controller each row is flown at its current speed and reported to it once
+    done, its correction is read into the "speed_correction" stream. With a
+    row_checkpoint each row done is read into the "row_checkpoint" stream and
+    followed by a checkpoint.
+    """
+    for cnt, (step, row_start, row_end) in enumerate(rows):
+        if row_controller is not None:
+            fly_velocity.set_speed(row_controller.current_speed)
+        # Start the step move and let the scan motor run back to the start
+        # of the row at the same time, both are waited on in the prepare.
+        grp = short_uid("row")
+        yield from bps.abs_set(step_motor, step, group=grp)
+        yield from _fast_scan_1d(
+            dets + [step_motor],
+            scan_motor,
+            float(row_start),
+            float(row_end),
+            trigger_mode=trigger_mode,
+            new_stream=new_stream and cnt == 0,
+            sample_clock=sample_clock,
+            group=grp,
+            fly_velocity=fly_velocity,
+            position_monitor=position_monitor,
+            event_buffer=event_buffer,
+            stream_name=stream_name,
+        )
+        if row_controller is not None:
+            row_controller.end_row()
+            yield from bps.trigger_and_read([row_controller], name="speed_correction")
+        if row_checkpoint is not None:
+            yield from checkpoint_row(row_checkpoint, step)
+
+
+def _paced_trigger_and_read(
+    readables: list[Any],
+    position_monitor: PositionMonitor,
+    sample_clock: SampleClock | None,
+    event_buffer: EventPageBuffer | None = None,
+    stream_name: str = "primary",
+) -> MsgGenerator:
+    """_trigger_and_read_at_position, waiting for the next sampling slot if there
+    is a clock."""
+    if sample_clock is not None:
+        delay = sample_clock.time_to_next_slot()
+        if delay > 0:
+            yield from bps.sleep(delay)
+        sample_clock.mark()
+    yield from _trigger_and_read_at_position(
+        readables, [position_monitor], stream_name, event_buffer
+    )
+
+
+def _trigger_and_read_at_position(
+    readables: list[Any],
+    position_monitors: list[PositionMonitor],
+    name: str = "primary",
+    event_buffer: EventPageBuffer | None = None,
+) -> MsgGenerator:
+    """
+    trigger_and_read of readables, with the positions from position_monitors at the
+    time the trigger finished added to the same event.
+
+    The time is taken from the clock rather than the reading timestamps, a
+    StandardDetector reads nothing and the other readings, like the step motor of a
+    grid, can be much older than the point.
+
+    With an event_buffer the readings are added to it rather than emitted, and the
+    buffer is collected into an event page once it is due.
+    """
+    grp = short_uid("trigger")
+    for obj in readables:
+        if isinstance(obj, Triggerable):
+            yield from bps.trigger(obj, group=grp)
+    yield from bps.wait(group=grp)
+    timestamp = time.time()
+    if event_buffer is None:
+        yield from bps.create(name)
+    readings = {}
+    for obj in readables:
+        readings.update((yield from bps.read(obj)))
+    for position_monitor in position_monitors:
+        position_monitor.capture_at(timestamp)
+        readings.update((yield from bps.read(position_monitor)))
+    if event_buffer is None:
+        yield from bps.save()
+        return
+    event_buffer.add(readings)
+    if event_buffer.due():
+        yield from bps.collect(event_buffer, name=name)
+
+
+def _event_buffer(
+    dets: list[Any], readables: list[Any], batch_size: int | None, batch_time: float
+) -> EventPageBuffer | None:
+    """Buffer batching the points of dets and readables, None if batch_size is None.
+
+    A StandardDetector writes its frames to file and only says where in stream
+    resource and datum documents, which an event page has no room for, so it can
+    not be batched."""
+    if not batch_size:
+        return None
+    standard = [det.name for det in dets if isinstance(det, StandardDetector)]
+    if standard:
+        raise ValueError(f"Points of {standard} can not be batched into event pages.")
+    return EventPageBuffer(dets + readables, batch_size, batch_time)
+
+
+def _software_triggered(
+    dets: list[Any], software_trigger: bool, trigger_mode: FlyTriggerMode
+) -> list[Andor2Ad | Andor3Ad]:
+    """Detectors of dets to take each point of a software fly with the software
+    trigger, none unless software_trigger. Raises ValueError for a hardware fly,
+    where the detectors set their own frame rate, or if a StandardDetector in dets
+    has no software trigger."""
+    if not software_trigger:
+        return []
+    if trigger_mode != FlyTriggerMode.SOFTWARE:
+        raise ValueError("Only software triggered flies can use the software trigger.")
+    standard = [det for det in dets if isinstance(det, StandardDetector)]
+    others = [det.name for det in standard if not isinstance(det, Andor2Ad | Andor3Ad)]
+    if others:
+        raise ValueError(f"{others} have no software trigger.")
+    return standard
+
+
+def _check_software_options(
+    trigger_mode: FlyTriggerMode,
+    sample_period: float | None = None,
+    position_lag: float = 0.0,
+) -> None:
+    """Raise ValueError if sample_period or position_lag, which only pace software
+    triggers and shift the positions read with them, are given to a hardware fly,
+    where the detectors set their own frame rate and no position is read."""
+    if trigger_mode != FlyTriggerMode.HARDWARE:
+        return
+    if sample_period:
+        raise ValueError(
+            f"sample_period: {sample_period} can not pace a hardware fly, the"
+            + " detectors set their own frame rate."
+        )
+    if position_lag:
+        raise ValueError(
+            f"position_lag: {position_lag} can not shift the positions of a"
+            + " hardware fly, none are read with its frames."
+        )
+
+
+def _flyers(dets: list[Any]) -> list[StandardDetector]:
+    """StandardDetectors of dets, raises ValueError if there are none."""
+    flyers = [det for det in dets if isinstance(det, StandardDetector)]
+    if not flyers:
+        raise ValueError(
+            f"{FlyTriggerMode.HARDWARE} trigger mode needs at least one"
+            + " StandardDetector."
+        )
+    return flyers
+
+
+def _prepare_frames(
+    flyers: list[StandardDetector], time_for_move: float, group: str
+) -> MsgGenerator:
+    """
+    Prepare every detector of flyers in group for as many internally timed frames
+    as fit in time_for_move, using its current acquire time and the deadtime of
+    back to back frames, see get_deadtime. Complete gives up once no frame has
+    come for a frame period past DEFAULT_TIMEOUT.
+    """
+    for det in flyers:
+        livetime: float = yield from bps.rd(det.drv.acquire_time)
+        deadtime = yield from get_deadtime(det, livetime, overlap=True)
+        if livetime + deadtime <= 0:
+            raise ValueError(
+                f"{det.name} frame period: {livetime + deadtime} is not above 0."
+            )
+        n_frames = max(1, int(time_for_move // (livetime + deadtime)))
+        LOGGER.info(f"Preparing {det.name} for {n_frames} frames.")
+        yield from bps.prepare(
+            det,
+            TriggerInfo(
+                number_of_triggers=n_frames,
+                trigger=DetectorTrigger.INTERNAL,
+                deadtime=deadtime,
+                livetime=livetime,
+                frame_timeout=DEFAULT_TIMEOUT + livetime + deadtime,
+            ),
+            group=group,
+        )
+
+
+def _grid_hints(step_motor: Motor, scan_motor: Motor) -> dict:
+    """Start document hints with the data keys of the step and scan axes of a grid,
+    in that order, as bluesky grid_scan does for its motors."""
+    return {
+        "dimensions": [
+            ([step_motor.user_readback.name], "primary"),
+            ([scan_motor.user_readback.name], "primary"),
+        ]
+    }
+
+
+def _read_plan_timer(plan_timer: PlanTimer | None) -> MsgGenerator:
+    """Put the actual against the predicted duration into its own stream."""
+    if plan_timer is not None:
+        yield from bps.trigger_and_read([plan_timer], name="duration")
+        duration = yield from bps.rd(plan_timer.actual_duration)
+        predicted = yield from bps.rd(plan_timer.predicted_duration)
+        LOGGER.info(f"Grid took {duration} s, estimated {predicted} s.")
+
+
+def _read_sample_clock(sample_clock: SampleClock | None) -> MsgGenerator:
+    """Put the sampling statistics into their own stream at the end of a scan."""
+    if sample_clock is not None:
+        LOGGER.info(f"Sampling statistics: {sample_clock.stats()}")
+        yield from bps.trigger_and_read([sample_clock], name="sampling")
+
+
+def _hardware_fly_1d(
+    dets: list[Any],
+    motor: Motor,
+    fly_info: FlyMotorInfo,
+    new_stream: bool = True,
+    group: str | None = None,
+    stream_name: str = "primary",
+) -> MsgGenerator:
+    """
+    Hardware timed part of _fast_scan_1d.
+
+    Every StandardDetector in dets is prepared for as many internally timed frames
+    as fit in fly_info.time_for_move, see _prepare_frames. The remaining readables
+    and the motor are read once before the move into the "fly_rows" stream, the
+    detectors frames go into stream_name. Everything is prepared in group alongside
+    whatever else was already started in it.
+    """
+    flyers = _flyers(dets)
+    readables = [det for det in dets if det not in flyers] + [motor]
+
+    grp = group if group is not None else short_uid("prepare")
+    yield from _prepare_frames(flyers, fly_info.time_for_move, grp)
+    yield from bps.prepare(motor, fly_info, group=grp)
+    yield from bps.wait(group=grp)
+    if new_stream:
+        yield from bps.declare_stream(*flyers, name=stream_name, collect=True)
+    yield from bps.trigger_and_read(readables, name="fly_rows")
+    yield from bps.kickoff_all(*flyers, motor, wait=True)
+    LOGGER.info(f"flying motor =  {motor.name} with hardware timed detectors")
+    yield from bps.collect_while_completing(
+        flyers=[motor, *flyers],
+        dets=flyers,
+        flush_period=0.5,
+        stream_name=stream_name,
     )
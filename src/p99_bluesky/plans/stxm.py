@@ -1,21 +1,44 @@
+from functools import partial
+
 import bluesky.plan_stubs as bps
 import bluesky.plans as bp
+import bluesky.preprocessors as bpp
+import numpy as np
 from blueapi.core import MsgGenerator
+from bluesky import plan_patterns
 from bluesky.preprocessors import (
     finalize_wrapper,
 )
+from bluesky.protocols import Movable, Triggerable
+from bluesky.utils import short_uid
+from cycler import cycler
+from ophyd_async.core import (
+    DEFAULT_TIMEOUT,
+    DetectorTrigger,
+    TriggerInfo,
+    wait_for_value,
+)
 from ophyd_async.epics.adcore import SingleTriggerDetector
 from ophyd_async.epics.motor import Motor
 
 from p99_bluesky.devices.andorAd import Andor2Ad, Andor3Ad
 from p99_bluesky.log import LOGGER
+from p99_bluesky.plan_stubs.detector_plan import get_deadtime, set_software_trigger
 from p99_bluesky.plan_stubs.motor_plan import (
     check_within_limit,
+    checkpoint_row,
     get_motor_positions,
-    get_velocity_and_step_size,
+    get_stxm_trajectory,
 )
-from p99_bluesky.plans.fast_scan import fast_scan_grid
+from p99_bluesky.plans.fast_scan import fast_scan_regions, fast_scan_trajectory
 from p99_bluesky.sim.sim_stages import p99SimMotor
+from p99_bluesky.utility.row_checkpoint import RowCheckpoint
+from p99_bluesky.utility.sparse_sampling import (
+    SparseSampling,
+    nearest_neighbour_tour,
+    sparse_grid_points,
+)
+from p99_bluesky.utility.trajectory import GridTrajectory
 from p99_bluesky.utility.utility import step_size_to_step_num
 
 
@@ -33,11 +56,40 @@ def stxm_step(
     home: bool = False,
     snake: bool = False,
     md: dict | None = None,
+    row_burst: bool = False,
+    frame_trigger: Triggerable | None = None,
+    first_row: int = 0,
+    sparse_fraction: float | None = None,
+    sparse_sampling: SparseSampling = SparseSampling.HALTON,
+    sparse_seed: int | None = None,
+    software_trigger: bool = False,
+    external_gate: bool = False,
 ) -> MsgGenerator:
     """Effectively the standard Bluesky grid scan adapted to use step size.
      Added a centre option where it will move back to
       where it was before scan start.
 
+     With row_burst the detector is not armed, triggered and read for every point.
+     It is prepared once per row for as many externally triggered frames as the row
+     has points and stays armed while the y motor steps through them, each frame
+     triggered once the motor is in position, and the frames of the row are
+     collected together at the end of it, see _row_burst_grid. The frames need a
+     trigger source: a frame_trigger sent after each move, or with external_gate
+     the hardware, such as the in-position output of the motor controller. Without
+     either the detector would wait for triggers that never come, so it is
+     rejected.
+
+     Every row of x is put into the "row_checkpoint" stream once done, see
+     RowCheckpoint, so an interrupted map can be finished with resume_stxm_step.
+
+     With a sparse_fraction only that share of the grid points is visited, picked
+     by sparse_sampling and taken in a nearest neighbour tour, see _sparse_grid,
+     and the map is filled in afterwards with reconstruct_sparse.
+
+     With software_trigger the detector is armed once for the whole grid and each
+     point taken with its software trigger, see set_software_trigger, rather than
+     starting and stopping the acquisition at every point.
+
     Parameters
     ----------
     det: Andor2Ad | Andor3Ad,
@@ -65,9 +117,48 @@ def stxm_step(
     snake_axes: bool = True,
         If true, do grid scan without moving scan axis back to start position.
     md=None,
-
+        Extra metadata for the start document.
+    row_burst: bool = False,
+        If true, arm the detector once per row instead of once per point, needs an
+        Andor2Ad or Andor3Ad.
+    frame_trigger: Triggerable | None = None,
+        Device sending the detector the trigger of each frame in row_burst, such as
+        an output of the timing system.
+    first_row: int = 0,
+        Row of x to start from, the rows before it are skipped.
+    sparse_fraction: float | None = None,
+        Share of the grid points to visit, every point if None.
+    sparse_sampling: SparseSampling = SparseSampling.HALTON,
+        How the sparse points are picked.
+    sparse_seed: int | None = None,
+        Seed of the sparse points, for the same points every time.
+    software_trigger: bool = False,
+        If true, keep the detector armed and trigger each point in software, needs
+        an Andor2Ad or Andor3Ad.
+    external_gate: bool = False,
+        If true, the frames of row_burst are triggered by the hardware, for example
+        the in-position output of the motor controller, instead of frame_trigger.
     """
 
+    if row_burst and not isinstance(det, Andor2Ad | Andor3Ad):
+        raise ValueError(f"Row burst needs an Andor2Ad or Andor3Ad, got {det.name}.")
+    if software_trigger and not isinstance(det, Andor2Ad | Andor3Ad):
+        raise ValueError(
+            f"Software trigger needs an Andor2Ad or Andor3Ad, got {det.name}."
+        )
+    if software_trigger and row_burst:
+        raise ValueError("Row burst frames can not be software triggered.")
+    if row_burst and (frame_trigger is None) != external_gate:
+        raise ValueError(
+            "Row burst frames need either a frame_trigger or an external_gate."
+        )
+    if sparse_fraction is not None and (row_burst or first_row):
+        raise ValueError("A sparse grid can not be taken in row burst or resumed.")
+    # add 1 to step number to include the end point
+    x_num = step_size_to_step_num(x_step_start, x_step_end, x_step_size) + 1
+    y_num = step_size_to_step_num(y_step_start, y_step_end, y_step_size) + 1
+    if not 0 <= first_row < x_num:
+        raise ValueError(f"First row: {first_row} is not one of the {x_num} rows.")
     # check limit before doing anything
     yield from check_within_limit(
         [
@@ -93,23 +184,59 @@ def stxm_step(
         )
     # Set count time on detector
     yield from bps.abs_set(det.drv.acquire_time, count_time)
-    # add 1 to step number to include the end point
-    yield from finalize_wrapper(
-        plan=bp.grid_scan(
+    x_positions = np.linspace(x_step_start, x_step_end, x_num)[first_row:]
+    y_positions = np.linspace(y_step_start, y_step_end, y_num)
+    # A snake resumed on an odd row starts the way that row went.
+    if snake and first_row % 2:
+        y_positions = y_positions[::-1]
+    row_checkpoint = RowCheckpoint(first_row, name="row_checkpoint")
+    if sparse_fraction is not None:
+        plan = _sparse_grid(
+            det,
+            x_step_motor,
+            x_positions,
+            y_step_motor,
+            y_positions,
+            sparse_fraction,
+            sparse_sampling,
+            sparse_seed,
+            md,
+        )
+    elif row_burst:
+        plan = _row_burst_grid(
+            det,
+            count_time,
+            x_step_motor,
+            x_positions,
+            y_step_motor,
+            y_positions,
+            snake=snake,
+            frame_trigger=frame_trigger,
+            md=md,
+            row_checkpoint=row_checkpoint,
+        )
+    else:
+        plan = bp.grid_scan(
             [det],
             x_step_motor,
-            x_step_start,
-            x_step_end,
-            step_size_to_step_num(x_step_start, x_step_end, x_step_size) + 1,
+            float(x_positions[0]),
+            float(x_positions[-1]),
+            len(x_positions),
             y_step_motor,
-            y_step_start,
-            y_step_end,
-            step_size_to_step_num(y_step_start, y_step_end, y_step_size) + 1,
+            float(y_positions[0]),
+            float(y_positions[-1]),
+            y_num,
             snake_axes=snake,
             md=md,
-        ),
-        final_plan=clean_up(**clean_up_arg),
-    )
+            per_step=_checkpointed_step(row_checkpoint, x_step_motor, y_num),
+        )
+    final_plan = clean_up(**clean_up_arg)
+    if software_trigger:
+        # Set before the grid stages the detector and back whichever way it ends,
+        # even if that is before it is staged.
+        plan = bpp.pchain(set_software_trigger([det]), plan)
+        final_plan = bpp.pchain(final_plan, set_software_trigger([det], False))
+    yield from finalize_wrapper(plan=plan, final_plan=final_plan)
 
 
 def stxm_fast(
@@ -126,15 +253,27 @@ def stxm_fast(
     home: bool = False,
     snake_axes: bool = True,
     md: dict | None = None,
+    row_overhead: float = 0.0,
+    correct_speed: bool = True,
+    first_row: int = 0,
+    position_lag: float = 0.0,
+    resume_after: float | None = None,
 ) -> MsgGenerator:
     """
-    This initiates an STXM scan, targeting a maximum scan speed of around 10Hz.
-     It calculates the number of data points achievable based on the detector's count
-     time. If no step size is provided, the software aims for a uniform distribution
-     of points across the scan area. The scanning motor's speed is then determined using
-      the calculated point density. If the desired speed exceeds the motor's limit,
-     the maximum speed is used. In this case, the step size is automatically adjusted
-     to ensure the scan finishes close to the intended duration.
+    This initiates an STXM scan that takes close to plan_time.
+     The duration of the grid is modelled row by row, the acceleration and run-up
+     of the scanning motor, the turnaround and step move between rows and a fixed
+     overhead per row included, and the step size and scan speed are solved for so
+     the estimate comes out at plan_time. If no step size is provided, the points
+     are spaced evenly on both axes, one count time of travel apart. If the motor
+     is too slow even at its maximum speed, rows are dropped, so the step size
+     grows, until the scan fits. The plan time, step size and predicted duration
+     go into the "time_budget" of the start document and the actual duration into
+     the "duration" stream at the end. As the rows are done they are timed and the
+     speed, or step size, of the rows left is corrected to still finish within
+     plan_time, see RowSpeedController. Every row is put into the
+     "row_checkpoint" stream once done, see RowCheckpoint, so an interrupted map
+     can be finished with resume_stxm_fast.
 
     Parameters
     ----------
@@ -163,79 +302,579 @@ def stxm_fast(
     snake_axes: bool = True,
         If true, do grid scan without moving scan axis back to start position.
     md=None,
-
+        Extra metadata for the start document.
+    row_overhead: float = 0.0,
+        Fixed time in second lost on every row, such as the prepare and kickoff
+        round trips, which can be measured with p99_bluesky.sim.benchmark.
+    correct_speed: bool = True,
+        If true, correct the rows left after every row, each correction goes into
+        the "speed_correction" stream.
+    first_row: int = 0,
+        Row of the grid as planned to start from, the rows before it are skipped
+        and the rows left get the share of plan_time they were planned for.
+    position_lag: float = 0.0,
+        Time in second the detector data is behind the scan position read with it,
+        which shifts snaking rows against each other, see estimate_snake_lag.
+    resume_after: float | None = None,
+        Step position of the last row done by an interrupted run, the grid as
+        planned starts from the first row past it instead of first_row.
     """
     clean_up_arg: dict = {}
     clean_up_arg["Home"] = home
-    yield from check_within_limit(
-        [
-            scan_start,
-            scan_end,
-        ],
-        scan_motor,
-    )
-    yield from check_within_limit(
-        [
-            step_start,
-            step_end,
-        ],
+    # Work out the grid that fits in plan_time and check it against the limits,
+    # run-up included, before anything moves.
+    trajectory: GridTrajectory = yield from get_stxm_trajectory(
         step_motor,
+        step_start,
+        step_end,
+        scan_motor,
+        scan_start,
+        scan_end,
+        plan_time,
+        count_time,
+        step_size,
+        snake_axes,
+        row_overhead,
     )
     # Add move back  positon to origin
     if home:
         clean_up_arg["Origin"] = yield from get_motor_positions(scan_motor, step_motor)
+    step_positions = trajectory.step_positions
+    if resume_after is not None:
+        first_row = trajectory.row_after(resume_after)
+    if first_row:
+        planned_duration = trajectory.total_duration
+        trajectory = trajectory.from_row(first_row)
+        plan_time = plan_time * trajectory.total_duration / planned_duration
+    _md = {
+        "time_budget": {
+            "plan_time": plan_time,
+            "count_time": count_time,
+            "step_size": float(abs(step_positions[1] - step_positions[0]))
+            if trajectory.num_rows > 1
+            else 0.0,
+            "velocity": trajectory.speed,
+            "num_step": trajectory.num_rows,
+            "first_row": first_row,
+            "row_overhead": row_overhead,
+            "predicted_duration": trajectory.total_duration,
+        }
+    }
+    _md.update(md or {})
+    LOGGER.info(f"Time budget: {_md['time_budget']}")
+    # Set count time on detector
+    yield from bps.abs_set(det.drv.acquire_time, count_time)
+    yield from finalize_wrapper(
+        plan=fast_scan_trajectory(
+            [det],
+            step_motor,
+            scan_motor,
+            trajectory,
+            md=_md,
+            plan_time=plan_time,
+            correct_speed=correct_speed,
+            row_checkpoints=True,
+            first_row=first_row,
+            position_lag=position_lag,
+        ),
+        final_plan=clean_up(**clean_up_arg),
+    )
 
-    scan_range = abs(scan_start - scan_end)
-    step_range = abs(step_start - step_end)
-    step_motor_speed = yield from bps.rd(step_motor.velocity)
-    # get number of data point possible after adjusting plan_time for step movement speed
-    num_data_point = (plan_time - step_range / step_motor_speed) / count_time
-    # Assuming ideal step size is evenly distributed points within the two axis.
-    if step_size is not None:
-        ideal_step_size = abs(step_size)
-        if step_size == 0:
-            ideal_velocity = 0  # ideal_velocity: speed that allow the required step size.
-        else:
-            ideal_velocity = scan_range / (
-                (num_data_point / abs(step_range / ideal_step_size)) * count_time
-            )
 
-    else:
-        ideal_step_size = 1.0 / ((num_data_point / (scan_range * step_range)) ** 0.5)
-        ideal_velocity = ideal_step_size / count_time
+def resume_stxm_step(
+    run_uid: str,
+    last_row: int,
+    det: Andor2Ad | Andor3Ad | SingleTriggerDetector,
+    count_time: float,
+    x_step_motor: Motor | p99SimMotor,
+    x_step_start: float,
+    x_step_end: float,
+    x_step_size: float,
+    y_step_motor: Motor | p99SimMotor,
+    y_step_start: float,
+    y_step_end: float,
+    y_step_size: float,
+    home: bool = False,
+    snake: bool = False,
+    md: dict | None = None,
+    row_burst: bool = False,
+    frame_trigger: Triggerable | None = None,
+    external_gate: bool = False,
+) -> MsgGenerator:
+    """
+    Finish an interrupted stxm_step, scanning only the rows after last_row.
 
-    LOGGER.info(
-        f"ideal step size = {ideal_step_size} velocity = {ideal_velocity}"
-        + f" number of data point {num_data_point}"
+    Takes the parameters of the original run, the grid is worked out the same
+    way and started from the row after last_row, the "row" of the last event in
+    the "row_checkpoint" stream of the original run. The start document has a
+    "resume" entry with run_uid and last_row so the two runs can be merged.
+
+    Parameters
+    ----------
+    run_uid: str
+        Uid of the interrupted run.
+    last_row: int
+        Last row of the interrupted run known to be complete.
+    The other parameters are those of stxm_step.
+    """
+    _md = {"resume": {"run_uid": run_uid, "last_row": last_row}}
+    _md.update(md or {})
+    yield from stxm_step(
+        det,
+        count_time,
+        x_step_motor,
+        x_step_start,
+        x_step_end,
+        x_step_size,
+        y_step_motor,
+        y_step_start,
+        y_step_end,
+        y_step_size,
+        home=home,
+        snake=snake,
+        md=_md,
+        row_burst=row_burst,
+        frame_trigger=frame_trigger,
+        first_row=last_row + 1,
+        external_gate=external_gate,
     )
-    # check the idelocity and step size against max velecity and adject in needed.
-    velocity, ideal_step_size = yield from get_velocity_and_step_size(
-        scan_motor, ideal_velocity, ideal_step_size
+
+
+def resume_stxm_fast(
+    run_uid: str,
+    last_step_position: float,
+    det: Andor2Ad | Andor3Ad | SingleTriggerDetector,
+    count_time: float,
+    step_motor: Motor,
+    step_start: float,
+    step_end: float,
+    scan_motor: Motor,
+    scan_start: float,
+    scan_end: float,
+    plan_time: float,
+    step_size: float | None = None,
+    home: bool = False,
+    snake_axes: bool = True,
+    md: dict | None = None,
+    row_overhead: float = 0.0,
+    correct_speed: bool = True,
+    position_lag: float = 0.0,
+) -> MsgGenerator:
+    """
+    Finish an interrupted stxm_fast, flying only the rows past last_step_position.
+
+    Takes the parameters of the original run, the grid is planned again from
+    them and started from its first row past last_step_position, the
+    "step_position" of the last event in the "row_checkpoint" stream of the
+    original run. The position is used rather than the "row", as the original
+    run may have dropped rows to keep to its time, so that its rows are numbered
+    in another grid than the one planned again. The rows of the resumed run are
+    numbered in the grid as planned. The start document has a "resume" entry with
+    run_uid and last_step_position so the two runs can be merged.
+
+    Parameters
+    ----------
+    run_uid: str
+        Uid of the interrupted run.
+    last_step_position: float
+        Step position of the last row of the interrupted run known to be complete.
+    The other parameters are those of stxm_fast.
+    """
+    _md = {"resume": {"run_uid": run_uid, "last_step_position": last_step_position}}
+    _md.update(md or {})
+    yield from stxm_fast(
+        det,
+        count_time,
+        step_motor,
+        step_start,
+        step_end,
+        scan_motor,
+        scan_start,
+        scan_end,
+        plan_time,
+        step_size=step_size,
+        home=home,
+        snake_axes=snake_axes,
+        md=_md,
+        row_overhead=row_overhead,
+        correct_speed=correct_speed,
+        position_lag=position_lag,
+        resume_after=last_step_position,
     )
-    num_of_step = step_size_to_step_num(step_start, step_end, ideal_step_size)
-    LOGGER.info(
-        f" step size = {ideal_step_size}, {scan_motor.name}: velocity = {velocity}"
-        + f", number of step = {num_of_step}."
+
+
+def stxm_multi_region(
+    det: Andor2Ad | Andor3Ad | SingleTriggerDetector,
+    count_time: float,
+    step_motor: Motor,
+    scan_motor: Motor,
+    regions: list[dict[str, float]],
+    home: bool = False,
+    snake_axes: bool = True,
+    md: dict | None = None,
+    row_overhead: float = 0.0,
+) -> MsgGenerator:
+    """
+    STXM maps of several regions in a single run.
+
+    Each region is worked out as in stxm_fast to take its own plan time, they are
+    then scanned in the order, and each from the corner, that keeps the stage
+    travel between them shortest given the speed of both motors, see
+    order_regions. The detector is staged once for all of them and every region
+    goes into its own stream, "region0", "region1"... in the order given. The
+    start document has the "regions" in scan order, see fast_scan_regions, and a
+    "time_budget" with the plan time and predicted duration of each. The rows are
+    flown at the planned speed, they are not corrected as in stxm_fast.
+
+    Parameters
+    ----------
+    det: Andor2Ad | Andor3Ad,
+        Area detector.
+    count_time: float
+        detector count time.
+    step_motor: Motor,
+        Motor for the slow axis
+    scan_motor: Motor,
+        Motor for the continuously moving axis
+    regions: list[dict[str, float]],
+        One dictionary per region with its "step_start", "step_end", "scan_start",
+        "scan_end" and "plan_time", and optionally its "step_size", as in
+        stxm_fast.
+    home: bool = False,
+        If true move back to position before it scan
+    snake_axes: bool = True,
+        If true, do grid scan without moving scan axis back to start position.
+    md=None,
+        Extra metadata for the start document.
+    row_overhead: float = 0.0,
+        Fixed time in second lost on every row.
+    """
+    if not regions:
+        raise ValueError("No region to scan.")
+    clean_up_arg: dict = {}
+    clean_up_arg["Home"] = home
+    trajectories: list[GridTrajectory] = []
+    for region in regions:
+        trajectory = yield from get_stxm_trajectory(
+            step_motor,
+            region["step_start"],
+            region["step_end"],
+            scan_motor,
+            region["scan_start"],
+            region["scan_end"],
+            region["plan_time"],
+            count_time,
+            region.get("step_size"),
+            snake_axes,
+            row_overhead,
+        )
+        trajectories.append(trajectory)
+    if home:
+        clean_up_arg["Origin"] = yield from get_motor_positions(scan_motor, step_motor)
+    _md = {
+        "time_budget": {
+            "count_time": count_time,
+            "row_overhead": row_overhead,
+            "plan_times": [region["plan_time"] for region in regions],
+            "predicted_durations": [
+                trajectory.total_duration for trajectory in trajectories
+            ],
+        }
+    }
+    _md.update(md or {})
+    LOGGER.info(f"Time budget: {_md['time_budget']}")
+    yield from bps.abs_set(det.drv.acquire_time, count_time)
+    yield from finalize_wrapper(
+        plan=fast_scan_regions([det], step_motor, scan_motor, trajectories, md=_md),
+        final_plan=clean_up(**clean_up_arg),
     )
+
+
+def stxm_stack(
+    det: Andor2Ad | Andor3Ad | SingleTriggerDetector,
+    count_time: float,
+    stack_axis: Movable,
+    stack_positions: list[float],
+    x_step_motor: Motor | p99SimMotor,
+    x_step_start: float,
+    x_step_end: float,
+    x_step_size: float,
+    y_step_motor: Motor | p99SimMotor,
+    y_step_start: float,
+    y_step_end: float,
+    y_step_size: float,
+    home: bool = False,
+    snake: bool = False,
+    md: dict | None = None,
+) -> MsgGenerator:
+    """
+    Stack of step STXM maps of the same area, one for each position of stack_axis,
+    e.g. the energy, in a single run.
+
+    The detector is staged, and its file opened, once for the whole stack instead
+    of once per map as with repeated stxm_step, so every frame goes into the same
+    file, map after map. The stack_axis is moved before each map and read with
+    every point. The "shape" of the start document is the stacked layout, stack
+    position, x and y, and the "stack" entry has the stack_axis and its positions.
+
+    Parameters
+    ----------
+    det: Andor2Ad | Andor3Ad,
+        Area detector.
+    count_time: float
+        detector count time.
+    stack_axis: Movable,
+        Outer axis stepped between maps, such as the energy.
+    stack_positions: list[float],
+        Position of stack_axis for each map.
+    x_step_motor: Motor,
+        Motors
+    x_step_start: float,
+        Starting position for x_step_motor
+    x_step_end: float,
+        Ending position for x_step_motor
+    x_step_size: float
+        Step size for x motor
+    y_step_motor: Motor,
+        Motor
+    y_step_start: float,
+        Start for scanning axis
+    y_step_end: float,
+        End for scanning axis
+    y_step_size: float
+        Step size for y motor
+    home: bool = False,
+        If true move back to position before it scan, stack_axis included.
+    snake: bool = False,
+        If true, every other row of each map is scanned backward.
+    md=None,
+        Extra metadata for the start document.
+    """
+    if len(stack_positions) == 0:
+        raise ValueError(f"No position to stack {stack_axis.name} over.")
+    # add 1 to step number to include the end point
+    x_num = step_size_to_step_num(x_step_start, x_step_end, x_step_size) + 1
+    y_num = step_size_to_step_num(y_step_start, y_step_end, y_step_size) + 1
+    # check limit before doing anything
+    if isinstance(stack_axis, Motor | p99SimMotor):
+        yield from check_within_limit(list(stack_positions), stack_axis)
+    yield from check_within_limit([x_step_start, x_step_end], x_step_motor)
+    yield from check_within_limit([y_step_start, y_step_end], y_step_motor)
+    clean_up_arg: dict = {}
+    clean_up_arg["Home"] = home
+    if home:
+        clean_up_arg["Origin"] = yield from get_motor_positions(
+            stack_axis, x_step_motor, y_step_motor
+        )
     # Set count time on detector
     yield from bps.abs_set(det.drv.acquire_time, count_time)
-    yield from finalize_wrapper(
-        plan=fast_scan_grid(
-            [det],
-            step_motor,
-            step_start,
-            step_end,
-            num_of_step,
-            scan_motor,
-            scan_start,
-            scan_end,
-            velocity,
-            snake_axes=snake_axes,
+    # Every map is the same grid, the stack axis going round it.
+    grid = plan_patterns.outer_product(
+        [
+            x_step_motor,
+            x_step_start,
+            x_step_end,
+            x_num,
+            y_step_motor,
+            y_step_start,
+            y_step_end,
+            y_num,
+            snake,
+        ]
+    )
+    stack = cycler(stack_axis, list(stack_positions)) * grid
+    _md = {
+        "shape": (len(stack_positions), x_num, y_num),
+        "extents": (
+            (stack_positions[0], stack_positions[-1]),
+            (x_step_start, x_step_end),
+            (y_step_start, y_step_end),
         ),
+        "snaking": (False, False, snake),
+        "stack": {
+            "axis": stack_axis.name,
+            "positions": list(stack_positions),
+            "num_points": x_num * y_num,
+        },
+        "plan_name": "stxm_stack",
+    }
+    _md.update(md or {})
+    LOGGER.info(
+        f"Stack of {len(stack_positions)} maps of {x_num} x {y_num} over"
+        + f" {stack_axis.name}."
+    )
+    yield from finalize_wrapper(
+        plan=bp.scan_nd([det], stack, md=_md),
         final_plan=clean_up(**clean_up_arg),
     )
 
 
+def _row_burst_grid(
+    det: Andor2Ad | Andor3Ad,
+    count_time: float,
+    x_step_motor: Motor | p99SimMotor,
+    x_positions: np.ndarray,
+    y_step_motor: Motor | p99SimMotor,
+    y_positions: np.ndarray,
+    snake: bool = False,
+    frame_trigger: Triggerable | None = None,
+    md: dict | None = None,
+    row_checkpoint: RowCheckpoint | None = None,
+) -> MsgGenerator:
+    """
+    Step grid with the detector kicked off and collected once per row, used in
+    stxm_step.
+
+    The detector is prepared, and so armed, once for the whole grid with a burst of
+    one externally triggered frame per y position for every row, into a single
+    file. For each row it is kicked off once the motors are at its start, the y
+    motor then steps through the row, after each move frame_trigger, if any, is
+    triggered and the next frame waited for before moving on. Without one the
+    frames are gated by the hardware. The frames of the
+    row go into the "primary" stream in one collect at the end of it and the
+    motor positions at the start of the row into the "burst_rows" stream, the
+    position of every frame is in the "row_burst" of the start document. With a
+    row_checkpoint every row is checkpointed once collected.
+    """
+    deadtime = yield from get_deadtime(det, count_time)
+    trigger_info = TriggerInfo(
+        number_of_triggers=[len(y_positions)] * len(x_positions),
+        trigger=DetectorTrigger.CONSTANT_GATE,
+        deadtime=deadtime,
+        livetime=count_time,
+        frame_timeout=None,
+    )
+    frame_timeout = DEFAULT_TIMEOUT + count_time + deadtime
+    _md = {
+        "shape": (len(x_positions), len(y_positions)),
+        "row_burst": {
+            "x_positions": x_positions.tolist(),
+            "y_positions": y_positions.tolist(),
+            "snake": snake,
+        },
+    }
+    _md.update(md or {})
+
+    @bpp.stage_decorator([det])
+    @bpp.run_decorator(md=_md)
+    def inner_row_burst_grid():
+        # Arm the detector while the motors go to the start of the first row.
+        grp = short_uid("prepare")
+        yield from bps.prepare(det, trigger_info, group=grp)
+        for row, x in enumerate(x_positions):
+            row_positions = y_positions[::-1] if snake and row % 2 else y_positions
+            yield from bps.abs_set(x_step_motor, x, group=grp)
+            yield from bps.abs_set(y_step_motor, row_positions[0], group=grp)
+            yield from bps.wait(group=grp)
+            grp = short_uid("row")
+            if row == 0:
+                yield from bps.declare_stream(det, name="primary", collect=True)
+            yield from bps.trigger_and_read(
+                [x_step_motor, y_step_motor], name="burst_rows"
+            )
+            yield from bps.kickoff(det, wait=True)
+            frames = yield from bps.rd(det.hdf.num_captured)
+            for y in row_positions:
+                yield from bps.mv(y_step_motor, y)
+                if frame_trigger is not None:
+                    yield from bps.trigger(frame_trigger, wait=True)
+                frames += 1
+                yield from _wait_for_frames(det, frames, frame_timeout)
+            yield from bps.complete(det, wait=True)
+            yield from bps.collect(det, name="primary")
+            if row_checkpoint is not None:
+                yield from checkpoint_row(row_checkpoint, x)
+
+    yield from inner_row_burst_grid()
+
+
+def _sparse_grid(
+    det: Andor2Ad | Andor3Ad | SingleTriggerDetector,
+    x_step_motor: Motor | p99SimMotor,
+    x_positions: np.ndarray,
+    y_step_motor: Motor | p99SimMotor,
+    y_positions: np.ndarray,
+    fraction: float,
+    sampling: SparseSampling = SparseSampling.HALTON,
+    seed: int | None = None,
+    md: dict | None = None,
+) -> MsgGenerator:
+    """
+    Step scan of a fraction of the points of a grid, used in stxm_step.
+
+    The points are picked with sparse_grid_points and visited in a nearest
+    neighbour tour from where the motors are, a move taking as long as the slower
+    of the two motors at their current speed. The "shape" and "extents" of the
+    start document are those of the full grid and the "sparse" entry has the row
+    and column of every point in the order they are taken, for reconstruct_sparse.
+    """
+    points = sparse_grid_points(
+        (len(x_positions), len(y_positions)), fraction, sampling, seed
+    )
+    start = (
+        (yield from bps.rd(x_step_motor.user_readback)),
+        (yield from bps.rd(y_step_motor.user_readback)),
+    )
+    speeds = (
+        (yield from bps.rd(x_step_motor.velocity)),
+        (yield from bps.rd(y_step_motor.velocity)),
+    )
+    positions = np.stack((x_positions[points[:, 0]], y_positions[points[:, 1]]), axis=1)
+    points = points[nearest_neighbour_tour(positions, start, speeds)]
+    LOGGER.info(
+        f"Sparse grid of {len(points)} out of {len(x_positions) * len(y_positions)}"
+        + " points."
+    )
+    _md = {
+        "shape": (len(x_positions), len(y_positions)),
+        "extents": (
+            (float(x_positions[0]), float(x_positions[-1])),
+            (float(y_positions[0]), float(y_positions[-1])),
+        ),
+        "sparse": {
+            "fraction": fraction,
+            "sampling": sampling,
+            "seed": seed,
+            "points": points.tolist(),
+        },
+        "plan_name": "stxm_step",
+    }
+    _md.update(md or {})
+    path = cycler(x_step_motor, x_positions[points[:, 0]].tolist()) + cycler(
+        y_step_motor, y_positions[points[:, 1]].tolist()
+    )
+    yield from bp.scan_nd([det], path, md=_md)
+
+
+def _checkpointed_step(
+    row_checkpoint: RowCheckpoint, x_step_motor: Motor | p99SimMotor, y_num: int
+):
+    """per_step of a grid scan checkpointing every row of y_num points."""
+    points = [0]
+
+    def per_step(detectors, step, pos_cache):
+        yield from bps.one_nd_step(detectors, step, pos_cache)
+        points[0] += 1
+        if points[0] % y_num == 0:
+            yield from checkpoint_row(row_checkpoint, step[x_step_motor])
+
+    return per_step
+
+
+def _wait_for_frames(det: Andor2Ad | Andor3Ad, frames: int, timeout: float):
+    """Wait for the detector to have captured frames in total."""
+    yield from bps.wait_for(
+        [
+            partial(
+                wait_for_value,
+                det.hdf.num_captured,
+                lambda captured: captured >= frames,
+                timeout,
+            )
+        ]
+    )
+
+
 def clean_up(**kwargs: dict):
     LOGGER.info(f"Clean up: {list(kwargs)}")
     if kwargs["Home"]:
@@ -0,0 +1,205 @@
+"""
+Benchmarks of the fast scan and stxm plans on simulated motors and mocked detectors.
+
+Run with::
+
+    python -m p99_bluesky.sim.benchmark benchmark.json
+
+The mocked detectors do not expose, so the time per point is what the plan and the
+RunEngine add on top of the detector count time.
+"""
+
+import asyncio
+import json
+import platform
+import tempfile
+import time
+from argparse import ArgumentParser
+from collections import Counter
+from collections.abc import Callable, Coroutine
+from importlib.metadata import version
+from pathlib import Path
+from typing import Any
+
+from blueapi.core import MsgGenerator
+from bluesky.run_engine import RunEngine
+from ophyd_async.core import StaticFilenameProvider, StaticPathProvider
+from ophyd_async.testing import callback_on_mock_put, set_mock_value
+
+from p99_bluesky.devices.andorAd import Andor2Ad, Andor3Ad
+from p99_bluesky.log import LOGGER
+from p99_bluesky.plans.fast_scan import fast_scan_1d, fast_scan_grid
+from p99_bluesky.plans.stxm import stxm_fast, stxm_step
+from p99_bluesky.sim.sim_stages import SimThreeAxisStage
+
+__all__ = ["PlanBenchmark", "main", "run_benchmarks", "sim_andor"]
+
+
+class PlanBenchmark:
+    """
+    Document callback that counts the points, rows and documents of a plan.
+
+    Points are the events and event page rows of the primary stream, rows are
+    taken from the trajectory or the shape in the start document.
+
+    Parameters
+    ----------
+    name: str
+        Name of the benchmark.
+    """
+
+    def __init__(self, name: str) -> None:
+        self.name = name
+        self.documents: Counter[str] = Counter()
+        self.points = 0
+        self.rows = 1
+        self._primary: set[str] = set()
+
+    def __call__(self, name: str, doc: dict) -> None:
+        self.documents[name] += 1
+        if name == "start":
+            if "trajectory" in doc:
+                self.rows = doc["trajectory"]["num_rows"]
+            elif doc.get("shape"):
+                self.rows = doc["shape"][0]
+        elif name == "descriptor" and doc["name"] == "primary":
+            self._primary.add(doc["uid"])
+        elif name == "event" and doc["descriptor"] in self._primary:
+            self.points += 1
+        elif name == "event_page" and doc["descriptor"] in self._primary:
+            self.points += len(doc["seq_num"])
+
+    def result(self, elapsed: float) -> dict[str, Any]:
+        """Rates of the plan given how long it took in second."""
+        num_documents = sum(self.documents.values())
+        return {
+            "elapsed": elapsed,
+            "points": self.points,
+            "rows": self.rows,
+            "documents": dict(self.documents),
+            "points_per_second": self.points / elapsed,
+            "point_overhead": elapsed / self.points if self.points else None,
+            "documents_per_second": num_documents / elapsed,
+            "time_per_row": elapsed / self.rows,
+        }
+
+
+async def sim_andor(
+    detector_class: type[Andor2Ad] | type[Andor3Ad], name: str, directory: Path
+) -> Andor2Ad | Andor3Ad:
+    """Mocked Andor detector that pretends to write a frame every time it acquires."""
+    path_provider = StaticPathProvider(StaticFilenameProvider(name), directory)
+    det = detector_class("p99", path_provider, name)
+    await det.connect(mock=True)
+    set_mock_value(det.drv.array_size_x, 10)
+    set_mock_value(det.drv.array_size_y, 20)
+    set_mock_value(det.hdf.file_path_exists, True)
+    set_mock_value(det.hdf.num_captured, 0)
+    set_mock_value(det.hdf.file_path, str(directory))
+    set_mock_value(det.hdf.full_file_name, f"{directory}/{name}-hdf0")
+    frames = [0]
+
+    def capture(value, *_, **__):
+        # a new file starts from frame 0
+        if value:
+            frames[0] = 0
+            set_mock_value(det.hdf.num_captured, 0)
+        set_mock_value(det.hdf.capture, value)
+
+    def acquire(value, *_, **__):
+        if value:
+            frames[0] += 1
+            set_mock_value(det.hdf.num_captured, frames[0])
+
+    callback_on_mock_put(det.hdf.capture, capture)
+    callback_on_mock_put(det.drv.acquire, acquire)
+    return det
+
+
+def _run_plan(RE: RunEngine, name: str, plan: MsgGenerator) -> dict[str, Any]:
+    benchmark = PlanBenchmark(name)
+    start = time.perf_counter()
+    RE(plan, benchmark)
+    result = benchmark.result(time.perf_counter() - start)
+    LOGGER.info(f"Benchmark {name}: {result}")
+    return result
+
+
+def run_benchmarks(
+    RE: RunEngine, directory: Path, output: Path | None = None
+) -> dict[str, Any]:
+    """
+    Run fast_scan_1d, fast_scan_grid, stxm_fast and stxm_step on simulated stages
+    and mocked detectors.
+
+    Parameters
+    ----------
+    RE: RunEngine
+        RunEngine to run the plans in, the devices are connected in its loop.
+    directory: Path
+        Where the mocked detectors pretend to write.
+    output: Path | None = None
+        Where to write the results as JSON, they are only returned if None.
+    """
+
+    def in_loop(coro: Coroutine) -> Any:
+        return asyncio.run_coroutine_threadsafe(coro, RE.loop).result()
+
+    andor2 = in_loop(sim_andor(Andor2Ad, "andor2", directory))
+    andor3 = in_loop(sim_andor(Andor3Ad, "andor3", directory))
+    fly_stage = SimThreeAxisStage(name="fly_stage", instant=False)
+    step_stage = SimThreeAxisStage(name="step_stage", instant=True)
+    in_loop(fly_stage.connect())
+    in_loop(step_stage.connect())
+
+    plans: dict[str, Callable[[], MsgGenerator]] = {
+        "fast_scan_1d": lambda: fast_scan_1d([andor2], fly_stage.x, 0, 1, 2),
+        "fast_scan_grid": lambda: fast_scan_grid(
+            [andor3], fly_stage.x, 0, 0.2, 3, fly_stage.y, 1, 1.5, 2, snake_axes=True
+        ),
+        "stxm_fast": lambda: stxm_fast(
+            det=andor2,
+            count_time=0.2,
+            step_motor=fly_stage.x,
+            step_start=-0.5,
+            step_end=0.5,
+            scan_motor=fly_stage.y,
+            scan_start=1,
+            scan_end=2,
+            plan_time=1.5,
+            step_size=0.2,
+        ),
+        "stxm_step": lambda: stxm_step(
+            det=andor3,
+            count_time=0.1,
+            x_step_motor=step_stage.x,
+            x_step_start=0,
+            x_step_end=1,
+            x_step_size=0.25,
+            y_step_motor=step_stage.y,
+            y_step_start=0,
+            y_step_end=1,
+            y_step_size=0.25,
+        ),
+    }
+    results = {
+        "python": platform.python_version(),
+        "versions": {package: version(package) for package in ("bluesky", "ophyd-async")},
+        "plans": {name: _run_plan(RE, name, plan()) for name, plan in plans.items()},
+    }
+    if output is not None:
+        output.write_text(json.dumps(results, indent=2))
+    return results
+
+
+def main(args=None):
+    parser = ArgumentParser(description="Benchmark the fast scan and stxm plans.")
+    parser.add_argument("output", type=Path, help="JSON file to write the results to.")
+    parsed = parser.parse_args(args)
+    RE = RunEngine({})
+    with tempfile.TemporaryDirectory() as directory:
+        run_benchmarks(RE, Path(directory), parsed.output)
+
+
+if __name__ == "__main__":
+    main()
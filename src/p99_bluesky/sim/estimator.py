@@ -0,0 +1,444 @@
+"""
+Dry run of a plan on a virtual clock to estimate how long it takes.
+
+Nothing is moved, triggered or slept, the messages of the plan are answered from
+a model of the devices, seeded with what is read from them before anything is
+changed. Run with the simulated stages and mocked detectors of
+p99_bluesky.sim.benchmark, e.g.::
+
+    estimate = estimate_duration(RE, stxm_fast(andor2, 0.2, stage.x, ...))
+    estimate.duration, estimate.phases
+"""
+
+import asyncio
+from collections import defaultdict
+from collections.abc import Coroutine
+from itertools import count
+from math import ceil, sqrt
+from typing import Any
+
+from blueapi.core import MsgGenerator
+from bluesky.run_engine import RunEngine
+from bluesky.utils import Msg, ensure_generator
+from ophyd_async.core import DetectorTrigger, StandardDetector, TriggerInfo
+from ophyd_async.epics.motor import FlyMotorInfo
+
+from p99_bluesky.log import LOGGER
+from p99_bluesky.utility.plan_clock import use_clock
+
+__all__ = ["DurationEstimate", "PlanSimulator", "estimate_duration"]
+
+_PHASES = ("move", "fly", "exposure", "sleep", "overhead")
+
+
+class DurationEstimate:
+    """
+    Expected wall time of a plan and where it goes, all in millisecond.
+
+    Phases are "move" for motors going to position, run-up included, "fly" for
+    motors moving at constant speed through a fly scan, "exposure" for detector
+    frames, "sleep" for waits asked for by the plan and "overhead" for the time
+    the RunEngine takes to process each message. Whatever happens while a motor
+    flies is put down to the fly, otherwise when things run at the same time the
+    wait is put down to whichever finishes last.
+
+    Parameters
+    ----------
+    phases: dict[str, float]
+        Time in millisecond spent in each phase.
+    messages: int
+        Number of messages of the plan.
+    """
+
+    def __init__(self, phases: dict[str, float], messages: int) -> None:
+        self.phases = phases
+        self.messages = messages
+
+    @property
+    def duration(self) -> float:
+        """Expected wall time in millisecond."""
+        return sum(self.phases.values())
+
+    def to_md(self) -> dict[str, Any]:
+        return {
+            "duration": self.duration,
+            "phases": dict(self.phases),
+            "messages": self.messages,
+        }
+
+    def __repr__(self) -> str:
+        phases = ", ".join(f"{phase}={time:.1f}" for phase, time in self.phases.items())
+        return f"DurationEstimate(duration={self.duration:.1f} ms, {phases})"
+
+
+class _VirtualStatus:
+    """Status done once the virtual clock reaches finish."""
+
+    def __init__(self, simulator: "PlanSimulator", finish: float, phase: str):
+        self._simulator = simulator
+        self.finish = finish
+        self.phase = phase
+
+    @property
+    def done(self) -> bool:
+        return self._simulator.now >= self.finish
+
+    @property
+    def success(self) -> bool:
+        return self.done
+
+    def add_callback(self, callback) -> None:
+        if self.done:
+            callback(self)
+        else:
+            self._simulator._callbacks.append((self, callback))
+
+
+class PlanSimulator:
+    """
+    Run a plan on a virtual clock against a model of its devices.
+
+    Motors, anything with a user_readback and a velocity, move at their velocity
+    with a linear ramp of acceleration_time at both ends, or instantly if the
+    velocity is 0 as the simulated motors do, and a move outside the limits raises
+    a ValueError. A fly moves to the start less the run-up and sets the velocity
+    as the motor prepare does. StandardDetectors take the livetime, their
+    acquire_time if not prepared, plus the controller deadtime for every frame,
+    internally triggered ones one frame after another from kickoff, externally
+    triggered ones one frame per wait_for while kicked off. Signals hold what is
+    set on them and a put to the setpoint of a motor moves it. Everything else
+    takes no time but message_time, which every message takes.
+
+    Values are read from the devices in the RunEngine loop the first time they are
+    needed, and again once the device is set, nothing is ever written to them. The
+    plan_clock follows the virtual clock while the plan runs, so plans that time
+    themselves, e.g. the RowSpeedController of stxm_fast, see their own time pass.
+
+    A software fly, a loop between checkpoints polling the complete status of a
+    flying motor, is not run point by point. Once two loops in a row send the same
+    messages the clock goes on by as many more loops as it takes for the motor to
+    finish, so the estimate of a long fly takes no longer than that of a short one.
+
+    Parameters
+    ----------
+    RE: RunEngine
+        RunEngine the devices are connected in.
+    message_time: float = 1e-4
+        Time in second the RunEngine takes to process a message, it has to be
+        positive for a software fly to make progress.
+    max_messages: int = 10_000_000
+        Stop with a RuntimeError after this many messages.
+    """
+
+    def __init__(
+        self,
+        RE: RunEngine,
+        message_time: float = 1e-4,
+        max_messages: int = 10_000_000,
+    ) -> None:
+        if message_time <= 0:
+            raise ValueError(f"Message time must be positive, got {message_time}.")
+        self.RE = RE
+        self.message_time = message_time
+        self.max_messages = max_messages
+        self.now = 0.0
+        self.phases: dict[str, float] = dict.fromkeys(_PHASES, 0.0)
+        self.messages = 0
+        self._values: dict[Any, Any] = {}
+        self._groups: defaultdict[Any, list[_VirtualStatus]] = defaultdict(list)
+        self._fly_targets: dict[Any, tuple[float, float]] = {}
+        self._fly_finishes: dict[Any, float] = {}
+        self._trigger_infos: dict[Any, TriggerInfo] = {}
+        self._kickoffs: defaultdict[Any, int] = defaultdict(int)
+        self._armed: set[Any] = set()
+        self._flying_until = 0.0
+        self._uids = count()
+        self._callbacks: list[tuple[_VirtualStatus, Any]] = []
+        # Software fly loop, the status it polls and the loops seen so far
+        self._fly_status: _VirtualStatus | None = None
+        self._loop: list[tuple[str, Any]] = []
+        self._last_loop: list[tuple[str, Any]] = []
+        self._loop_start = 0.0
+        self._loop_phases: dict[str, float] = dict.fromkeys(_PHASES, 0.0)
+
+    def run(self, plan: MsgGenerator) -> DurationEstimate:
+        """Run plan to the end and return how long it took on the virtual clock."""
+        # The generator under a bluesky Plan, whose throw takes the exception alone
+        plan = ensure_generator(plan)
+        with use_clock(lambda: self.now):
+            response: Any = None
+            exception: Exception | None = None
+            while True:
+                try:
+                    if exception is not None:
+                        msg = plan.throw(exception)
+                    else:
+                        msg = plan.send(response)
+                except StopIteration:
+                    break
+                self.messages += 1
+                if self.messages > self.max_messages:
+                    plan.close()
+                    raise RuntimeError(
+                        f"Plan did not finish within {self.max_messages} messages."
+                    )
+                self._loop.append((msg.command, msg.obj))
+                self._advance(self.message_time, "overhead")
+                try:
+                    response, exception = self._handle(msg), None
+                except Exception as error:
+                    response, exception = None, error
+        return DurationEstimate(
+            {phase: time * 1e3 for phase, time in self.phases.items()}, self.messages
+        )
+
+    def _advance(self, duration: float, phase: str) -> None:
+        if duration > 0:
+            # Whatever happens while a motor flies is part of the fly
+            flying = min(max(self._flying_until - self.now, 0.0), duration)
+            self.now += duration
+            self.phases["fly"] += flying
+            self.phases[phase] += duration - flying
+            self._loop_phases[phase] += duration
+            due = [(status, cb) for status, cb in self._callbacks if status.done]
+            self._callbacks = [
+                (status, cb) for status, cb in self._callbacks if not status.done
+            ]
+            for status, callback in due:
+                callback(status)
+
+    def _checkpoint(self) -> None:
+        """End a loop of the plan, going straight to the end of a software fly once
+        its loops repeat."""
+        fly = self._fly_status
+        if fly is not None and not fly.done and self._loop == self._last_loop:
+            period = self.now - self._loop_start
+            # The plan checks the status once per loop, so it stops on the first
+            # loop that ends with the motor done
+            loops = ceil((fly.finish - self.now) / period) if period > 0 else 0
+            loop_phases = dict(self._loop_phases)
+            self.messages += loops * len(self._loop)
+            for phase, duration in loop_phases.items():
+                self._advance(loops * duration, phase)
+        if fly is not None and fly.done:
+            self._fly_status = None
+        self._last_loop, self._loop = self._loop, []
+        self._loop_start = self.now
+        self._loop_phases = dict.fromkeys(_PHASES, 0.0)
+
+    def _status(self, msg: Msg, duration: float, phase: str) -> _VirtualStatus:
+        status = _VirtualStatus(self, self.now + duration, phase)
+        self._groups[msg.kwargs.get("group")].append(status)
+        return status
+
+    def _in_loop(self, coro: Coroutine) -> Any:
+        return asyncio.run_coroutine_threadsafe(coro, self.RE.loop).result()
+
+    def _value(self, signal: Any) -> Any:
+        if signal not in self._values:
+            self._values[signal] = self._in_loop(signal.get_value())
+        return self._values[signal]
+
+    def _handle(self, msg: Msg) -> Any:
+        command, obj = msg.command, msg.obj
+        if command == "set":
+            return self._set(msg)
+        if command == "prepare":
+            return self._prepare(msg)
+        if command == "kickoff":
+            return self._kickoff(msg)
+        if command == "complete":
+            return self._complete(msg)
+        if command == "trigger":
+            return self._status(msg, self._trigger_time(obj), "exposure")
+        if command == "wait":
+            return self._wait(msg)
+        if command == "wait_for":
+            for det in self._armed:
+                self._advance(self._frame_time(det), "exposure")
+            return None
+        if command == "sleep":
+            self._advance(msg.args[0], "sleep")
+            return None
+        if command == "checkpoint":
+            self._checkpoint()
+            return None
+        if command in ("locate", "read"):
+            return self._read(command, obj)
+        if command in ("open_run", "close_run"):
+            return f"estimate-{next(self._uids)}"
+        if command in ("stage", "unstage"):
+            return []
+        if command == "configure":
+            return {}, {}
+        return None
+
+    def _is_motor(self, obj: Any) -> bool:
+        return hasattr(obj, "user_readback") and hasattr(obj, "velocity")
+
+    def _forget(self, obj: Any) -> None:
+        """Drop what was read from obj and from the signals under it."""
+        self._values.pop(obj, None)
+        for _, child in getattr(obj, "children", tuple)():
+            self._forget(child)
+
+    def _set(self, msg: Msg) -> _VirtualStatus:
+        obj, value = msg.obj, msg.args[0]
+        parent = getattr(obj, "parent", None)
+        if parent is not None and self._is_motor(parent) and obj is parent.user_setpoint:
+            # A put to the setpoint moves the motor as setting the motor does
+            obj = parent
+        if not self._is_motor(obj):
+            self._forget(obj)
+            if hasattr(obj, "get_value"):
+                self._values[obj] = value
+            return self._status(msg, 0.0, "move")
+        duration = self._move(obj, value, self._value(obj.velocity))
+        return self._status(msg, duration, "move")
+
+    def _move(self, motor: Any, position: float, velocity: float) -> float:
+        """Move motor to position and return how long it takes."""
+        low, high = (
+            self._value(motor.low_limit_travel),
+            self._value(motor.high_limit_travel),
+        )
+        # EPICS has no limits when both are 0
+        if (low or high) and not low <= position <= high:
+            raise ValueError(
+                f"{motor.name} move request of {position} is beyond limits:{low} < {high}"
+            )
+        distance = abs(position - self._value(motor.user_readback))
+        self._values[motor.user_readback] = self._values[motor.user_setpoint] = position
+        if not velocity:
+            return 0.0
+        acceleration_time = (
+            self._value(motor.acceleration_time)
+            if hasattr(motor, "acceleration_time")
+            else 0.0
+        )
+        if distance >= velocity * acceleration_time:
+            return distance / velocity + acceleration_time
+        # Never gets to full speed
+        return 2 * sqrt(distance * acceleration_time / velocity)
+
+    def _prepare(self, msg: Msg) -> _VirtualStatus:
+        obj, value = msg.obj, msg.args[0]
+        if isinstance(value, FlyMotorInfo) and self._is_motor(obj):
+            velocity = abs(value.end_position - value.start_position) / (
+                value.time_for_move
+            )
+            acceleration_time = self._value(obj.acceleration_time)
+            direction = 1 if value.end_position >= value.start_position else -1
+            run_up = direction * acceleration_time * velocity / 2
+            self._values[obj.velocity] = velocity
+            self._fly_targets[obj] = (value.end_position + run_up, velocity)
+            duration = self._move(obj, value.start_position - run_up, velocity)
+            return self._status(msg, duration, "move")
+        if isinstance(value, TriggerInfo):
+            self._trigger_infos[obj] = value
+            self._kickoffs[obj] = 0
+            if value.trigger is not DetectorTrigger.INTERNAL:
+                self._armed.discard(obj)
+        return self._status(msg, 0.0, "move")
+
+    def _kickoff(self, msg: Msg) -> _VirtualStatus:
+        obj = msg.obj
+        if obj in self._fly_targets:
+            duration = self._move(obj, *self._fly_targets.pop(obj))
+            self._fly_finishes[obj] = self.now + duration
+            self._flying_until = max(self._flying_until, self.now + duration)
+        elif isinstance(obj, StandardDetector) and obj in self._trigger_infos:
+            info = self._trigger_infos[obj]
+            if info.trigger is DetectorTrigger.INTERNAL:
+                self._fly_finishes[obj] = self.now + self._frames(
+                    info, self._kickoffs[obj]
+                ) * self._frame_time(obj)
+            else:
+                self._armed.add(obj)
+            self._kickoffs[obj] += 1
+        return self._status(msg, 0.0, "fly")
+
+    def _complete(self, msg: Msg) -> _VirtualStatus:
+        obj = msg.obj
+        self._armed.discard(obj)
+        finish = self._fly_finishes.pop(obj, self.now)
+        phase = "exposure" if isinstance(obj, StandardDetector) else "fly"
+        status = self._status(msg, max(finish - self.now, 0.0), phase)
+        if self._is_motor(obj) and not status.done:
+            self._fly_status = status
+        return status
+
+    def _wait(self, msg: Msg) -> bool:
+        group = msg.kwargs.get("group")
+        statuses = self._groups[group]
+        timeout = msg.kwargs.get("timeout")
+        if not statuses:
+            return True
+        last = max(statuses, key=lambda status: status.finish)
+        if timeout is not None and last.finish > self.now + timeout:
+            self._advance(timeout, last.phase)
+            return False
+        self._advance(last.finish - self.now, last.phase)
+        del self._groups[group]
+        return True
+
+    def _frames(self, info: TriggerInfo, kickoff: int) -> int:
+        if isinstance(info.number_of_triggers, list):
+            return info.number_of_triggers[kickoff % len(info.number_of_triggers)]
+        return info.number_of_triggers
+
+    def _frame_time(self, det: Any) -> float:
+        """Livetime and deadtime of one frame of det."""
+        info = self._trigger_infos.get(det)
+        livetime = info.livetime if info is not None else None
+        if livetime is None:
+            livetime = self._value(det.drv.acquire_time)
+        if info is not None and info.deadtime is not None:
+            return livetime + info.deadtime
+        controller = getattr(det, "controller", None)
+        # frames triggered one at a time, no exposure to hide the readout behind
+        return livetime + (controller.get_deadtime(None) if controller else 0.0)
+
+    def _trigger_time(self, obj: Any) -> float:
+        if isinstance(obj, StandardDetector):
+            info = self._trigger_infos.get(obj)
+            frames = info.total_number_of_triggers if info is not None else 1
+            return frames * self._frame_time(obj)
+        drv = getattr(obj, "drv", None)
+        if drv is not None and hasattr(drv, "acquire_time"):
+            return self._value(drv.acquire_time)
+        return 0.0
+
+    def _read(self, command: str, obj: Any) -> dict[str, Any]:
+        if self._is_motor(obj):
+            value = self._value(obj.user_readback)
+            name = obj.user_readback.name
+        elif hasattr(obj, "get_value"):
+            value = self._value(obj)
+            name = obj.name
+        else:
+            return {}
+        if command == "locate":
+            return {"setpoint": value, "readback": value}
+        return {name: {"value": value, "timestamp": self.now}}
+
+
+def estimate_duration(
+    RE: RunEngine, plan: MsgGenerator, message_time: float = 1e-4
+) -> DurationEstimate:
+    """
+    Estimate how long plan takes without moving or triggering anything, see
+    PlanSimulator.
+
+    Parameters
+    ----------
+    RE: RunEngine
+        RunEngine the devices are connected in, only its loop is used.
+    plan: MsgGenerator
+        The plan, e.g. stxm_fast or takeImg on simulated devices.
+    message_time: float = 1e-4
+        Time in second the RunEngine takes to process a message.
+    """
+    estimate = PlanSimulator(RE, message_time).run(plan)
+    LOGGER.info(f"Estimated {estimate}.")
+    return estimate
@@ -1,10 +1,13 @@
 import asyncio
 import contextlib
+from collections.abc import Callable
 
 from bluesky.protocols import Flyable, Preparable
 from ophyd_async.core import (
     AsyncStatus,
     Device,
+    SignalRW,
+    SoftSignalBackend,
     WatchableAsyncStatus,
     observe_value,
     soft_signal_rw,
@@ -16,6 +19,24 @@ from ophyd_async.epics.motor import FlyMotorInfo, MotorLimitsException
 from ophyd_async.sim.demo._sim_motor import SimMotor
 
 
+class _SetpointBackend(SoftSignalBackend[float]):
+    """
+    Soft setpoint that moves its motor when it is put to, as the setpoint of an
+    EPICS motor does, waiting for the move with wait.
+    """
+
+    def __init__(self, move: Callable[[float], AsyncStatus]) -> None:
+        self._move = move
+        super().__init__(float, 0)
+
+    async def put(self, value: float | None, wait: bool) -> None:
+        position = self.initial_value if value is None else value
+        self.set_value(position)
+        status = self._move(position)
+        if wait:
+            await status
+
+
 class p99SimMotor(SimMotor, Flyable, Preparable):
     """
     Adding the missing part to the SimMotor so it behave more like motor
@@ -30,6 +51,10 @@ class p99SimMotor(SimMotor, Flyable, Preparable):
         self.low_limit_travel = soft_signal_rw(float, -10)
         self.high_limit_travel = soft_signal_rw(float, 10)
         super().__init__(name=name, instant=instant)
+        # A put to the setpoint moves the motor, like chain_move sends it
+        self._setpoint = _SetpointBackend(self.set)
+        self.user_setpoint = SignalRW(backend=self._setpoint)
+        self.set_name(name)
 
     @AsyncStatus.wrap
     async def prepare(self, value: FlyMotorInfo):
@@ -116,10 +141,12 @@ class p99SimMotor(SimMotor, Flyable, Preparable):
         """
         Asynchronously move the motor to a new position.
         """
-        # Make sure any existing move tasks are stopped
-        await self.stop()
+        # Make sure any existing move tasks are stopped, the setpoint is the new one
+        self._set_success = True
+        self._cancel_move()
+        self._setpoint.set_value(value)
         old_position, units, velocity = await asyncio.gather(
-            self.user_setpoint.get_value(),
+            self.user_readback.get_value(),
             self.units.get_value(),
             self.velocity.get_value(),
         )
@@ -141,6 +168,20 @@ class p99SimMotor(SimMotor, Flyable, Preparable):
         if not self._set_success:
             raise RuntimeError("Motor was stopped")
 
+    async def stop(self, success=True):
+        """
+        Stop the motor if it is moving, leaving the setpoint where it stopped.
+        """
+        self._set_success = success
+        self._cancel_move()
+        # not put, which would move the motor again
+        self._setpoint.set_value(await self.user_readback.get_value())
+
+    def _cancel_move(self) -> None:
+        if self._move_status:
+            self._move_status.task.cancel()
+            self._move_status = None
+
 
 class SimThreeAxisStage(Device):
     """
@@ -1,3 +1,33 @@
+from .event_page_buffer import EventPageBuffer
+from .live_image import StxmImageAssembler
+from .plan_timer import PlanTimer
+from .position_monitor import PositionMonitor
+from .refinement import GridDataCollector, RefineMetric
+from .region_order import order_regions
+from .row_checkpoint import RowCheckpoint
+from .row_speed_controller import RowSpeedController
+from .sample_clock import SampleClock
+from .snake_lag import correct_snake_lag, estimate_snake_lag
+from .sparse_sampling import SparseSampling, reconstruct_sparse
+from .trajectory import GridTrajectory, PathTrajectory
 from .utility import step_size_to_step_num
 
-__all__ = ["step_size_to_step_num"]
+__all__ = [
+    "EventPageBuffer",
+    "GridDataCollector",
+    "GridTrajectory",
+    "PathTrajectory",
+    "PlanTimer",
+    "PositionMonitor",
+    "RefineMetric",
+    "RowCheckpoint",
+    "RowSpeedController",
+    "SampleClock",
+    "SparseSampling",
+    "StxmImageAssembler",
+    "order_regions",
+    "correct_snake_lag",
+    "estimate_snake_lag",
+    "reconstruct_sparse",
+    "step_size_to_step_num",
+]
@@ -0,0 +1,86 @@
+from collections import defaultdict
+from collections.abc import Iterator
+from typing import Any
+
+from bluesky.protocols import Reading
+from bluesky.utils import maybe_await
+from event_model import DataKey, PartialEventPage
+
+from p99_bluesky.utility import plan_clock
+
+
+class EventPageBuffer:
+    """
+    Readings of a software triggered fly scan batched into event pages.
+
+    Points are added to the buffer instead of being emitted as one event each, the
+    plan collects the buffer into a single event_page once it holds size points or
+    its oldest point has waited period seconds, whichever comes first. Collecting
+    the buffer empties it. The data keys are those of the readables, so the buffer
+    is declared as the stream in place of them.
+
+    Parameters
+    ----------
+    readables: list
+        Everything that is read for each point.
+    size: int
+        Maximum number of points in a page.
+    period: float = 1.0
+        Maximum time in second a point is held before it is emitted.
+    name: str
+        Name of the buffer.
+    """
+
+    def __init__(
+        self,
+        readables: list[Any],
+        size: int,
+        period: float = 1.0,
+        name: str = "event_page_buffer",
+    ) -> None:
+        if size < 1:
+            raise ValueError(f"Event page size must be at least 1, got {size}.")
+        self.name = name
+        self.parent = None
+        self.readables = readables
+        self.size = size
+        self.period = period
+        self._data: defaultdict[str, list[Any]] = defaultdict(list)
+        self._timestamps: defaultdict[str, list[float]] = defaultdict(list)
+        self._points = 0
+        self._oldest: float | None = None
+
+    def __len__(self) -> int:
+        return self._points
+
+    def add(self, readings: dict[str, Reading]) -> None:
+        """Add the readings of one point."""
+        if self._oldest is None:
+            self._oldest = plan_clock.monotonic()
+        for key, reading in readings.items():
+            self._data[key].append(reading["value"])
+            self._timestamps[key].append(reading["timestamp"])
+        self._points += 1
+
+    def due(self) -> bool:
+        """True if the buffer is full or its oldest point has waited long enough."""
+        return self._points >= self.size or (
+            self._oldest is not None
+            and plan_clock.monotonic() - self._oldest >= self.period
+        )
+
+    async def describe_collect(self) -> dict[str, DataKey]:
+        data_keys: dict[str, DataKey] = {}
+        for obj in self.readables:
+            data_keys.update(await maybe_await(obj.describe()))
+        return data_keys
+
+    def collect_pages(self) -> Iterator[PartialEventPage]:
+        if self._points:
+            yield PartialEventPage(
+                data=dict(self._data), timestamps=dict(self._timestamps)
+            )
+        self._data = defaultdict(list)
+        self._timestamps = defaultdict(list)
+        self._points = 0
+        self._oldest = None
@@ -0,0 +1,137 @@
+import numpy as np
+from event_model import DocumentRouter, Event, EventDescriptor, RunStart
+
+
+class StxmImageAssembler(DocumentRouter):
+    """
+    Live image of a signal over an STXM map, filled in one event at a time.
+
+    The image is allocated once from the start document and every event goes
+    straight to its pixel, so the cost per event does not grow with the map.
+
+    Fly grids, with a "trajectory" in the start document, have one row per step
+    position and the scan axis cut into bins, num_bins of them or as many as give
+    square pixels if None. An event goes to the nearest row and the bin its scan
+    position falls in, points landing in the same pixel are averaged, so the
+    direction of each row does not matter. The data keys of the two axes are the
+    "dimensions" of the start document hints, step axis first.
+
+    Step grids, with a "shape", go point by point in the order they are taken, so
+    the pixel comes from the event number, every other row reversed if the inner
+    axis is snaking. Sparse step grids, with a "sparse" entry, take the pixel of
+    each event from its list of points instead, the rest of the image stays NaN,
+    see reconstruct_sparse.
+
+    Parameters
+    ----------
+    signal_key: str
+        Data key of the signal to image.
+    num_bins: int | None = None
+        Number of columns of a fly grid.
+    stream_name: str = "primary"
+        Stream the points are taken from.
+    """
+
+    def __init__(
+        self, signal_key: str, num_bins: int | None = None, stream_name: str = "primary"
+    ) -> None:
+        self.signal_key = signal_key
+        self.num_bins = num_bins
+        self.stream_name = stream_name
+        self._descriptors: set[str] = set()
+        self._image = np.full((0, 0), np.nan)
+        self._sum = np.zeros((0, 0))
+        self._count = np.zeros((0, 0), dtype=int)
+        self._fly: dict | None = None
+        self._snaking = False
+        self._sparse_points: list | None = None
+        self._extent = (0.0, 0.0, 0.0, 0.0)
+        super().__init__()
+
+    @property
+    def image(self) -> np.ndarray:
+        """The image as it is filled, NaN where nothing has landed yet.
+
+        This is the array the events are written to, not a copy, so it keeps
+        changing as the scan goes on.
+        """
+        return self._image
+
+    @property
+    def extent(self) -> tuple[float, float, float, float]:
+        """Scan axis start and end, then step axis start and end of the image."""
+        return self._extent
+
+    def start(self, doc: RunStart) -> None:
+        self._descriptors.clear()
+        self._fly = None
+        self._sparse_points = doc["sparse"]["points"] if "sparse" in doc else None
+        trajectory = doc.get("trajectory")
+        if trajectory is not None:
+            (step_keys, _), (scan_keys, _) = doc["hints"]["dimensions"][:2]
+            steps = trajectory["step_positions"]
+            ends = trajectory["row_starts"] + trajectory["row_ends"]
+            scan_low, scan_high = min(ends), max(ends)
+            step_size = (steps[-1] - steps[0]) / max(len(steps) - 1, 1)
+            num_bins = self.num_bins or (
+                max(round((scan_high - scan_low) / abs(step_size)), 1) if step_size else 1
+            )
+            self._fly = {
+                "step_key": step_keys[0],
+                "scan_key": scan_keys[0],
+                "first_step": steps[0],
+                "step_size": step_size,
+                "scan_low": scan_low,
+                "bin_size": (scan_high - scan_low) / num_bins,
+            }
+            shape = (len(steps), num_bins)
+            self._extent = (scan_low, scan_high, steps[0], steps[-1])
+        else:
+            shape = tuple(doc["shape"])
+            self._snaking = bool(doc.get("snaking", (False, False))[-1])
+            extents = doc.get("extents", ((0, shape[0] - 1), (0, shape[1] - 1)))
+            self._extent = (*extents[1], *extents[0])
+        self._image = np.full(shape, np.nan)
+        self._sum = np.zeros(shape)
+        self._count = np.zeros(shape, dtype=int)
+
+    def descriptor(self, doc: EventDescriptor) -> None:
+        if doc["name"] == self.stream_name:
+            self._descriptors.add(doc["uid"])
+
+    def event(self, doc: Event) -> None:
+        if doc["descriptor"] not in self._descriptors:
+            return
+        data = doc["data"]
+        if self.signal_key not in data:
+            return
+        rows, columns = self._image.shape
+        if self._fly is not None:
+            fly = self._fly
+            if fly["step_key"] not in data or fly["scan_key"] not in data:
+                return
+            row = (
+                round((data[fly["step_key"]] - fly["first_step"]) / fly["step_size"])
+                if fly["step_size"]
+                else 0
+            )
+            column = (
+                int((data[fly["scan_key"]] - fly["scan_low"]) / fly["bin_size"])
+                if fly["bin_size"]
+                else 0
+            )
+            row = min(max(row, 0), rows - 1)
+            column = min(max(column, 0), columns - 1)
+        elif self._sparse_points is not None:
+            if doc["seq_num"] > len(self._sparse_points):
+                return
+            row, column = self._sparse_points[doc["seq_num"] - 1]
+        else:
+            row, column = divmod(doc["seq_num"] - 1, columns)
+            if row >= rows:
+                return
+            if self._snaking and row % 2:
+                column = columns - 1 - column
+        self._sum[row, column] += data[self.signal_key]
+        self._count[row, column] += 1
+        self._image[row, column] = self._sum[row, column] / self._count[row, column]
@@ -0,0 +1,35 @@
+import time
+from collections.abc import Callable, Iterator
+from contextlib import contextmanager
+
+_clock: Callable[[], float] | None = None
+
+
+def monotonic() -> float:
+    """
+    Time in second of the objects that time a plan from inside it, e.g. SampleClock
+    or RowSpeedController.
+
+    This is time.monotonic unless another clock is in use, see use_clock.
+    """
+    return _clock() if _clock is not None else time.monotonic()
+
+
+@contextmanager
+def use_clock(clock: Callable[[], float]) -> Iterator[None]:
+    """
+    Time plans with clock instead of time.monotonic while in the context, so a plan
+    run on a virtual clock sees its own time pass.
+
+    Parameters
+    ----------
+    clock: Callable[[], float]
+        Returns the time in second.
+    """
+    global _clock
+    previous = _clock
+    _clock = clock
+    try:
+        yield
+    finally:
+        _clock = previous
@@ -0,0 +1,45 @@
+from ophyd_async.core import AsyncStatus, StandardReadable, soft_signal_r_and_setter
+
+from p99_bluesky.utility import plan_clock
+
+
+class PlanTimer(StandardReadable):
+    """
+    Actual duration of a plan next to the time it was given and the time it was
+    predicted to take.
+
+    The timer runs from start, triggering it publishes the time since then, so it
+    can be read into a stream at the end of a scan.
+
+    Parameters
+    ----------
+    plan_time: float
+        Time the plan was given in second.
+    predicted_duration: float
+        Time the plan was predicted to take in second.
+    name: str
+        Name of the device.
+    """
+
+    def __init__(
+        self, plan_time: float, predicted_duration: float, name: str = ""
+    ) -> None:
+        with self.add_children_as_readables():
+            self.plan_time, _ = soft_signal_r_and_setter(float, plan_time, units="s")
+            self.predicted_duration, _ = soft_signal_r_and_setter(
+                float, predicted_duration, units="s"
+            )
+            self.actual_duration, self._set_actual_duration = soft_signal_r_and_setter(
+                float, 0.0, units="s"
+            )
+        self._start: float | None = None
+        super().__init__(name=name)
+
+    def start(self) -> None:
+        """Start timing from now."""
+        self._start = plan_clock.monotonic()
+
+    @AsyncStatus.wrap
+    async def trigger(self):
+        if self._start is not None:
+            self._set_actual_duration(plan_clock.monotonic() - self._start)
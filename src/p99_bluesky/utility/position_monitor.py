@@ -0,0 +1,121 @@
+import asyncio
+import time
+from collections import deque
+
+import numpy as np
+from bluesky.protocols import Reading
+from ophyd_async.core import (
+    AsyncStatus,
+    Reference,
+    SignalR,
+    StandardReadable,
+    StandardReadableFormat,
+    observe_value,
+    soft_signal_r_and_setter,
+)
+
+
+class PositionMonitor(StandardReadable):
+    """
+    Motor position captured from a monitor instead of a get per point.
+
+    Once kicked off, every update of the readback is kept with its timestamp in a
+    ring buffer for as long as the monitor runs. Reading the device gives the
+    position interpolated onto the time set by capture_at, which a fly scan sets
+    to the time the detector trigger finished, so the position and the detector
+    data refer to the same moment without another round trip to the motor.
+
+    The position is read under the device name, so naming it after the motor
+    readback gives the same data key as reading the motor itself.
+
+    With a lag the position is taken that much before the capture time, for
+    detector data that is older than its timestamp, see estimate_snake_lag.
+
+    Parameters
+    ----------
+    readback: SignalR[float]
+        Signal to monitor, normally the motor user_readback.
+    buffer_size: int = 1024
+        Number of updates kept, older ones are dropped.
+    lag: float = 0.0
+        Time in second the position is taken before the capture time.
+    name: str
+        Name of the device.
+    """
+
+    def __init__(
+        self,
+        readback: SignalR[float],
+        buffer_size: int = 1024,
+        lag: float = 0.0,
+        name: str = "",
+    ) -> None:
+        self.readback_ref = Reference(readback)
+        self.lag = lag
+        self._buffer: deque[tuple[float, float]] = deque(maxlen=buffer_size)
+        self._task: asyncio.Task | None = None
+        self._stop = asyncio.Event()
+        self._capture_time: float | None = None
+        with self.add_children_as_readables(StandardReadableFormat.HINTED_SIGNAL):
+            self.position, self._set_position = soft_signal_r_and_setter(float, 0.0)
+        super().__init__(name=name)
+
+    def set_name(self, name: str, *, child_name_separator: str | None = None) -> None:
+        super().set_name(name, child_name_separator=child_name_separator)
+        # Same data key as reading the motor
+        self.position.set_name(name)
+
+    @AsyncStatus.wrap
+    async def kickoff(self):
+        """Start monitoring, done once the first update is in the buffer."""
+        self._buffer.clear()
+        self._capture_time = None
+        first_update = asyncio.Event()
+        self._stop = asyncio.Event()
+        self._task = asyncio.create_task(self._monitor(first_update, self._stop))
+        waiter = asyncio.ensure_future(first_update.wait())
+        await asyncio.wait([waiter, self._task], return_when=asyncio.FIRST_COMPLETED)
+        waiter.cancel()
+        if self._task.done():
+            # Monitor stopped before any update, raise whatever stopped it
+            self._task.result()
+
+    @AsyncStatus.wrap
+    async def complete(self):
+        """Stop monitoring, the buffer is kept for any reads after it."""
+        if self._task is not None:
+            # Told to stop rather than cancelled, on Python 3.11 a cancel can be lost
+            # if an update comes in at the same time, leaving complete waiting forever
+            self._stop.set()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+
+    async def _monitor(self, first_update: asyncio.Event, stop: asyncio.Event) -> None:
+        readback = self.readback_ref()
+        stopped = AsyncStatus(stop.wait())
+        try:
+            async for _ in observe_value(readback, done_status=stopped):
+                # Take value and timestamp from the same monitor update
+                reading = (await readback.read(cached=True))[readback.name]
+                self._buffer.append((reading["timestamp"], reading["value"]))
+                first_update.set()
+        finally:
+            stopped.task.cancel()
+
+    def capture_at(self, timestamp: float) -> None:
+        """Set the time that the next read gives the position at."""
+        self._capture_time = timestamp
+
+    def position_at(self, timestamp: float) -> float:
+        """Position at timestamp, interpolated between the buffered updates and
+        held at the first or last one outside of them."""
+        if not self._buffer:
+            raise RuntimeError(f"{self.name} has no position, kickoff first.")
+        times, positions = np.array(self._buffer).T
+        return float(np.interp(timestamp, times, positions))
+
+    async def read(self) -> dict[str, Reading]:
+        timestamp = self._capture_time if self._capture_time is not None else time.time()
+        self._set_position(self.position_at(timestamp - self.lag))
+        reading = await super().read()
+        return {key: {**value, "timestamp": timestamp} for key, value in reading.items()}
@@ -0,0 +1,142 @@
+from enum import Enum
+
+import numpy as np
+from event_model import DocumentRouter, Event, EventDescriptor
+
+
+class RefineMetric(str, Enum):
+    """What decides where a coarse map is refined.
+
+    GRADIENT: size of the gradient of the map.
+    VARIANCE: variance of the map over each point and its neighbours.
+    """
+
+    GRADIENT = "gradient"
+    VARIANCE = "variance"
+
+
+class GridDataCollector(DocumentRouter):
+    """
+    Keep the step position, scan position and signal of every point of a stream,
+    for the plan to look at while the run is still going.
+
+    Parameters
+    ----------
+    step_key: str
+        Data key of the step motor.
+    scan_key: str
+        Data key of the scan motor.
+    signal_key: str
+        Data key of the signal.
+    stream_name: str = "primary"
+        Stream the points are taken from.
+    """
+
+    def __init__(
+        self,
+        step_key: str,
+        scan_key: str,
+        signal_key: str,
+        stream_name: str = "primary",
+    ) -> None:
+        self.keys = (step_key, scan_key, signal_key)
+        self.stream_name = stream_name
+        self._descriptors: set[str] = set()
+        self._points: list[tuple[float, float, float]] = []
+        super().__init__()
+
+    def descriptor(self, doc: EventDescriptor) -> None:
+        if doc["name"] == self.stream_name:
+            self._descriptors.add(doc["uid"])
+
+    def event(self, doc: Event) -> None:
+        if doc["descriptor"] in self._descriptors:
+            data = doc["data"]
+            if all(key in data for key in self.keys):
+                step, scan, signal = (float(data[key]) for key in self.keys)
+                self._points.append((step, scan, signal))
+
+    def __len__(self) -> int:
+        return len(self._points)
+
+    def arrays(self) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """Step positions, scan positions and signal of all points so far."""
+        points = np.array(self._points, dtype=float).reshape(-1, 3)
+        return points[:, 0], points[:, 1], points[:, 2]
+
+
+def regrid_rows(
+    step: np.ndarray,
+    scan: np.ndarray,
+    values: np.ndarray,
+    step_positions: np.ndarray,
+    scan_edges: np.ndarray,
+) -> np.ndarray:
+    """
+    Average scattered points onto a map of one row per step position and one column
+    per bin between scan_edges. Each point goes to the nearest step position, bins
+    without any point are NaN.
+    """
+    rows = np.abs(step[:, None] - step_positions[None, :]).argmin(axis=1)
+    num_bins = len(scan_edges) - 1
+    low, high = sorted((scan_edges[0], scan_edges[-1]))
+    columns = np.clip(
+        ((scan - low) / (high - low) * num_bins).astype(int), 0, num_bins - 1
+    )
+    if scan_edges[0] > scan_edges[-1]:
+        columns = num_bins - 1 - columns
+    total = np.zeros((len(step_positions), num_bins))
+    count = np.zeros_like(total)
+    np.add.at(total, (rows, columns), values)
+    np.add.at(count, (rows, columns), 1)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        return total / count
+
+
+def metric_map(image: np.ndarray, metric: RefineMetric) -> np.ndarray:
+    """Metric of every point of a map, empty points count as the map mean."""
+    filled = np.where(np.isnan(image), np.nanmean(image), image)
+    if metric == RefineMetric.GRADIENT:
+        return np.hypot(*np.gradient(filled))
+    padded = np.pad(filled, 1, mode="edge")
+    windows = np.lib.stride_tricks.sliding_window_view(padded, (3, 3))
+    return windows.var(axis=(-2, -1))
+
+
+def refine_rows(
+    step_positions: np.ndarray,
+    scan_edges: np.ndarray,
+    metric: np.ndarray,
+    threshold: float,
+    refine: int,
+) -> list[tuple[float, float, float]]:
+    """
+    Extra rows for every gap between two neighbouring rows where the metric of
+    either row goes over threshold times its largest value.
+
+    Each refined gap gets refine rows evenly spaced between the two, scanning only
+    the bins over the threshold plus one bin either side.
+
+    Returns
+    -------
+        List of step position, scan start and scan end of each extra row.
+    """
+    peak = np.max(metric) if metric.size else 0.0
+    if peak <= 0:
+        return []
+    over = metric > threshold * peak
+    gaps = over[:-1] | over[1:]
+    rows: list[tuple[float, float, float]] = []
+    fractions = np.arange(1, refine + 1) / (refine + 1)
+    for gap in np.flatnonzero(gaps.any(axis=1)):
+        columns = np.flatnonzero(gaps[gap])
+        first = max(columns[0] - 1, 0)
+        last = min(columns[-1] + 2, len(scan_edges) - 1)
+        steps = step_positions[gap] + fractions * (
+            step_positions[gap + 1] - step_positions[gap]
+        )
+        rows.extend(
+            (float(step), float(scan_edges[first]), float(scan_edges[last]))
+            for step in steps
+        )
+    return rows
@@ -0,0 +1,142 @@
+from p99_bluesky.utility.trajectory import GridTrajectory
+
+# Above this many regions every order is too many to try, the nearest region is
+# taken next instead.
+EXACT_ORDER_LIMIT = 8
+
+
+def order_regions(
+    trajectories: list[GridTrajectory],
+    start: tuple[float, float],
+    step_speed: float | None = None,
+    scan_speed: float | None = None,
+) -> list[tuple[int, GridTrajectory]]:
+    """
+    Order in which to scan a set of grids, and the corner each starts from, so the
+    stage spends the least time travelling between them.
+
+    A move from one point to the next takes as long as the slower of the two axes,
+    each moving at its own speed, and a grid is entered at its first step position
+    and run-up position and left at its last step position and run-down position.
+    Each grid can start from any of its four corners, see GridTrajectory.flipped.
+    Up to EXACT_ORDER_LIMIT grids every order is tried by dynamic programming over
+    the grids already done, above it the nearest grid is taken next.
+
+    Parameters
+    ----------
+    trajectories: list[GridTrajectory]
+        The grids to scan.
+    start: tuple[float, float]
+        Step and scan motor positions before the first grid.
+    step_speed: float | None = None
+        Step motor speed, step moves are taken as instant if None.
+    scan_speed: float | None = None
+        Scan motor speed between grids, scan moves are taken as instant if None.
+
+    Returns
+    -------
+        Index in trajectories and the grid from its chosen corner, in scan order.
+    """
+    corners = [
+        [
+            trajectory,
+            trajectory.flipped(scan=True),
+            trajectory.flipped(step=True),
+            trajectory.flipped(step=True, scan=True),
+        ]
+        for trajectory in trajectories
+    ]
+
+    def travel(position: tuple[float, float], trajectory: GridTrajectory) -> float:
+        return travel_time(position, _entry(trajectory), step_speed, scan_speed)
+
+    if len(corners) > EXACT_ORDER_LIMIT:
+        order = []
+        position = start
+        left = set(range(len(corners)))
+        while left:
+            index, corner = min(
+                ((i, c) for i in left for c in range(4)),
+                key=lambda ic: travel(position, corners[ic[0]][ic[1]]),
+            )
+            left.remove(index)
+            order.append((index, corners[index][corner]))
+            position = _exit(corners[index][corner])
+        return order
+
+    # best[(done, last, corner)] is the shortest travel through the grids in the
+    # done bit mask ending with grid last from corner, and the state before it.
+    best: dict[tuple[int, int, int], tuple[float, tuple[int, int, int] | None]] = {}
+    for index, options in enumerate(corners):
+        for corner, trajectory in enumerate(options):
+            best[(1 << index, index, corner)] = (travel(start, trajectory), None)
+    for done in range(1, 1 << len(corners)):
+        for last, options in enumerate(corners):
+            if not done & (1 << last):
+                continue
+            for corner in range(4):
+                state = (done, last, corner)
+                if state not in best:
+                    continue
+                cost = best[state][0]
+                position = _exit(options[corner])
+                for index, next_options in enumerate(corners):
+                    if done & (1 << index):
+                        continue
+                    for next_corner, trajectory in enumerate(next_options):
+                        next_state = (done | (1 << index), index, next_corner)
+                        next_cost = cost + travel(position, trajectory)
+                        if next_state not in best or next_cost < best[next_state][0]:
+                            best[next_state] = (next_cost, state)
+    everything = (1 << len(corners)) - 1
+    state = min(
+        (state for state in best if state[0] == everything), key=lambda s: best[s][0]
+    )
+    order = []
+    while state is not None:
+        order.append((state[1], corners[state[1]][state[2]]))
+        state = best[state][1]
+    return order[::-1]
+
+
+def travel_time(
+    start: tuple[float, float],
+    end: tuple[float, float],
+    step_speed: float | None = None,
+    scan_speed: float | None = None,
+) -> float:
+    """Time to move both axes from start to end together, step and scan positions,
+    an axis with no speed is taken as instant."""
+    return max(
+        abs(end[0] - start[0]) / step_speed if step_speed else 0.0,
+        abs(end[1] - start[1]) / scan_speed if scan_speed else 0.0,
+    )
+
+
+def regions_travel_time(
+    order: list[GridTrajectory],
+    start: tuple[float, float],
+    step_speed: float | None = None,
+    scan_speed: float | None = None,
+) -> float:
+    """Total time travelling from start to and between the grids in order."""
+    total = 0.0
+    position = start
+    for trajectory in order:
+        total += travel_time(position, _entry(trajectory), step_speed, scan_speed)
+        position = _exit(trajectory)
+    return total
+
+
+def _entry(trajectory: GridTrajectory) -> tuple[float, float]:
+    return (
+        float(trajectory.step_positions[0]),
+        float(trajectory.prepared_positions[0]),
+    )
+
+
+def _exit(trajectory: GridTrajectory) -> tuple[float, float]:
+    return (
+        float(trajectory.step_positions[-1]),
+        float(trajectory.completed_positions[-1]),
+    )
@@ -0,0 +1,34 @@
+from ophyd_async.core import StandardReadable, soft_signal_r_and_setter
+
+
+class RowCheckpoint(StandardReadable):
+    """
+    Last row of a grid known to be complete.
+
+    The plan marks every row once it is done and reads the device into the
+    "row_checkpoint" stream, so after an interruption the last event of that
+    stream gives the row to resume after. Rows are numbered from first_row, so a
+    grid resuming another one carries on with the numbering of the original.
+
+    Parameters
+    ----------
+    first_row: int = 0
+        Index of the first row of the grid.
+    name: str
+        Name of the device.
+    """
+
+    def __init__(self, first_row: int = 0, name: str = "") -> None:
+        self._next_row = first_row
+        with self.add_children_as_readables():
+            self.row, self._set_row = soft_signal_r_and_setter(int, first_row - 1)
+            self.step_position, self._set_step_position = soft_signal_r_and_setter(
+                float, 0.0
+            )
+        super().__init__(name=name)
+
+    def mark(self, step_position: float) -> None:
+        """Mark the next row, at step_position, as complete."""
+        self._set_row(self._next_row)
+        self._set_step_position(step_position)
+        self._next_row += 1
@@ -0,0 +1,135 @@
+from collections.abc import Iterator
+
+from ophyd_async.core import StandardReadable, soft_signal_r_and_setter
+
+from p99_bluesky.utility import plan_clock
+from p99_bluesky.utility.trajectory import GridTrajectory
+
+
+class RowSpeedController(StandardReadable):
+    """
+    Closed loop correction of the rows of a grid fly scan against a time budget.
+
+    Iterating over the controller gives the step position, scan start and scan end
+    of the rows still to do, each one timed from when it is handed out to end_row,
+    which has to be called after each of them. After each row the time the rows
+    took over their estimate is averaged into the overhead per row, and the rows
+    left are refitted with GridTrajectory.refit to finish in what is left of
+    plan_time, at a scan speed no higher than max_speed. Rows are only dropped,
+    making the step size bigger, when even max_speed is too slow. Reading the
+    controller gives the last row and the correction made after it, so every
+    correction can go into a stream.
+
+    Parameters
+    ----------
+    trajectory: GridTrajectory
+        The grid as planned.
+    plan_time: float
+        Time in second the whole grid has to be done in.
+    max_speed: float
+        Highest scan speed allowed, the motor maximum or lower to keep the run-up
+        within the limits.
+    name: str
+        Name of the device.
+    """
+
+    def __init__(
+        self,
+        trajectory: GridTrajectory,
+        plan_time: float,
+        max_speed: float,
+        name: str = "",
+    ) -> None:
+        self.trajectory = trajectory
+        self.plan_time = plan_time
+        self.max_speed = max_speed
+        self._first_row = 0
+        self._rows_done = 0
+        self._start: float | None = None
+        self._row_start: float | None = None
+        self._row_overhead = trajectory.row_overhead
+        self._extra_time = 0.0
+        with self.add_children_as_readables():
+            self.row, self._set_row = soft_signal_r_and_setter(int, 0)
+            self.row_duration, self._set_row_duration = soft_signal_r_and_setter(
+                float, 0.0, units="s"
+            )
+            self.estimated_row_duration, self._set_estimated_row_duration = (
+                soft_signal_r_and_setter(float, 0.0, units="s")
+            )
+            self.speed, self._set_speed = soft_signal_r_and_setter(
+                float, trajectory.speed
+            )
+            self.step_size, self._set_step_size = soft_signal_r_and_setter(
+                float, self._current_step_size()
+            )
+            self.rows_left, self._set_rows_left = soft_signal_r_and_setter(
+                int, trajectory.num_rows
+            )
+            self.estimated_duration_left, self._set_estimated_duration_left = (
+                soft_signal_r_and_setter(float, trajectory.total_duration, units="s")
+            )
+        super().__init__(name=name)
+
+    @property
+    def current_speed(self) -> float:
+        """Scan speed of the rows left."""
+        return self.trajectory.speed
+
+    def start(self) -> None:
+        """Start the time budget from now."""
+        self._start = plan_clock.monotonic()
+
+    def __iter__(self) -> Iterator[tuple[float, float, float]]:
+        while self._first_row < self.trajectory.num_rows:
+            row = self._first_row
+            if self._start is None:
+                self.start()
+            self._row_start = plan_clock.monotonic()
+            yield (
+                float(self.trajectory.step_positions[row]),
+                float(self.trajectory.row_starts[row]),
+                float(self.trajectory.row_ends[row]),
+            )
+
+    def end_row(self) -> None:
+        """Time the row just done and refit the rows left to the time left."""
+        assert self._start is not None and self._row_start is not None, (
+            "end_row must follow a row from iterating over the controller"
+        )
+        now = plan_clock.monotonic()
+        row = self._first_row
+        # The turnaround before a row is done as part of it
+        estimate = float(
+            self.trajectory.row_durations[row] + self.trajectory.turnaround_durations[row]
+        )
+        duration = now - self._row_start
+        # Time over the estimate without any correction made so far
+        extra_time = (
+            duration - estimate + self.trajectory.row_overhead - self._row_overhead
+        )
+        self._rows_done += 1
+        self._extra_time += (extra_time - self._extra_time) / self._rows_done
+        self._set_row(self._rows_done - 1)
+        self._set_row_duration(duration)
+        self._set_estimated_row_duration(estimate)
+        if row + 1 < self.trajectory.num_rows:
+            self.trajectory = self.trajectory.refit(
+                row + 1,
+                self.plan_time - (now - self._start),
+                self.max_speed,
+                max(self._row_overhead + self._extra_time, 0.0),
+            )
+            self._first_row = 0
+        else:
+            self._first_row = self.trajectory.num_rows
+        self._set_speed(self.trajectory.speed)
+        self._set_step_size(self._current_step_size())
+        self._set_rows_left(self.trajectory.num_rows - self._first_row)
+        self._set_estimated_duration_left(
+            self.trajectory.total_duration if self._first_row == 0 else 0.0
+        )
+
+    def _current_step_size(self) -> float:
+        steps = self.trajectory.step_positions[self._first_row :]
+        return float(abs(steps[1] - steps[0])) if len(steps) > 1 else 0.0
@@ -0,0 +1,119 @@
+from math import ceil
+
+from ophyd_async.core import AsyncStatus, StandardReadable, soft_signal_r_and_setter
+
+from p99_bluesky.utility import plan_clock
+
+
+class SampleClock(StandardReadable):
+    """
+    Fixed cadence scheduler for software triggered fly scans.
+
+    Sampling slots are laid on a monotonic clock every period seconds from the start
+    of each row. After each point the clock hands out the wait until the next slot
+    that has not passed yet, slots that were overrun are skipped and counted rather
+    than queued up. Triggering the clock publishes the sampling statistics, so it
+    can be read into a stream at the end of a scan.
+
+    Parameters
+    ----------
+    period: float
+        Time between samples in second.
+    name: str
+        Name of the device.
+    """
+
+    def __init__(self, period: float, name: str = "") -> None:
+        if period <= 0:
+            raise ValueError(f"Sample period must be positive, got {period}.")
+        self.period = period
+        with self.add_children_as_readables():
+            self.points, self._set_points = soft_signal_r_and_setter(int, 0)
+            self.missed_slots, self._set_missed_slots = soft_signal_r_and_setter(int, 0)
+            self.jitter, self._set_jitter = soft_signal_r_and_setter(
+                float, 0.0, units="s"
+            )
+            self.max_lateness, self._set_max_lateness = soft_signal_r_and_setter(
+                float, 0.0, units="s"
+            )
+            self.achieved_rate, self._set_achieved_rate = soft_signal_r_and_setter(
+                float, 0.0, units="Hz"
+            )
+        self._row_start: float | None = None
+        self._slot = -1
+        self._last_mark = 0.0
+        self._row_points = 0
+        self._n_points = 0
+        self._n_missed = 0
+        self._n_intervals = 0
+        self._active_time = 0.0
+        # running sums of the lateness for the jitter
+        self._lateness_sum = 0.0
+        self._lateness_sq_sum = 0.0
+        self._lateness_max = 0.0
+        super().__init__(name=name)
+
+    def start_row(self) -> None:
+        """Start a new row, slots are counted from now."""
+        self._close_row()
+        self._row_start = plan_clock.monotonic()
+        self._slot = -1
+        self._row_points = 0
+
+    def time_to_next_slot(self) -> float:
+        """Move on to the next slot that is still ahead and return how long to wait
+        for it, any slot passed in the meantime is counted as missed."""
+        now = plan_clock.monotonic()
+        if self._row_start is None:
+            self.start_row()
+        assert self._row_start is not None
+        next_slot = max(
+            self._slot + 1, ceil((now - self._row_start) / self.period - 1e-9)
+        )
+        self._n_missed += next_slot - self._slot - 1
+        self._slot = next_slot
+        return max(0.0, self._row_start + next_slot * self.period - now)
+
+    def mark(self) -> None:
+        """Record that the sample of the current slot is being taken now."""
+        assert self._row_start is not None, "start_row must be called before mark"
+        now = plan_clock.monotonic()
+        lateness = now - (self._row_start + self._slot * self.period)
+        self._lateness_sum += lateness
+        self._lateness_sq_sum += lateness**2
+        self._lateness_max = max(self._lateness_max, lateness)
+        if self._row_points:
+            self._n_intervals += 1
+        self._last_mark = now
+        self._row_points += 1
+        self._n_points += 1
+
+    def _close_row(self) -> None:
+        if self._row_start is not None and self._last_mark > self._row_start:
+            self._active_time += self._last_mark - self._row_start
+
+    def stats(self) -> dict[str, float]:
+        """Sampling statistics of all rows so far."""
+        active_time = self._active_time
+        if self._row_start is not None and self._last_mark > self._row_start:
+            active_time += self._last_mark - self._row_start
+        jitter = 0.0
+        if self._n_points:
+            mean = self._lateness_sum / self._n_points
+            jitter = max(0.0, self._lateness_sq_sum / self._n_points - mean**2) ** 0.5
+        return {
+            "points": self._n_points,
+            "missed_slots": self._n_missed,
+            "jitter": jitter,
+            "max_lateness": self._lateness_max,
+            "achieved_rate": self._n_intervals / active_time if active_time else 0.0,
+        }
+
+    @AsyncStatus.wrap
+    async def trigger(self):
+        stats = self.stats()
+        self._set_points(int(stats["points"]))
+        self._set_missed_slots(int(stats["missed_slots"]))
+        self._set_jitter(stats["jitter"])
+        self._set_max_lateness(stats["max_lateness"])
+        self._set_achieved_rate(stats["achieved_rate"])
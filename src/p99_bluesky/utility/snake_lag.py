@@ -0,0 +1,113 @@
+import numpy as np
+
+from p99_bluesky.utility.refinement import regrid_rows
+
+
+def estimate_snake_lag(
+    step: np.ndarray,
+    scan: np.ndarray,
+    values: np.ndarray,
+    step_positions: np.ndarray,
+    scan_edges: np.ndarray,
+) -> float:
+    """
+    Shift along the scan axis of the positions of a snaking fly grid, from the
+    cross-correlation of neighbouring rows going opposite ways.
+
+    A position read some time after the detector data it goes with is ahead of it
+    by the same distance in the direction of travel, so rows going one way come
+    out shifted against rows going the other way by twice that distance. Every row
+    is averaged onto the bins between scan_edges, see regrid_rows, and the shift of
+    each row against the next is the peak of their cross-correlation, worked out
+    by FFT for all rows at once and interpolated between bins. The median over
+    every pair of rows going opposite ways is taken.
+
+    Parameters
+    ----------
+    step: np.ndarray
+        Step position of every point, in the order they were taken.
+    scan: np.ndarray
+        Scan position of every point.
+    values: np.ndarray
+        Signal of every point.
+    step_positions: np.ndarray
+        Step position of each row.
+    scan_edges: np.ndarray
+        Edges of the bins of the scan axis.
+
+    Returns
+    -------
+        Distance the positions are ahead in the direction of travel, divide by the
+        scan speed for the time, 0 if no two neighbouring rows go opposite ways.
+    """
+    rows = _nearest_rows(step, step_positions)
+    directions = _row_directions(rows, scan, len(step_positions))
+    image = regrid_rows(step, scan, values, step_positions, scan_edges)
+    num_bins = image.shape[1]
+    has_points = np.isfinite(image).any(axis=1)
+    pairs = np.flatnonzero(directions[:-1] * directions[1:] < 0)
+    pairs = pairs[has_points[pairs] & has_points[pairs + 1]]
+    if len(pairs) == 0 or num_bins < 2:
+        return 0.0
+    # empty bins at the row mean, so they do not add to the correlation
+    row_means = np.nanmean(image, axis=1, keepdims=True)
+    filled = np.where(np.isnan(image), row_means, image) - row_means
+    # zero padded to twice the length so the correlation does not wrap around
+    spectrum = np.fft.rfft(filled, n=2 * num_bins, axis=1)
+    correlation = np.fft.irfft(
+        np.conj(spectrum[pairs]) * spectrum[pairs + 1], n=2 * num_bins, axis=1
+    )
+    peaks = correlation.argmax(axis=1)
+    # parabola through the peak and its neighbours for the shift between bins
+    before = correlation[np.arange(len(pairs)), peaks - 1]
+    peak = correlation[np.arange(len(pairs)), peaks]
+    after = correlation[np.arange(len(pairs)), (peaks + 1) % (2 * num_bins)]
+    curvature = before - 2 * peak + after
+    with np.errstate(invalid="ignore", divide="ignore"):
+        offsets = np.where(curvature < 0, 0.5 * (before - after) / curvature, 0.0)
+    lags = np.where(peaks < num_bins, peaks, peaks - 2 * num_bins) + offsets
+    bin_size = (scan_edges[-1] - scan_edges[0]) / num_bins
+    # the next row is shifted by -2 * direction * shift against this one
+    shifts = -lags * bin_size / (2 * directions[pairs])
+    return float(np.median(shifts))
+
+
+def correct_snake_lag(
+    step: np.ndarray,
+    scan: np.ndarray,
+    step_positions: np.ndarray,
+    shift: float,
+) -> np.ndarray:
+    """
+    Scan positions with shift taken off in the direction of travel of each row, see
+    estimate_snake_lag.
+
+    Parameters
+    ----------
+    step: np.ndarray
+        Step position of every point, in the order they were taken.
+    scan: np.ndarray
+        Scan position of every point.
+    step_positions: np.ndarray
+        Step position of each row.
+    shift: float
+        Distance the positions are ahead in the direction of travel.
+    """
+    rows = _nearest_rows(step, step_positions)
+    directions = _row_directions(rows, scan, len(step_positions))
+    return scan - directions[rows] * shift
+
+
+def _nearest_rows(step: np.ndarray, step_positions: np.ndarray) -> np.ndarray:
+    return np.abs(step[:, None] - step_positions[None, :]).argmin(axis=1)
+
+
+def _row_directions(rows: np.ndarray, scan: np.ndarray, num_rows: int) -> np.ndarray:
+    """Direction of travel of each row from its first and last point, 0 if it has
+    fewer than two."""
+    row_numbers, first = np.unique(rows, return_index=True)
+    _, last = np.unique(rows[::-1], return_index=True)
+    last = len(rows) - 1 - last
+    directions = np.zeros(num_rows)
+    directions[row_numbers] = np.sign(scan[last] - scan[first])
+    return directions
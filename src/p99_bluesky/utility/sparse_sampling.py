@@ -0,0 +1,180 @@
+from enum import Enum
+
+import numpy as np
+
+
+class SparseSampling(str, Enum):
+    """How the points of a sparse map are picked.
+
+    RANDOM: uniformly at random.
+    HALTON: from the Halton sequence, spread more evenly than at random.
+    """
+
+    RANDOM = "random"
+    HALTON = "halton"
+
+
+def sparse_grid_points(
+    shape: tuple[int, int],
+    fraction: float,
+    sampling: SparseSampling = SparseSampling.HALTON,
+    seed: int | None = None,
+) -> np.ndarray:
+    """
+    Row and column of a fraction of the points of a grid, every point at most once.
+
+    Parameters
+    ----------
+    shape: tuple[int, int]
+        Number of rows and columns of the grid.
+    fraction: float
+        Share of the points to pick, between 0 and 1.
+    sampling: SparseSampling = SparseSampling.HALTON
+        How the points are picked.
+    seed: int | None = None
+        Seed of the random points, or where the Halton sequence starts.
+
+    Returns
+    -------
+        Array of row and column of each point, one point per row.
+    """
+    if not 0 < fraction <= 1:
+        raise ValueError(f"Fraction of points: {fraction} is not within (0, 1].")
+    num_rows, num_columns = shape
+    total = num_rows * num_columns
+    num_points = max(round(fraction * total), 1)
+    rng = np.random.default_rng(seed)
+    if sampling == SparseSampling.RANDOM:
+        cells = rng.choice(total, num_points, replace=False)
+    else:
+        # The sequence falls into cells already taken, so take more than needed
+        # and keep the first of each cell, topped up at random if still short.
+        start = int(rng.integers(0, total)) if seed is not None else 1
+        index = np.arange(start, start + 4 * num_points)
+        rows = (_radical_inverse(index, 2) * num_rows).astype(int)
+        columns = (_radical_inverse(index, 3) * num_columns).astype(int)
+        candidates = rows * num_columns + columns
+        _, first = np.unique(candidates, return_index=True)
+        cells = candidates[np.sort(first)][:num_points]
+        if len(cells) < num_points:
+            left = np.setdiff1d(np.arange(total), cells)
+            cells = np.concatenate(
+                (cells, rng.choice(left, num_points - len(cells), replace=False))
+            )
+    return np.stack(np.divmod(cells, num_columns), axis=1)
+
+
+def nearest_neighbour_tour(
+    positions: np.ndarray,
+    start: tuple[float, float] | None = None,
+    speeds: tuple[float, float] | None = None,
+) -> np.ndarray:
+    """
+    Order to visit positions in, always going to the nearest one not yet visited.
+
+    A move takes as long as the slower of the two axes, each at its own speed, so
+    both axes are taken as moving together.
+
+    Parameters
+    ----------
+    positions: np.ndarray
+        Position of each point on both axes, one point per row.
+    start: tuple[float, float] | None = None
+        Where the tour starts from, the first point if None.
+    speeds: tuple[float, float] | None = None
+        Speed of each axis, both 1 if None, an axis with no speed is taken as
+        instant.
+
+    Returns
+    -------
+        Indices of positions in the order to visit them.
+    """
+    axis_speeds = np.asarray(speeds if speeds else (1.0, 1.0), dtype=float)
+    scale = np.divide(1, axis_speeds, out=np.zeros(2), where=axis_speeds > 0)
+    points = np.asarray(positions, dtype=float) * scale
+    visited = np.zeros(len(points), dtype=bool)
+    order = np.empty(len(points), dtype=int)
+    current = np.asarray(start, dtype=float) * scale if start is not None else points[0]
+    for step in range(len(points)):
+        times = np.abs(points - current).max(axis=1)
+        times[visited] = np.inf
+        nearest = int(times.argmin())
+        order[step] = nearest
+        visited[nearest] = True
+        current = points[nearest]
+    return order
+
+
+def inpaint_sparse(
+    image: np.ndarray, tolerance: float = 1e-4, max_iterations: int = 2000
+) -> np.ndarray:
+    """
+    Fill the NaN of a sparsely measured map so it varies smoothly between the
+    points that were measured.
+
+    The missing points start at the mean of the map and are repeatedly replaced by
+    the mean of their four neighbours, the whole map at once, until the largest
+    change is under tolerance times the range of the measured points. The measured
+    points are left as they are.
+
+    Parameters
+    ----------
+    image: np.ndarray
+        Map with NaN where nothing was measured.
+    tolerance: float = 1e-4
+        Largest change, relative to the range of the map, to stop at.
+    max_iterations: int = 2000
+        Most iterations to do.
+    """
+    missing = np.isnan(image)
+    if missing.all():
+        raise ValueError("Nothing measured to inpaint from.")
+    filled = np.where(missing, np.nanmean(image), image)
+    if not missing.any():
+        return filled
+    limit = tolerance * max(float(np.nanmax(image) - np.nanmin(image)), 1e-12)
+    for _ in range(max_iterations):
+        padded = np.pad(filled, 1, mode="edge")
+        neighbours = (
+            padded[:-2, 1:-1] + padded[2:, 1:-1] + padded[1:-1, :-2] + padded[1:-1, 2:]
+        ) / 4
+        change = np.abs(neighbours[missing] - filled[missing]).max()
+        filled[missing] = neighbours[missing]
+        if change < limit:
+            break
+    return filled
+
+
+def reconstruct_sparse(
+    shape: tuple[int, int], points: np.ndarray, values: np.ndarray
+) -> np.ndarray:
+    """
+    Full map from the values measured at points of a grid, see inpaint_sparse.
+
+    Parameters
+    ----------
+    shape: tuple[int, int]
+        Number of rows and columns of the grid.
+    points: np.ndarray
+        Row and column of each measured point, as from sparse_grid_points.
+    values: np.ndarray
+        Value measured at each point, points measured more than once are averaged.
+    """
+    points = np.asarray(points, dtype=int).reshape(-1, 2)
+    total = np.zeros(shape)
+    count = np.zeros(shape)
+    np.add.at(total, (points[:, 0], points[:, 1]), values)
+    np.add.at(count, (points[:, 0], points[:, 1]), 1)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        return inpaint_sparse(total / count)
+
+
+def _radical_inverse(index: np.ndarray, base: int) -> np.ndarray:
+    """Van der Corput sequence of index in base, between 0 and 1."""
+    result = np.zeros(len(index))
+    factor = 1 / base
+    while np.any(index > 0):
+        index, digit = np.divmod(index, base)
+        result += digit * factor
+        factor /= base
+    return result
@@ -0,0 +1,532 @@
+from collections.abc import Callable
+
+import numpy as np
+
+from p99_bluesky.utility.utility import step_size_to_step_num
+
+
+class GridTrajectory:
+    """
+    Raster schedule of a grid fly scan, worked out up front as NumPy arrays.
+
+    One entry per row for the step position, the direction and the start/end of the
+    scan axis, the positions including the run-up and run-down the motor needs to
+    get to speed, and the estimated time of each row and of the turnaround before
+    it. The turnaround is the step move or the scan motor going back to its run-up
+    position, whichever is longer, as the two are done together. Any fixed time
+    lost on every row, such as the prepare and kickoff round trips, is added as
+    row_overhead.
+
+    Parameters
+    ----------
+    step_start: float
+        Starting position of the step axis.
+    step_end: float
+        Ending position of the step axis.
+    num_step: int
+        Number of rows.
+    scan_start: float
+        Starting position of the scan axis.
+    scan_end: float
+        Ending position of the scan axis.
+    speed: float
+        Scan motor speed during the rows.
+    acceleration_time: float = 0.0
+        Time for the scan motor to get to speed.
+    snake_axes: bool = False
+        If True, every other row is scanned from end to start.
+    step_speed: float | None = None
+        Step motor speed, step moves are taken as instant if None.
+    max_speed: float | None = None
+        Scan motor speed between rows, speed is used if None.
+    row_overhead: float = 0.0
+        Fixed time in second added to every row.
+    """
+
+    def __init__(
+        self,
+        step_start: float,
+        step_end: float,
+        num_step: int,
+        scan_start: float,
+        scan_end: float,
+        speed: float,
+        acceleration_time: float = 0.0,
+        snake_axes: bool = False,
+        step_speed: float | None = None,
+        max_speed: float | None = None,
+        row_overhead: float = 0.0,
+    ) -> None:
+        if speed <= 0:
+            raise ValueError(f"Scan speed: {speed} <= 0")
+        self.speed = speed
+        self.acceleration_time = acceleration_time
+        self.row_overhead = row_overhead
+        self.snake_axes = snake_axes
+        self.step_speed = step_speed
+        self.max_speed = max_speed
+        self.step_positions = np.linspace(step_start, step_end, num_step, endpoint=True)
+        rows = np.arange(num_step)
+        reverse = (rows % 2 == 1) if snake_axes else np.zeros(num_step, dtype=bool)
+        self.directions = np.where(reverse, -1, 1) * (1 if scan_end >= scan_start else -1)
+        self.row_starts = np.where(reverse, scan_end, scan_start).astype(float)
+        self.row_ends = np.where(reverse, scan_start, scan_end).astype(float)
+
+        self.run_up_distance = acceleration_time * speed * 0.5
+        self.prepared_positions = self.row_starts - self.directions * self.run_up_distance
+        self.completed_positions = self.row_ends + self.directions * self.run_up_distance
+
+        # accelerate, constant speed over the row, decelerate
+        self.row_durations = (
+            np.abs(self.row_ends - self.row_starts) / speed
+            + 2 * acceleration_time
+            + row_overhead
+        )
+        return_distance = np.abs(
+            self.prepared_positions[1:] - self.completed_positions[:-1]
+        )
+        scan_return = np.where(
+            return_distance > 0,
+            return_distance / (max_speed or speed) + 2 * acceleration_time,
+            0.0,
+        )
+        step_move = (
+            np.abs(np.diff(self.step_positions)) / step_speed
+            if step_speed
+            else np.zeros(max(num_step - 1, 0))
+        )
+        self.turnaround_durations = np.concatenate(
+            ([0.0], np.maximum(scan_return, step_move))
+        )
+        self.total_duration = float(
+            np.sum(self.row_durations) + np.sum(self.turnaround_durations)
+        )
+
+    @classmethod
+    def for_plan_time(
+        cls,
+        plan_time: float,
+        count_time: float,
+        step_start: float,
+        step_end: float,
+        scan_start: float,
+        scan_end: float,
+        max_speed: float,
+        step_size: float | None = None,
+        acceleration_time: float = 0.0,
+        snake_axes: bool = False,
+        step_speed: float | None = None,
+        row_overhead: float = 0.0,
+    ) -> "GridTrajectory":
+        """
+        Grid whose estimated duration comes out as close to plan_time as it can.
+
+        With a step_size the number of rows is fixed and the slowest scan speed that
+        fits in plan_time is used. Without one, the rows are spaced as far apart as
+        the points along them, one count_time of travel at the scan speed, and the
+        slowest speed that fits is used again. If even max_speed is too slow, rows
+        are dropped, making the step size bigger, until it fits. If a single row
+        does not fit, that row at max_speed is returned and its duration is over
+        plan_time.
+        """
+        if plan_time <= 0 or count_time <= 0:
+            raise ValueError(
+                f"Plan time: {plan_time} and count time: {count_time} must be positive."
+            )
+        if step_size is not None and step_size == 0:
+            raise ValueError(f"Step size: {step_size} == 0")
+        scan_range = abs(scan_end - scan_start)
+        if scan_range == 0:
+            raise ValueError("Scan start and end are the same.")
+
+        def build(speed: float, num_step: int) -> "GridTrajectory":
+            return cls(
+                step_start,
+                step_end,
+                num_step,
+                scan_start,
+                scan_end,
+                speed,
+                acceleration_time=acceleration_time,
+                snake_axes=snake_axes,
+                step_speed=step_speed,
+                max_speed=max_speed,
+                row_overhead=row_overhead,
+            )
+
+        def num_rows(speed: float) -> int:
+            size = abs(step_size) if step_size is not None else speed * count_time
+            return max(step_size_to_step_num(step_start, step_end, size), 1)
+
+        return _fit_plan_time(plan_time, scan_range, max_speed, build, num_rows)
+
+    def refit(
+        self,
+        first_row: int,
+        plan_time: float,
+        max_speed: float,
+        row_overhead: float | None = None,
+    ) -> "GridTrajectory":
+        """
+        Rows from first_row on, with the slowest scan speed up to max_speed that
+        gets them done in plan_time, as in for_plan_time. The number of rows is kept
+        unless even max_speed is too slow, then rows are dropped and the rest are
+        spread between the same first and last step positions. The row_overhead of
+        this grid is used if None.
+        """
+        step_positions = self.step_positions
+
+        def build(speed: float, num_step: int) -> "GridTrajectory":
+            return GridTrajectory(
+                step_positions[first_row],
+                step_positions[-1],
+                num_step,
+                self.row_starts[first_row],
+                self.row_ends[first_row],
+                speed,
+                acceleration_time=self.acceleration_time,
+                snake_axes=self.snake_axes,
+                step_speed=self.step_speed,
+                max_speed=self.max_speed,
+                row_overhead=self.row_overhead if row_overhead is None else row_overhead,
+            )
+
+        num_step = self.num_rows - first_row
+        return _fit_plan_time(
+            plan_time,
+            abs(self.row_ends[first_row] - self.row_starts[first_row]),
+            max_speed,
+            build,
+            lambda _: num_step,
+        )
+
+    def from_row(self, first_row: int) -> "GridTrajectory":
+        """The same grid from first_row on, e.g. to resume it, rows going the same
+        way at the same speed."""
+        if not 0 <= first_row < self.num_rows:
+            raise ValueError(
+                f"First row: {first_row} is not one of the {self.num_rows} rows."
+            )
+        return GridTrajectory(
+            self.step_positions[first_row],
+            self.step_positions[-1],
+            self.num_rows - first_row,
+            self.row_starts[first_row],
+            self.row_ends[first_row],
+            self.speed,
+            acceleration_time=self.acceleration_time,
+            snake_axes=self.snake_axes,
+            step_speed=self.step_speed,
+            max_speed=self.max_speed,
+            row_overhead=self.row_overhead,
+        )
+
+    def row_after(self, step_position: float) -> int:
+        """First row stepped to past step_position, e.g. the row after the last one
+        done of an interrupted grid, which may have been spaced differently."""
+        direction = 1 if self.step_positions[-1] >= self.step_positions[0] else -1
+        past = (direction * (self.step_positions - step_position) > 0) & ~np.isclose(
+            self.step_positions, step_position
+        )
+        if not past.any():
+            raise ValueError(f"No row left after step position: {step_position}.")
+        return int(np.argmax(past))
+
+    def flipped(self, step: bool = False, scan: bool = False) -> "GridTrajectory":
+        """The same grid started from another corner, the step axis taken from end
+        to start if step and the first row scanned from end to start if scan."""
+        step_positions = self.step_positions[::-1] if step else self.step_positions
+        scan_start, scan_end = self.row_starts[0], self.row_ends[0]
+        if scan:
+            scan_start, scan_end = scan_end, scan_start
+        return GridTrajectory(
+            step_positions[0],
+            step_positions[-1],
+            self.num_rows,
+            scan_start,
+            scan_end,
+            self.speed,
+            acceleration_time=self.acceleration_time,
+            snake_axes=self.snake_axes,
+            step_speed=self.step_speed,
+            max_speed=self.max_speed,
+            row_overhead=self.row_overhead,
+        )
+
+    @property
+    def num_rows(self) -> int:
+        return len(self.step_positions)
+
+    def speed_limit(self, scan_limits: tuple[float, float]) -> float:
+        """Highest scan speed whose run-up and run-down stay within scan_limits."""
+        if self.acceleration_time <= 0:
+            return float("inf")
+        low, high = scan_limits
+        ends = np.concatenate((self.row_starts, self.row_ends))
+        margin = min(ends.min() - low, high - ends.max())
+        return max(float(margin), 0.0) * 2 / self.acceleration_time
+
+    def check_limits(
+        self,
+        step_limits: tuple[float, float],
+        scan_limits: tuple[float, float],
+        step_name: str = "step motor",
+        scan_name: str = "scan motor",
+    ) -> None:
+        """Check the whole schedule against the motor limits in one go.
+
+        Requested positions have to be strictly within the limits, as in
+        check_within_limit, the run-up and run-down only have to reach them.
+        """
+        step_low, step_high = step_limits
+        scan_low, scan_high = scan_limits
+        requested = np.concatenate((self.row_starts, self.row_ends))
+        extents = np.concatenate((self.prepared_positions, self.completed_positions))
+        checks = (
+            (
+                step_name,
+                step_limits,
+                self.step_positions,
+                (self.step_positions <= step_low) | (self.step_positions >= step_high),
+            ),
+            (
+                scan_name,
+                scan_limits,
+                requested,
+                (requested <= scan_low) | (requested >= scan_high),
+            ),
+            (
+                scan_name,
+                scan_limits,
+                extents,
+                (extents < scan_low) | (extents > scan_high),
+            ),
+        )
+        for name, (low, high), values, outside in checks:
+            if np.any(outside):
+                raise ValueError(
+                    f"{name} move request of {values[np.argmax(outside)]} is beyond"
+                    f" limits:{low} < {high}"
+                )
+
+    def to_md(self) -> dict:
+        """Plain python version of the schedule for the start document."""
+        return {
+            "num_rows": self.num_rows,
+            "speed": self.speed,
+            "acceleration_time": self.acceleration_time,
+            "row_overhead": self.row_overhead,
+            "run_up_distance": self.run_up_distance,
+            "step_positions": self.step_positions.tolist(),
+            "directions": self.directions.tolist(),
+            "row_starts": self.row_starts.tolist(),
+            "row_ends": self.row_ends.tolist(),
+            "prepared_positions": self.prepared_positions.tolist(),
+            "completed_positions": self.completed_positions.tolist(),
+            "row_durations": self.row_durations.tolist(),
+            "turnaround_durations": self.turnaround_durations.tolist(),
+            "estimated_duration": self.total_duration,
+        }
+
+
+def _fit_plan_time(
+    plan_time: float,
+    scan_range: float,
+    max_speed: float,
+    build: Callable[[float, int], GridTrajectory],
+    num_rows: Callable[[float], int],
+) -> GridTrajectory:
+    """Grid from build(speed, num_step) with the slowest speed that fits in
+    plan_time, num_rows gives the number of rows at a speed. If even max_speed is
+    too slow, rows are dropped until it fits, down to a single row at max_speed."""
+    fastest = build(max_speed, num_rows(max_speed))
+    if fastest.total_duration > plan_time:
+        # Largest number of rows that fits at max_speed, the duration goes up with
+        # every row.
+        low, high = 1, fastest.num_rows
+        while low < high:
+            mid = (low + high + 1) // 2
+            if build(max_speed, mid).total_duration > plan_time:
+                high = mid - 1
+            else:
+                low = mid
+        if build(max_speed, low).total_duration > plan_time:
+            return build(max_speed, low)
+        return _fit_plan_time(plan_time, scan_range, max_speed, build, lambda _: low)
+    # At the lowest speed a single row takes plan_time.
+    low_speed, high_speed = scan_range / plan_time, max_speed
+    for _ in range(50):
+        speed = (low_speed + high_speed) / 2
+        if build(speed, num_rows(speed)).total_duration > plan_time:
+            low_speed = speed
+        else:
+            high_speed = speed
+    return build(high_speed, num_rows(high_speed))
+
+
+class PathTrajectory:
+    """
+    Two axis path flown as straight segments with both motors moving together.
+
+    The path is given as vertices and the time to reach each of them. Every
+    segment between two vertices is one constant velocity move on each axis, with
+    the velocities chosen so both motors get to the next vertex together, so the
+    speed profile of the whole path is worked out up front. Use spiral or lissajous
+    to build the common ones.
+
+    Parameters
+    ----------
+    times: np.ndarray
+        Time at each vertex in second, starting from 0.
+    x: np.ndarray
+        x position of each vertex.
+    y: np.ndarray
+        y position of each vertex.
+    kind: str = "path"
+        What sort of path it is, for the metadata.
+    """
+
+    def __init__(
+        self, times: np.ndarray, x: np.ndarray, y: np.ndarray, kind: str = "path"
+    ) -> None:
+        self.times = np.asarray(times, dtype=float)
+        self.x = np.asarray(x, dtype=float)
+        self.y = np.asarray(y, dtype=float)
+        self.kind = kind
+        if not len(self.times) == len(self.x) == len(self.y) or len(self.times) < 2:
+            raise ValueError("A path needs the same number, at least 2, of each.")
+        self.durations = np.diff(self.times)
+        if np.any(self.durations <= 0):
+            raise ValueError("Path vertex times must be increasing.")
+        self.x_velocities = np.abs(np.diff(self.x)) / self.durations
+        self.y_velocities = np.abs(np.diff(self.y)) / self.durations
+        self.total_duration = float(self.times[-1] - self.times[0])
+
+    @classmethod
+    def spiral(
+        cls,
+        x_centre: float,
+        y_centre: float,
+        radius: float,
+        pitch: float,
+        speed: float,
+        segments_per_turn: int = 16,
+    ) -> "PathTrajectory":
+        """Archimedean spiral out from the centre, pitch apart between turns and
+        flown at a constant speed along the path."""
+        if radius <= 0 or pitch <= 0 or speed <= 0:
+            raise ValueError(
+                f"Spiral radius: {radius}, pitch: {pitch} and speed: {speed}"
+                + " must be positive."
+            )
+        turns = radius / pitch
+        num_segments = max(int(np.ceil(turns * segments_per_turn)), 1)
+        theta = np.linspace(0, 2 * np.pi * turns, num_segments + 1)
+        r = pitch * theta / (2 * np.pi)
+        x = x_centre + r * np.cos(theta)
+        y = y_centre + r * np.sin(theta)
+        lengths = np.hypot(np.diff(x), np.diff(y))
+        times = np.concatenate(([0.0], np.cumsum(lengths / speed)))
+        return cls(times, x, y, kind="spiral")
+
+    @classmethod
+    def lissajous(
+        cls,
+        x_centre: float,
+        y_centre: float,
+        x_amplitude: float,
+        y_amplitude: float,
+        x_frequency: int,
+        y_frequency: int,
+        period: float,
+        num_segments: int = 200,
+    ) -> "PathTrajectory":
+        """One full period of a Lissajous figure, x_frequency and y_frequency are
+        the number of oscillations of each axis in it. x starts from its centre and
+        y from its lowest point, so the figure is closed and starts on its edge."""
+        if period <= 0:
+            raise ValueError(f"Lissajous period: {period} <= 0")
+        times = np.linspace(0, period, num_segments + 1)
+        phase = 2 * np.pi * times / period
+        x = x_centre + x_amplitude * np.sin(x_frequency * phase)
+        y = y_centre + y_amplitude * np.sin(y_frequency * phase - np.pi / 2)
+        return cls(times, x, y, kind="lissajous")
+
+    @property
+    def num_segments(self) -> int:
+        return len(self.durations)
+
+    def prepared_positions(
+        self, x_acceleration_time: float = 0.0, y_acceleration_time: float = 0.0
+    ) -> tuple[float, float]:
+        """Where each motor starts from, one run-up before the first vertex, so it
+        is up to the speed of the first segment when it gets there."""
+        duration = self.durations[0]
+        x_run_up = x_acceleration_time * 0.5 * (self.x[1] - self.x[0]) / duration
+        y_run_up = y_acceleration_time * 0.5 * (self.y[1] - self.y[0]) / duration
+        return float(self.x[0] - x_run_up), float(self.y[0] - y_run_up)
+
+    def completed_positions(
+        self, x_acceleration_time: float = 0.0, y_acceleration_time: float = 0.0
+    ) -> tuple[float, float]:
+        """Where each motor stops, one run-down past the last vertex at the speed
+        of the last segment."""
+        duration = self.durations[-1]
+        x_run_down = x_acceleration_time * 0.5 * (self.x[-1] - self.x[-2]) / duration
+        y_run_down = y_acceleration_time * 0.5 * (self.y[-1] - self.y[-2]) / duration
+        return float(self.x[-1] + x_run_down), float(self.y[-1] + y_run_down)
+
+    def check_limits(
+        self,
+        x_limits: tuple[float, float],
+        y_limits: tuple[float, float],
+        x_max_speed: float | None = None,
+        y_max_speed: float | None = None,
+        x_name: str = "x motor",
+        y_name: str = "y motor",
+        x_acceleration_time: float = 0.0,
+        y_acceleration_time: float = 0.0,
+    ) -> None:
+        """Check every vertex against the motor limits, strictly within them as in
+        check_within_limit, and every segment against the motor maximum speed.
+        The run-up before the first vertex and the run-down after the last one
+        only have to reach the limits, as in GridTrajectory.check_limits."""
+        extents = np.array(
+            (
+                self.prepared_positions(x_acceleration_time, y_acceleration_time),
+                self.completed_positions(x_acceleration_time, y_acceleration_time),
+            )
+        )
+        for name, (low, high), values, ends in (
+            (x_name, x_limits, self.x, extents[:, 0]),
+            (y_name, y_limits, self.y, extents[:, 1]),
+        ):
+            for requested, outside in (
+                (values, (values <= low) | (values >= high)),
+                (ends, (ends < low) | (ends > high)),
+            ):
+                if np.any(outside):
+                    raise ValueError(
+                        f"{name} move request of {requested[np.argmax(outside)]} is"
+                        f" beyond limits:{low} < {high}"
+                    )
+        for name, max_speed, velocities in (
+            (x_name, x_max_speed, self.x_velocities),
+            (y_name, y_max_speed, self.y_velocities),
+        ):
+            if max_speed and np.any(velocities > max_speed):
+                raise ValueError(
+                    f"{name} speed of {velocities.max()} needed by the path is above"
+                    f" its maximum: {max_speed}"
+                )
+
+    def to_md(self) -> dict:
+        """Plain python version of the path for the start document."""
+        return {
+            "kind": self.kind,
+            "num_segments": self.num_segments,
+            "times": self.times.tolist(),
+            "x": self.x.tolist(),
+            "y": self.y.tolist(),
+            "estimated_duration": self.total_duration,
+        }
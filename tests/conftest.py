@@ -3,9 +3,9 @@ import subprocess
 import sys
 import time
 from collections.abc import Callable
+from itertools import count
 from pathlib import Path
 from typing import Any
-from unittest.mock import Mock
 
 import pytest
 from bluesky.run_engine import RunEngine
@@ -157,6 +157,19 @@ def static_path_provider(
 
 
 # area detector that is use for testing
+def _capture_frame(det: Andor2Ad | Andor3Ad) -> Callable[..., None]:
+    """Acquire put callback writing one frame every time det is armed, however long
+    anything takes."""
+
+    frames = count(1)
+
+    def capture_frame(value: bool, **_) -> None:
+        if value:
+            set_mock_value(det.hdf.num_captured, next(frames))
+
+    return capture_frame
+
+
 @pytest.fixture
 async def andor2(static_path_provider: StaticPathProvider) -> Andor2Ad:
     async with DeviceCollector(mock=True):
@@ -172,17 +185,11 @@ async def andor2(static_path_provider: StaticPathProvider) -> Andor2Ad:
         str(static_path_provider._directory_path) + "/test-andor2-hdf0",
     )
 
-    rbv_mocks = Mock()
-    rbv_mocks.get.side_effect = range(0, 10000)
     callback_on_mock_put(
         andor2._writer.hdf.capture,
         lambda *_, **__: set_mock_value(andor2._writer.hdf.capture, value=True),
     )
-
-    callback_on_mock_put(
-        andor2.drv.acquire,
-        lambda *_, **__: set_mock_value(andor2._writer.hdf.num_captured, rbv_mocks.get()),
-    )
+    callback_on_mock_put(andor2.drv.acquire, _capture_frame(andor2))
 
     return andor2
 
@@ -202,17 +209,11 @@ async def andor3(static_path_provider: StaticPathProvider) -> Andor3Ad:
         str(static_path_provider._directory_path) + "/test-andor3-hdf0",
     )
 
-    rbv_mocks = Mock()
-    rbv_mocks.get.side_effect = range(0, 10000)
     callback_on_mock_put(
         andor3._writer.hdf.capture,
         lambda *_, **__: set_mock_value(andor3._writer.hdf.capture, value=True),
     )
-
-    callback_on_mock_put(
-        andor3.drv.acquire,
-        lambda *_, **__: set_mock_value(andor3._writer.hdf.num_captured, rbv_mocks.get()),
-    )
+    callback_on_mock_put(andor3.drv.acquire, _capture_frame(andor3))
 
     return andor3
 
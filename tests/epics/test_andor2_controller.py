@@ -5,14 +5,15 @@ from ophyd_async.core import (
     DetectorTrigger,
     DeviceCollector,
     TriggerInfo,
+    soft_signal_rw,
 )
-from ophyd_async.epics.adcore import ImageMode
-from ophyd_async.testing import set_mock_value
+from ophyd_async.testing import get_mock_put, set_mock_value
 
 from p99_bluesky.devices.epics.andor2_controller import Andor2Controller
 from p99_bluesky.devices.epics.drivers.andor2_driver import (
     Andor2DriverIO,
     Andor2TriggerMode,
+    ImageMode,
 )
 
 
@@ -20,7 +21,8 @@ from p99_bluesky.devices.epics.drivers.andor2_driver import (
 async def Andor(RE) -> Andor2Controller:
     async with DeviceCollector(mock=True):
         drv = Andor2DriverIO("DRIVER:")
-        controller = Andor2Controller(drv)
+        software_trigger = soft_signal_rw(bool, False)
+        controller = Andor2Controller(drv, software_trigger=software_trigger)
 
     return controller
 
@@ -40,7 +42,8 @@ async def test_Andor_controller(RE, Andor: Andor2Controller):
     assert await driver.trigger_mode.get_value() == Andor2TriggerMode.INTERNAL
     assert await driver.acquire.get_value() is True
     assert await driver.acquire_time.get_value() == 0.002
-    assert Andor.get_deadtime(2) == 2 + 0.1
+    # no frame size or ADC speed in the mock, so the default readout
+    assert Andor.get_deadtime(2) == 0.1
     assert Andor.get_deadtime(None) == 0.1
 
     with patch("ophyd_async.core.wait_for_value", return_value=None):
@@ -54,3 +57,77 @@ async def test_Andor_controller(RE, Andor: Andor2Controller):
         Andor._get_trigger_mode(DetectorTrigger.EDGE_TRIGGER)
 
     assert await driver.acquire.get_value() is False
+
+
+async def test_Andor_controller_fast_kinetics(RE, Andor: Andor2Controller):
+    driver = Andor._drv
+    set_mock_value(driver.max_size_y, 512)
+    set_mock_value(driver.size_y, 512)
+    Andor.use_fast_kinetics(32)
+    assert Andor.get_deadtime(0.001) == pytest.approx(32 * 3.3e-6)
+    assert Andor.fast_kinetics_duration(0.001, 10) == pytest.approx(
+        10 * (0.001 + 32 * 3.3e-6) + 0.1
+    )
+    await Andor.prepare(trigger_info=TriggerInfo(number_of_triggers=16, livetime=1e-4))
+    assert await driver.image_mode.get_value() == ImageMode.FAST_KINETICS
+    assert await driver.num_images.get_value() == 16
+    assert await driver.size_y.get_value() == 32
+    # the series has to fit in the sensor
+    with pytest.raises(ValueError):
+        await Andor.prepare(trigger_info=TriggerInfo(number_of_triggers=17))
+    with pytest.raises(ValueError):
+        await Andor.prepare(
+            trigger_info=TriggerInfo(
+                number_of_triggers=4, trigger=DetectorTrigger.VARIABLE_GATE
+            )
+        )
+    # back to the full frame in the normal mode
+    Andor.use_fast_kinetics(None)
+    await Andor.prepare(trigger_info=TriggerInfo(number_of_triggers=1))
+    assert await driver.image_mode.get_value() == ImageMode.MULTIPLE
+    assert await driver.size_y.get_value() == 512
+    assert Andor.get_deadtime(2) == 0.1
+    with pytest.raises(ValueError):
+        Andor.use_fast_kinetics(0)
+
+
+async def test_Andor_controller_deadtime_from_settings(RE, Andor: Andor2Controller):
+    driver = Andor._drv
+    set_mock_value(driver.size_x, 512)
+    set_mock_value(driver.size_y, 512)
+    set_mock_value(driver.bin_x, 1)
+    set_mock_value(driver.bin_y, 1)
+    set_mock_value(driver.adc_speed, "10.00 MHz")
+    readout = 512 * 3.3e-6 + 512 * 512 / 10e6
+    assert await Andor.update_deadtime() == pytest.approx(readout)
+    assert Andor.get_deadtime(0.5) == pytest.approx(readout)
+    # binning reads fewer pixels out, every row is still shifted
+    set_mock_value(driver.bin_x, 4)
+    set_mock_value(driver.bin_y, 4)
+    set_mock_value(driver.adc_speed, "100 kHz")
+    await Andor.prepare(trigger_info=TriggerInfo(number_of_triggers=1, livetime=0.1))
+    assert Andor.get_deadtime(0.1) == pytest.approx(512 * 3.3e-6 + 128 * 128 / 1e5)
+    set_mock_value(driver.adc_speed, "")
+    assert await Andor.update_deadtime() == 0.1
+
+
+async def test_Andor_controller_software_trigger(RE, Andor: Andor2Controller):
+    driver = Andor._drv
+    await Andor._software_trigger.set(True)
+    await Andor.prepare(trigger_info=TriggerInfo(number_of_triggers=1, livetime=0.1))
+    assert await driver.trigger_mode.get_value() == Andor2TriggerMode.SOFT
+    assert await driver.image_mode.get_value() == ImageMode.CONTINUOUS
+    with patch("ophyd_async.core.wait_for_value", return_value=None):
+        for _ in range(3):
+            await Andor.arm()
+            await Andor.wait_for_idle()
+    # armed once, a software trigger for every frame
+    assert (
+        get_mock_put(driver.acquire).call_args_list.count(((True,), {"wait": True})) == 1
+    )
+    assert get_mock_put(driver.software_trigger).call_count == 3
+    # a series of frames is internally timed, the acquisition stopped first
+    await Andor.prepare(trigger_info=TriggerInfo(number_of_triggers=5, livetime=0.1))
+    assert await driver.acquire.get_value() is False
+    assert await driver.trigger_mode.get_value() == Andor2TriggerMode.INTERNAL
+    assert await driver.image_mode.get_value() == ImageMode.MULTIPLE
@@ -6,10 +6,12 @@ from ophyd_async.core import (
     DeviceCollector,
     TriggerInfo,
 )
+from ophyd_async.testing import set_mock_value
 
 from p99_bluesky.devices.epics.andor3_controller import Andor3Controller
 from p99_bluesky.devices.epics.drivers.andor3_driver import (
     Andor3DriverIO,
+    Andor3ShutterMode,
     Andor3TriggerMode,
     ImageMode,
 )
@@ -38,8 +40,11 @@ async def test_Andor3_controller(RE, Andor: Andor3Controller):
     assert await driver.trigger_mode.get_value() == Andor3TriggerMode.INTERNAL
     assert await driver.acquire.get_value() is True
     assert await driver.acquire_time.get_value() == 0.002
-    assert Andor.get_deadtime(2) == 2 + 0.1
+    assert Andor.readout_time == 0.1
     assert Andor.get_deadtime(None) == 0.1
+    set_mock_value(driver.readout_time, 0.0123)
+    assert await Andor.update_deadtime() == 0.0123
+    assert Andor.readout_time == 0.0123
 
     with patch("ophyd_async.core.wait_for_value", return_value=None):
         await Andor.disarm()
@@ -47,3 +52,48 @@ async def test_Andor3_controller(RE, Andor: Andor3Controller):
         Andor._get_trigger_mode(DetectorTrigger.EDGE_TRIGGER)
 
     assert await driver.acquire.get_value() is False
+
+
+async def test_Andor3_controller_overlap(RE, Andor: Andor3Controller):
+    driver = Andor._drv
+    set_mock_value(driver.readout_time, 0.01)
+    await Andor.update_deadtime()
+    assert Andor.get_deadtime(0.004) == pytest.approx(0.006)
+    assert Andor.get_deadtime(0.05) == 0
+    # back to back frames, the readout hidden behind the next exposure
+    await Andor.prepare(
+        trigger_info=TriggerInfo(number_of_triggers=100, livetime=0.05, deadtime=0)
+    )
+    assert await driver.overlap.get_value() is True
+    assert await driver.acquire_period.get_value() == pytest.approx(0.05)
+    # frames further apart than the readout
+    await Andor.prepare(
+        trigger_info=TriggerInfo(number_of_triggers=100, livetime=0.05, deadtime=0.01)
+    )
+    assert await driver.overlap.get_value() is False
+    assert await driver.acquire_period.get_value() == pytest.approx(0.06)
+    # a single frame
+    await Andor.prepare(
+        trigger_info=TriggerInfo(number_of_triggers=1, livetime=0.004, deadtime=0)
+    )
+    assert await driver.overlap.get_value() is False
+
+
+async def test_Andor3_controller_global_shutter_overlap(RE, Andor: Andor3Controller):
+    driver = Andor._drv
+    set_mock_value(driver.readout_time, 0.01)
+    set_mock_value(driver.shutter_mode, Andor3ShutterMode.GLOBAL)
+    await Andor.update_deadtime()
+    # every row exposed at once, only exposures as long as the readout overlap it
+    assert Andor.get_deadtime(0.004) == pytest.approx(0.01)
+    assert Andor.get_deadtime(0.05) == 0
+    await Andor.prepare(
+        trigger_info=TriggerInfo(number_of_triggers=100, livetime=0.05, deadtime=0)
+    )
+    assert await driver.overlap.get_value() is True
+    assert await driver.acquire_period.get_value() == pytest.approx(0.05)
+    await Andor.prepare(
+        trigger_info=TriggerInfo(number_of_triggers=100, livetime=0.004, deadtime=0.01)
+    )
+    assert await driver.overlap.get_value() is False
+    assert await driver.acquire_period.get_value() == pytest.approx(0.014)
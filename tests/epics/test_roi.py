@@ -0,0 +1,58 @@
+import pytest
+from ophyd_async.core import DeviceCollector, TriggerInfo
+from ophyd_async.testing import set_mock_value
+
+from p99_bluesky.devices.epics.andor3_controller import Andor3Controller
+from p99_bluesky.devices.epics.drivers.andor3_driver import Andor3DriverIO
+from p99_bluesky.devices.epics.roi import DetectorROI, ROIDatasetDescriber
+
+
+@pytest.fixture
+async def Andor(RE) -> Andor3Controller:
+    async with DeviceCollector(mock=True):
+        drv = Andor3DriverIO("DRIVER:")
+        controller = Andor3Controller(drv)
+    set_mock_value(drv.max_size_x, 2560)
+    set_mock_value(drv.max_size_y, 2160)
+    return controller
+
+
+def test_roi_shape():
+    roi = DetectorROI(min_x=100, min_y=200, size_x=64, size_y=32, bin_x=4, bin_y=2)
+    assert roi.sizes(2560, 2160) == (64, 32)
+    assert roi.shape(2560, 2160) == (16, 16)
+    # to the edge of the sensor
+    assert DetectorROI(min_x=2500, bin_x=2).shape(2560, 2160) == (2160, 30)
+    with pytest.raises(ValueError):
+        roi.sizes(128, 128)
+    with pytest.raises(ValueError):
+        DetectorROI(size_x=2, bin_x=4).sizes(2560, 2160)
+    with pytest.raises(ValueError):
+        DetectorROI(min_x=-1)
+    with pytest.raises(ValueError):
+        DetectorROI(size_y=0)
+    with pytest.raises(ValueError):
+        DetectorROI(bin_y=0)
+
+
+async def test_roi_applied_in_prepare(Andor: Andor3Controller):
+    driver = Andor._drv
+    describer = ROIDatasetDescriber(driver)
+    set_mock_value(driver.array_size_x, 10)
+    set_mock_value(driver.array_size_y, 20)
+    # nothing set on the sensor, the last array size
+    assert await describer.shape() == (20, 10)
+    Andor.use_roi(
+        DetectorROI(min_x=8, min_y=16, size_x=256, size_y=128, bin_x=2, bin_y=4)
+    )
+    await Andor.prepare(trigger_info=TriggerInfo(number_of_triggers=1))
+    assert await driver.min_x.get_value() == 8
+    assert await driver.min_y.get_value() == 16
+    assert await driver.size_x.get_value() == 256
+    assert await driver.size_y.get_value() == 128
+    assert await driver.bin_x.get_value() == 2
+    assert await driver.bin_y.get_value() == 4
+    assert await describer.shape() == (32, 128)
+    Andor.use_roi(DetectorROI(min_x=2500, size_x=100))
+    with pytest.raises(ValueError):
+        await Andor.prepare(trigger_info=TriggerInfo(number_of_triggers=1))
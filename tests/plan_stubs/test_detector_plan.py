@@ -0,0 +1,42 @@
+import pytest
+from bluesky.run_engine import RunEngine
+from ophyd_async.core import TriggerInfo
+from ophyd_async.testing import set_mock_value
+
+from p99_bluesky.devices.andorAd import Andor2Ad, Andor3Ad
+from p99_bluesky.devices.epics.roi import DetectorROI
+from p99_bluesky.plan_stubs.detector_plan import get_deadtime, set_roi
+
+
+def test_get_deadtime_reads_the_settings(RE: RunEngine, andor2: Andor2Ad):
+    set_mock_value(andor2.drv.size_x, 100)
+    set_mock_value(andor2.drv.size_y, 100)
+    set_mock_value(andor2.drv.adc_speed, "1.00 MHz")
+    deadtime = RE(get_deadtime(andor2, 0.5)).plan_result
+    assert deadtime == andor2.controller.get_deadtime(0.5)
+    assert deadtime == 100 * 3.3e-6 + 100 * 100 / 1e6
+
+
+async def test_get_deadtime_andor3(RE: RunEngine, andor3: Andor3Ad):
+    set_mock_value(andor3.drv.readout_time, 0.02)
+    assert RE(get_deadtime(andor3, 0.5)).plan_result == 0.02
+    deadtime = RE(get_deadtime(andor3, 0.005, overlap=True)).plan_result
+    assert deadtime == 0.015
+    # the detector takes the overlap deadtime, and is put in overlap mode
+    await andor3.prepare(
+        TriggerInfo(number_of_triggers=10, livetime=0.005, deadtime=deadtime)
+    )
+    assert await andor3.drv.overlap.get_value() is True
+
+
+async def test_set_roi(RE: RunEngine, andor2: Andor2Ad):
+    set_mock_value(andor2.drv.max_size_x, 512)
+    set_mock_value(andor2.drv.max_size_y, 512)
+    RE(set_roi(andor2, DetectorROI(min_y=256, size_x=128, bin_x=2, bin_y=2)))
+    configuration = await andor2.read_configuration()
+    assert configuration["andor2-drv-min_y"]["value"] == 256
+    assert configuration["andor2-drv-size_x"]["value"] == 128
+    assert configuration["andor2-drv-size_y"]["value"] == 256
+    assert configuration["andor2-drv-bin_y"]["value"] == 2
+    with pytest.raises(ValueError):
+        RE(set_roi(andor2, DetectorROI(min_x=500, size_x=64)))
@@ -2,9 +2,13 @@ import pytest
 from bluesky.run_engine import RunEngine
 from ophyd_async.core import DeviceCollector
 from ophyd_async.epics.motor import Motor
-from ophyd_async.testing import set_mock_value
+from ophyd_async.testing import get_mock_put, set_mock_value
 
-from p99_bluesky.plan_stubs.motor_plan import check_within_limit
+from p99_bluesky.plan_stubs.motor_plan import (
+    chain_move,
+    check_within_limit,
+    get_grid_trajectory,
+)
 
 
 @pytest.fixture
@@ -25,3 +29,35 @@ def test_check_within_limit(mock_motor: Motor, RE: RunEngine):
         RE(check_within_limit([21], mock_motor))
 
     RE(check_within_limit([18], mock_motor))
+
+
+def test_chain_move(mock_motor: Motor, RE: RunEngine):
+    RE(chain_move(mock_motor, 3.0, 1.5))
+    get_mock_put(mock_motor.velocity).assert_called_once_with(1.5, wait=True)
+    # put without a callback, so the setpoint goes out while the motor is moving
+    get_mock_put(mock_motor.user_setpoint).assert_called_once_with(3.0, wait=False)
+
+
+def test_get_grid_trajectory(mock_motor: Motor, RE: RunEngine):
+    set_mock_value(mock_motor.low_limit_travel, -10)
+    set_mock_value(mock_motor.high_limit_travel, 20)
+    set_mock_value(mock_motor.velocity, 2)
+    set_mock_value(mock_motor.max_velocity, 4)
+    set_mock_value(mock_motor.acceleration_time, 0.5)
+
+    trajectory = RE(
+        get_grid_trajectory(mock_motor, 0, 2, 3, mock_motor, -5, 5, snake_axes=True)
+    ).plan_result
+    assert trajectory.directions.tolist() == [1, -1, 1]
+    assert trajectory.run_up_distance == 0.5
+    assert trajectory.prepared_positions.tolist() == [-5.5, 5.5, -5.5]
+    assert trajectory.completed_positions.tolist() == [5.5, -5.5, 5.5]
+    # 10 at 2 plus accelerate and decelerate
+    assert trajectory.row_durations.tolist() == [6, 6, 6]
+    # snake rows only wait for the step move
+    assert trajectory.turnaround_durations.tolist() == [0, 0.5, 0.5]
+    assert trajectory.total_duration == 19
+
+    # requested positions are fine but the run-up is beyond the limit
+    with pytest.raises(ValueError):
+        RE(get_grid_trajectory(mock_motor, 0, 2, 3, mock_motor, -9.9, 5))
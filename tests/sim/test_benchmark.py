@@ -0,0 +1,41 @@
+import json
+from pathlib import Path
+
+from bluesky.run_engine import RunEngine
+
+from p99_bluesky.sim.benchmark import PlanBenchmark, run_benchmarks
+
+
+def test_plan_benchmark_counts_primary_points():
+    benchmark = PlanBenchmark("test")
+    benchmark("start", {"uid": "s", "shape": [3, 4]})
+    benchmark("descriptor", {"uid": "p", "name": "primary"})
+    benchmark("descriptor", {"uid": "b", "name": "baseline"})
+    benchmark("event", {"descriptor": "p"})
+    benchmark("event", {"descriptor": "b"})
+    benchmark("event_page", {"descriptor": "p", "seq_num": [2, 3]})
+    result = benchmark.result(2.0)
+    assert result["points"] == 3
+    assert result["rows"] == 3
+    assert result["documents"] == {
+        "start": 1,
+        "descriptor": 2,
+        "event": 2,
+        "event_page": 1,
+    }
+    assert result["points_per_second"] == 1.5
+    assert result["documents_per_second"] == 3.0
+    assert result["time_per_row"] == 2.0 / 3
+
+
+def test_run_benchmarks(RE: RunEngine, tmp_path: Path):
+    output = tmp_path / "benchmark.json"
+    results = run_benchmarks(RE, tmp_path, output)
+    assert json.loads(output.read_text()) == results
+    plans = results["plans"]
+    assert set(plans) == {"fast_scan_1d", "fast_scan_grid", "stxm_fast", "stxm_step"}
+    assert plans["fast_scan_grid"]["rows"] == 3
+    assert plans["stxm_step"]["points"] == 25
+    for result in plans.values():
+        assert result["points"] > 0
+        assert result["points_per_second"] > 0
@@ -0,0 +1,155 @@
+import asyncio
+from collections.abc import Coroutine
+from pathlib import Path
+from typing import Any
+
+import bluesky.plan_stubs as bps
+import bluesky.preprocessors as bpp
+import pytest
+from bluesky.run_engine import RunEngine
+from ophyd.sim import SynSignal
+
+from p99_bluesky.devices.andorAd import Andor2Ad, Andor3Ad
+from p99_bluesky.plans.ad_plans import takeImg
+from p99_bluesky.plans.fast_scan import fast_scan_1d, fast_scan_grid
+from p99_bluesky.plans.stxm import stxm_fast, stxm_step
+from p99_bluesky.sim.benchmark import sim_andor
+from p99_bluesky.sim.estimator import PlanSimulator, estimate_duration
+from p99_bluesky.sim.sim_stages import SimThreeAxisStage
+
+
+def in_loop(RE: RunEngine, coro: Coroutine) -> Any:
+    return asyncio.run_coroutine_threadsafe(coro, RE.loop).result()
+
+
+def sim_stage(RE: RunEngine, name: str, instant: bool) -> SimThreeAxisStage:
+    stage = SimThreeAxisStage(name=name, instant=instant)
+    in_loop(RE, stage.connect())
+    return stage
+
+
+def test_estimate_take_img(RE: RunEngine, tmp_path: Path):
+    det = in_loop(RE, sim_andor(Andor2Ad, "andor2", tmp_path))
+    estimate = estimate_duration(RE, takeImg(det, 0.5, 3), message_time=0.001)
+    # 3 frames of 0.5 s livetime and 0.1 s deadtime, some messages in the meantime
+    assert estimate.phases["exposure"] == pytest.approx(1800, abs=estimate.messages)
+    assert estimate.duration == pytest.approx(
+        estimate.phases["exposure"] + estimate.phases["overhead"]
+    )
+    assert 1800 < estimate.duration < 1800 + estimate.messages
+    # nothing was acquired
+    assert in_loop(RE, det.hdf.num_captured.get_value()) == 0
+
+
+def test_estimate_fast_scan_grid(RE: RunEngine):
+    stage = sim_stage(RE, "estimate_fly", instant=False)
+
+    async def accelerate():
+        await stage.y.acceleration_time.set(0.2)
+
+    in_loop(RE, accelerate())
+    det = SynSignal(func=lambda: 1.0, name="det")
+    estimate = estimate_duration(
+        RE,
+        fast_scan_grid([det], stage.x, 0, 1, 3, stage.y, 1, 3, snake_axes=True),
+        message_time=0.01,
+    )
+    # 3 rows of 2 at 1 with the acceleration and deceleration of 0.2 s
+    assert estimate.phases["fly"] == pytest.approx(3 * 2.4e3)
+    assert estimate.phases["move"] > 0
+    assert estimate.to_md()["duration"] == estimate.duration
+    # nothing moved
+    assert in_loop(RE, stage.x.user_readback.get_value()) == 0
+    assert in_loop(RE, stage.y.user_readback.get_value()) == 0
+    assert in_loop(RE, stage.y.velocity.get_value()) == 1
+
+
+def test_estimate_stxm_step(RE: RunEngine, tmp_path: Path):
+    det = in_loop(RE, sim_andor(Andor3Ad, "andor3", tmp_path))
+    stage = sim_stage(RE, "estimate_step", instant=True)
+    estimate = estimate_duration(
+        RE,
+        stxm_step(det, 0.1, stage.x, 0, 1, 0.25, stage.y, 0, 1, 0.25),
+        message_time=0.001,
+    )
+    # 25 points of 0.1 s livetime and 0.1 s deadtime
+    assert estimate.phases["exposure"] == pytest.approx(5000, abs=estimate.messages)
+    assert estimate.phases["move"] == 0
+    assert in_loop(RE, det.drv.acquire_time.get_value()) == 0
+
+
+def test_estimate_long_software_fly(RE: RunEngine):
+    stage = sim_stage(RE, "estimate_long_fly", instant=False)
+    det = SynSignal(func=lambda: 1.0, name="det")
+    sent = []
+    estimate = estimate_duration(
+        RE,
+        bpp.msg_mutator(
+            fast_scan_1d([det], stage.x, 0, 5, 0.01), lambda msg: sent.append(msg) or msg
+        ),
+        message_time=0.001,
+    )
+    # 500 s of points, gone through a few loops at a time rather than point by point
+    assert estimate.phases["fly"] == pytest.approx(500e3, rel=1e-3)
+    assert len(sent) < 100 < estimate.messages
+
+
+@pytest.mark.parametrize("plan_time", [10, 60, 600])
+def test_estimate_stxm_fast(RE: RunEngine, tmp_path: Path, plan_time: float):
+    det = in_loop(RE, sim_andor(Andor3Ad, "andor3", tmp_path))
+    stage = sim_stage(RE, f"estimate_stxm_{plan_time}", instant=False)
+    estimate = estimate_duration(
+        RE,
+        stxm_fast(det, 0.1, stage.x, 0, 1, stage.y, 0, 2, plan_time),
+        message_time=0.001,
+    )
+    # the grid is solved to take plan_time and corrected as the rows are timed
+    assert estimate.duration == pytest.approx(plan_time * 1e3, rel=0.01)
+    assert estimate.phases["fly"] > 0.8 * estimate.duration
+    assert in_loop(RE, stage.y.user_readback.get_value()) == 0
+
+
+def test_estimate_reads_what_is_set(RE: RunEngine):
+    stage = sim_stage(RE, "estimate_set", instant=False)
+    simulator = PlanSimulator(RE, message_time=0.001)
+
+    def plan():
+        before = yield from bps.rd(stage.x.velocity)
+        yield from bps.mv(stage.x.velocity, 2 * before)
+        after = yield from bps.rd(stage.x.velocity)
+        # a put to the setpoint moves the motor at the new velocity
+        yield from bps.abs_set(stage.x.user_setpoint, 4, wait=True)
+        position = yield from bps.rd(stage.x)
+        assert (before, after, position) == (1, 2, 4)
+
+    estimate = simulator.run(plan())
+    assert estimate.phases["move"] == pytest.approx(2e3, abs=estimate.messages)
+    assert in_loop(RE, stage.x.velocity.get_value()) == 1
+
+
+def test_estimate_status_callback_once_done(RE: RunEngine):
+    stage = sim_stage(RE, "estimate_callback", instant=False)
+    simulator = PlanSimulator(RE, message_time=0.001)
+    done_at = []
+
+    def plan():
+        status = yield from bps.abs_set(stage.x, 2)
+        status.add_callback(lambda _: done_at.append(simulator.now))
+        yield from bps.sleep(1)
+        assert not done_at
+        yield from bps.sleep(2)
+        assert done_at == [pytest.approx(3, abs=0.01)]
+
+    simulator.run(plan())
+    assert len(done_at) == 1
+
+
+def test_estimate_move_beyond_limit(RE: RunEngine):
+    stage = sim_stage(RE, "estimate_limit", instant=True)
+    with pytest.raises(ValueError):
+        estimate_duration(RE, bps.mv(stage.x, 20))
+
+
+def test_estimate_needs_message_time(RE: RunEngine):
+    with pytest.raises(ValueError):
+        PlanSimulator(RE, message_time=0)
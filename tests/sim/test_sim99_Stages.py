@@ -37,3 +37,17 @@ async def test_Motor_stop(sim_motor_step: SimThreeAxisStage):
         await asyncio.sleep(0.001)
         await sim_motor_step.x.stop(success=False)
         await move_status
+
+
+async def test_Motor_setpoint_put_moves(sim_motor_step: SimThreeAxisStage):
+    motor = sim_motor_step.x
+    assert motor.user_setpoint.name == "sim_motor-x-user_setpoint"
+    await motor.velocity.set(10)
+    # sent on without waiting, as chain_move does
+    await motor.user_setpoint.set(0.5, wait=False)
+    assert await motor.user_setpoint.get_value() == 0.5
+    assert await motor.user_readback.get_value() < 0.5
+    # a new setpoint takes over from wherever the motor got to
+    await motor.user_setpoint.set(-0.2)
+    assert await motor.user_readback.get_value() == pytest.approx(-0.2)
+    assert await motor.user_setpoint.get_value() == pytest.approx(-0.2)
@@ -1,14 +1,17 @@
 from collections import defaultdict
 
+import pytest
 from bluesky.plans import scan
 from bluesky.run_engine import RunEngine
+from bluesky.utils import FailedStatus
 from ophyd_async.core import (
     StaticPathProvider,
 )
 from ophyd_async.epics.adcore._core_io import DetectorState
-from ophyd_async.testing import assert_emitted, set_mock_value
+from ophyd_async.testing import assert_emitted, get_mock_put, set_mock_value
 
 from p99_bluesky.devices.andorAd import Andor2Ad, Andor3Ad
+from p99_bluesky.devices.epics.drivers.andor2_driver import ImageMode
 from p99_bluesky.devices.stages import ThreeAxisStage
 from p99_bluesky.plans.ad_plans import takeImg, tiggerImg
 
@@ -119,3 +122,47 @@ async def test_Andor3_scan(
     assert_emitted(
         docs, start=1, descriptor=1, stream_resource=1, stream_datum=10, event=10, stop=1
     )
+
+
+async def test_Andor2_takeImg_fast_kinetics(RE: RunEngine, andor2: Andor2Ad):
+    docs = defaultdict(list)
+
+    def capture_emitted(name, doc):
+        docs[name].append(doc)
+
+    set_mock_value(andor2.drv.detector_state, DetectorState.IDLE)
+    set_mock_value(andor2.drv.max_size_y, 512)
+    set_mock_value(andor2.drv.size_y, 512)
+    set_mock_value(andor2.drv.image_mode, ImageMode.CONTINUOUS)
+    RE(takeImg(andor2, 1e-4, 8, fast_kinetics_height=64), capture_emitted)
+    fast_kinetics = docs["start"][0]["fast_kinetics"]
+    assert fast_kinetics["window_height"] == 64
+    assert fast_kinetics["series_length"] == 8
+    assert fast_kinetics["duration"] == pytest.approx(8 * (1e-4 + 64 * 3.3e-6) + 0.1)
+    get_mock_put(andor2.drv.image_mode).assert_any_call(
+        ImageMode.FAST_KINETICS, wait=True
+    )
+    get_mock_put(andor2.drv.size_y).assert_any_call(64, wait=True)
+    # the detector is back in its normal mode, with the settings it had before
+    assert andor2.controller.fast_kinetics_height is None
+    assert await andor2.drv.image_mode.get_value() == ImageMode.CONTINUOUS
+    assert await andor2.drv.size_y.get_value() == 512
+
+
+async def test_Andor2_takeImg_fast_kinetics_restored_on_error(
+    RE: RunEngine, andor2: Andor2Ad
+):
+    set_mock_value(andor2.drv.size_y, 512)
+    set_mock_value(andor2.drv.image_mode, ImageMode.CONTINUOUS)
+    # the series does not fit in the sensor
+    set_mock_value(andor2.drv.max_size_y, 256)
+    with pytest.raises(FailedStatus):
+        RE(takeImg(andor2, 1e-4, 8, fast_kinetics_height=64))
+    assert andor2.controller.fast_kinetics_height is None
+    assert await andor2.drv.image_mode.get_value() == ImageMode.CONTINUOUS
+    assert await andor2.drv.size_y.get_value() == 512
+
+
+async def test_Andor3_takeImg_no_fast_kinetics(RE: RunEngine, andor3: Andor3Ad):
+    with pytest.raises(ValueError):
+        RE(takeImg(andor3, 1e-4, 8, fast_kinetics_height=64))
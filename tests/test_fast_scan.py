@@ -1,17 +1,44 @@
+import asyncio
 from collections import defaultdict
 from unittest import mock
 
+import numpy as np
 import pytest
 from bluesky.run_engine import RunEngine
+from bluesky.utils import FailedStatus
 from numpy import linspace
-from ophyd.sim import SynPeriodicSignal
+from ophyd.sim import SynPeriodicSignal, SynSignal
+from ophyd_async.core import (
+    DEFAULT_TIMEOUT,
+    DetectorTrigger,
+    DeviceCollector,
+    StandardReadable,
+    TriggerInfo,
+    soft_signal_r_and_setter,
+)
+from ophyd_async.epics.adcore import DetectorState
 from ophyd_async.testing import (
     assert_emitted,
+    callback_on_mock_put,
     get_mock_put,
+    set_mock_value,
 )
 
+from p99_bluesky.devices.andorAd import Andor2Ad, Andor3Ad
 from p99_bluesky.devices.stages import ThreeAxisStage
-from p99_bluesky.plans.fast_scan import fast_scan_1d, fast_scan_grid
+from p99_bluesky.plans.fast_scan import (
+    FlyTriggerMode,
+    adaptive_fast_scan_grid,
+    fast_scan_1d,
+    fast_scan_grid,
+    fast_scan_lissajous,
+    fast_scan_spiral,
+)
+from p99_bluesky.sim.sim_stages import SimThreeAxisStage
+from p99_bluesky.utility.event_page_buffer import EventPageBuffer
+from p99_bluesky.utility.plan_clock import use_clock
+from p99_bluesky.utility.position_monitor import PositionMonitor
+from p99_bluesky.utility.sample_clock import SampleClock
 
 # Long enough for multiple asyncio event loop cycles to run so
 # all the tasks have a chance to run
@@ -24,6 +51,14 @@ def det():
     return det
 
 
+@pytest.fixture
+async def sim_motor_fly():
+    async with DeviceCollector():
+        sim_motor_fly = SimThreeAxisStage(name="sim_motor_fly", instant=False)
+
+    yield sim_motor_fly
+
+
 async def test_fast_scan_1d_fail_limit_check(
     sim_motor: ThreeAxisStage, RE: RunEngine, det
 ):
@@ -132,7 +167,14 @@ async def test_fast_scan_2d_success(sim_motor: ThreeAxisStage, RE: RunEngine, de
         assert motor_x == mock.call(steps[cnt], wait=True)
 
     assert 2.88 == await sim_motor.y.velocity.get_value()
-    assert num_step * 3 == get_mock_put(sim_motor.y.velocity).call_count
+    # prepare sets max and fly speed every row, original speed restored once
+    assert num_step * 2 + 1 == get_mock_put(sim_motor.y.velocity).call_count
+    assert [
+        mock.call(10.0, wait=True),
+        mock.call(speed, wait=True),
+    ] * num_step + [mock.call(2.88, wait=True)] == get_mock_put(
+        sim_motor.y.velocity
+    ).call_args_list
     assert num_step * 2 == get_mock_put(sim_motor.y.user_setpoint).call_count
     # check scan axis set and end point
     for cnt, motor_y in enumerate(get_mock_put(sim_motor.y.user_setpoint).call_args_list):
@@ -182,7 +224,14 @@ async def test_fast_scan_2d_Snake_success(sim_motor: ThreeAxisStage, RE: RunEngi
         assert motor_x == mock.call(steps[cnt], wait=True)
 
     assert 2.88 == await sim_motor.y.velocity.get_value()
-    assert num_step * 3 == get_mock_put(sim_motor.y.velocity).call_count
+    # prepare sets max and fly speed every row, original speed restored once
+    assert num_step * 2 + 1 == get_mock_put(sim_motor.y.velocity).call_count
+    assert [
+        mock.call(10.0, wait=True),
+        mock.call(speed, wait=True),
+    ] * num_step + [mock.call(2.88, wait=True)] == get_mock_put(
+        sim_motor.y.velocity
+    ).call_args_list
     assert num_step * 2 == get_mock_put(sim_motor.y.user_setpoint).call_count
     """ build a list of expected scan motor position"""
     y_position = [y_start]
@@ -202,3 +251,671 @@ async def test_fast_scan_2d_Snake_success(sim_motor: ThreeAxisStage, RE: RunEngi
     """Only 1 event per step as sim motor motor_done_move is set to true,
       so only 1 loop is ran"""
     assert_emitted(docs, start=1, descriptor=1, event=num_step, stop=1)
+
+
+async def test_fast_scan_1d_hardware_trigger(
+    sim_motor: ThreeAxisStage, RE: RunEngine, andor2: Andor2Ad
+):
+    docs = defaultdict(list)
+
+    def capture_emitted(name, doc):
+        docs[name].append(doc)
+
+    # 1 second move with 0.15 + 0.1 second frame period gives 4 frames
+    set_mock_value(andor2.drv.acquire_time, 0.15)
+    set_mock_value(andor2.drv.detector_state, DetectorState.IDLE)
+    callback_on_mock_put(
+        andor2.drv.acquire,
+        lambda *_, **__: set_mock_value(andor2.hdf.num_captured, 4),
+    )
+    RE(
+        fast_scan_1d(
+            [andor2], sim_motor.x, 5, -1, 6.0, trigger_mode=FlyTriggerMode.HARDWARE
+        ),
+        capture_emitted,
+    )
+
+    assert await andor2.drv.num_images.get_value() == 4
+    assert 2.78 == await sim_motor.x.velocity.get_value()
+    assert_emitted(
+        docs,
+        start=1,
+        descriptor=2,
+        event=1,
+        stream_resource=1,
+        stream_datum=1,
+        stop=1,
+    )
+    assert docs["stream_datum"][0]["indices"] == {"start": 0, "stop": 4}
+
+
+async def test_fast_scan_grid_hardware_trigger(
+    sim_motor: ThreeAxisStage, RE: RunEngine, andor2: Andor2Ad
+):
+    docs = defaultdict(list)
+    msgs = []
+
+    def capture_emitted(name, doc):
+        docs[name].append(doc)
+
+    # 1 second rows with 0.15 + 0.1 second frame period give 4 frames each
+    set_mock_value(andor2.drv.acquire_time, 0.15)
+    set_mock_value(andor2.drv.detector_state, DetectorState.IDLE)
+    # every row opens a file of its own, which starts counting frames from 0
+    callback_on_mock_put(
+        andor2.hdf.capture,
+        lambda value, **__: value and set_mock_value(andor2.hdf.num_captured, 0),
+    )
+    callback_on_mock_put(
+        andor2.drv.acquire,
+        lambda value, **__: value and set_mock_value(andor2.hdf.num_captured, 4),
+    )
+    RE.msg_hook = msgs.append
+    RE(
+        fast_scan_grid(
+            [andor2],
+            sim_motor.x,
+            0,
+            2,
+            3,
+            sim_motor.y,
+            5,
+            -1,
+            6.0,
+            snake_axes=True,
+            trigger_mode=FlyTriggerMode.HARDWARE,
+        ),
+        capture_emitted,
+    )
+    RE.msg_hook = None
+
+    # prepared for the frames of each row as it starts
+    prepares = [msg for msg in msgs if msg.command == "prepare" and msg.obj is andor2]
+    assert [prepare.args[0].number_of_triggers for prepare in prepares] == [4, 4, 4]
+    # a dropped frame fails the complete rather than waiting for it forever
+    assert prepares[0].args[0].frame_timeout == pytest.approx(DEFAULT_TIMEOUT + 0.25)
+    assert await andor2.drv.num_images.get_value() == 4
+    assert_emitted(
+        docs,
+        start=1,
+        descriptor=2,
+        event=3,
+        stream_resource=3,
+        stream_datum=3,
+        stop=1,
+    )
+    assert [datum["indices"] for datum in docs["stream_datum"]] == [
+        {"start": 0, "stop": 4}
+    ] * 3
+
+
+async def test_andor_kickoff_arms_internal_trigger(andor2: Andor2Ad):
+    set_mock_value(andor2.drv.detector_state, DetectorState.IDLE)
+    await andor2.prepare(
+        TriggerInfo(
+            number_of_triggers=2,
+            trigger=DetectorTrigger.INTERNAL,
+            deadtime=0.1,
+            livetime=0.1,
+        )
+    )
+    assert get_mock_put(andor2.drv.acquire).call_count == 0
+    # internally timed frames only start once kicked off
+    await andor2.kickoff()
+    get_mock_put(andor2.drv.acquire).assert_called_once_with(True, wait=True)
+
+
+async def test_fast_scan_1d_hardware_trigger_needs_detector(
+    sim_motor: ThreeAxisStage, RE: RunEngine, det
+):
+    with pytest.raises(ValueError):
+        RE(
+            fast_scan_1d(
+                [det], sim_motor.x, 5, -1, 10.0, trigger_mode=FlyTriggerMode.HARDWARE
+            )
+        )
+
+
+async def test_fast_scan_1d_hardware_trigger_needs_frame_period(
+    sim_motor: ThreeAxisStage, RE: RunEngine, andor2: Andor2Ad
+):
+    set_mock_value(andor2.drv.acquire_time, 0)
+    andor2.controller.get_deadtime = mock.Mock(return_value=0.0)
+    with pytest.raises(ValueError):
+        RE(
+            fast_scan_1d(
+                [andor2], sim_motor.x, 5, -1, 10.0, trigger_mode=FlyTriggerMode.HARDWARE
+            )
+        )
+
+
+async def test_fast_scan_hardware_trigger_no_software_options(
+    sim_motor: ThreeAxisStage, RE: RunEngine, andor2: Andor2Ad
+):
+    docs = defaultdict(list)
+
+    def capture_emitted(name, doc):
+        docs[name].append(doc)
+
+    # the detector sets the frame rate and no position is read with its frames
+    with pytest.raises(ValueError):
+        RE(
+            fast_scan_1d(
+                [andor2],
+                sim_motor.x,
+                5,
+                -1,
+                10.0,
+                trigger_mode=FlyTriggerMode.HARDWARE,
+                sample_period=0.1,
+            ),
+            capture_emitted,
+        )
+    for options in ({"sample_period": 0.1}, {"position_lag": 0.05}):
+        with pytest.raises(ValueError):
+            RE(
+                fast_scan_grid(
+                    [andor2],
+                    sim_motor.x,
+                    0,
+                    2,
+                    3,
+                    sim_motor.y,
+                    1,
+                    2,
+                    1,
+                    trigger_mode=FlyTriggerMode.HARDWARE,
+                    **options,
+                ),
+                capture_emitted,
+            )
+    assert_emitted(docs)
+
+
+async def test_fast_scan_1d_software_trigger(
+    sim_motor_fly: SimThreeAxisStage, RE: RunEngine, andor3: Andor3Ad
+):
+    docs = defaultdict(list)
+
+    def capture_emitted(name, doc):
+        docs[name].append(doc)
+
+    # frames only come from the software trigger, not from arming
+    callback_on_mock_put(andor3.drv.acquire, lambda *_, **__: None)
+    frames = iter(range(1, 10000))
+    callback_on_mock_put(
+        andor3.drv.software_trigger,
+        lambda *_, **__: set_mock_value(andor3.hdf.num_captured, next(frames)),
+    )
+    # a 2 s move, long enough for more than one point however loaded the machine is
+    RE(
+        fast_scan_1d([andor3], sim_motor_fly.x, 0, 2, 1.0, software_trigger=True),
+        capture_emitted,
+    )
+    # armed once for the whole move, a software trigger for every point
+    points = len(docs["event"])
+    assert points > 1
+    assert get_mock_put(andor3.drv.software_trigger).call_count == points
+    acquire = get_mock_put(andor3.drv.acquire)
+    assert acquire.call_args_list.count(((True,), {"wait": True})) == 1
+    assert await andor3.software_trigger.get_value() is False
+    with pytest.raises(ValueError):
+        RE(
+            fast_scan_1d(
+                [andor3],
+                sim_motor_fly.x,
+                0,
+                1,
+                5.0,
+                trigger_mode=FlyTriggerMode.HARDWARE,
+                software_trigger=True,
+            )
+        )
+
+
+async def test_fast_scan_1d_sample_period(
+    sim_motor_fly: SimThreeAxisStage, RE: RunEngine, det
+):
+    docs = defaultdict(list)
+
+    def capture_emitted(name, doc):
+        docs[name].append(doc)
+
+    sample_period = 0.1
+    RE(
+        fast_scan_1d([det], sim_motor_fly.x, 0, 0.5, 1.0, sample_period=sample_period),
+        capture_emitted,
+    )
+    assert_emitted(docs, start=1, descriptor=2, event=len(docs["event"]), stop=1)
+    primary, sampling = docs["descriptor"]
+    assert sampling["name"] == "sampling"
+    stats = docs["event"][-1]["data"]
+    assert stats["sampling-points"] == len(docs["event"]) - 1
+    assert stats["sampling-achieved_rate"] <= 1 / sample_period + 1
+    times = [
+        event["time"] for event in docs["event"] if event["descriptor"] == primary["uid"]
+    ]
+    assert (times[-1] - times[0]) / (len(times) - 1) == pytest.approx(
+        sample_period, abs=0.02
+    )
+
+
+def test_sample_clock_skip_missed_slots():
+    now = [100.0]
+    with use_clock(lambda: now[0]):
+        clock = SampleClock(0.1, name="clock")
+        clock.start_row()
+        assert clock.time_to_next_slot() == 0
+        clock.mark()
+        now[0] = 100.05
+        assert clock.time_to_next_slot() == pytest.approx(0.05)
+        now[0] = 100.1
+        clock.mark()
+        # overrun by two and a half slots
+        now[0] = 100.35
+        assert clock.time_to_next_slot() == pytest.approx(0.05)
+        now[0] = 100.4
+        clock.mark()
+        stats = clock.stats()
+    assert stats["points"] == 3
+    assert stats["missed_slots"] == 2
+    assert stats["jitter"] == pytest.approx(0)
+    assert stats["achieved_rate"] == pytest.approx(5)
+
+    with pytest.raises(ValueError):
+        SampleClock(0)
+
+
+async def test_position_monitor_interpolate():
+    readback, set_readback = soft_signal_r_and_setter(float, 0.0)
+    monitor = PositionMonitor(readback, name="x")
+    with pytest.raises(RuntimeError):
+        monitor.position_at(0)
+    await monitor.kickoff()
+    for position in (1.0, 3.0):
+        await asyncio.sleep(A_BIT)
+        set_readback(position)
+    await asyncio.sleep(A_BIT)
+    await monitor.complete()
+    (t0, p0), (t1, p1), (t2, p2) = monitor._buffer
+    assert (p0, p1, p2) == (0.0, 1.0, 3.0)
+    assert monitor.position_at((t1 + t2) / 2) == pytest.approx(2.0)
+    assert monitor.position_at(t2 + 1) == 3.0
+    # later updates are not buffered after complete
+    set_readback(5.0)
+    await asyncio.sleep(A_BIT)
+    monitor.capture_at(t2 + 1)
+    reading = await monitor.read()
+    assert reading == {"x": {"value": 3.0, "timestamp": t2 + 1, "alarm_severity": 0}}
+    # with a lag the position is from before the capture time
+    monitor.lag = t2 + 1 - (t1 + t2) / 2
+    reading = await monitor.read()
+    assert reading["x"]["value"] == pytest.approx(2.0)
+    assert reading["x"]["timestamp"] == t2 + 1
+
+
+async def test_fast_scan_1d_position_at_trigger_time(
+    sim_motor_fly: SimThreeAxisStage, RE: RunEngine, det
+):
+    docs = defaultdict(list)
+
+    def capture_emitted(name, doc):
+        docs[name].append(doc)
+
+    RE(fast_scan_1d([det], sim_motor_fly.x, 0, 0.5, 1.0), capture_emitted)
+    assert len(docs["event"]) > 1
+    x_key = "sim_motor_fly-x-user_readback"
+    times = [event["timestamps"][x_key] for event in docs["event"]]
+    assert times == sorted(times)
+    for event in docs["event"]:
+        assert event["timestamps"][x_key] <= event["time"]
+        assert 0 <= event["data"][x_key] <= 0.5
+
+
+async def test_fast_scan_grid_position_without_detector_readings(
+    sim_motor_fly: SimThreeAxisStage, RE: RunEngine
+):
+    docs = defaultdict(list)
+
+    def capture_emitted(name, doc):
+        docs[name].append(doc)
+
+    # like a StandardDetector, reads nothing, the only other reading of a row is
+    # the step motor that was last updated as the row started
+    silent = StandardReadable(name="silent")
+    RE(
+        fast_scan_grid([silent], sim_motor_fly.x, 0, 1, 2, sim_motor_fly.y, 0, 1, 1.0),
+        capture_emitted,
+    )
+    x_key = "sim_motor_fly-x-user_readback"
+    y_key = "sim_motor_fly-y-user_readback"
+    for row in (0.0, 1.0):
+        positions = [
+            event["data"][y_key]
+            for event in docs["event"]
+            if event["data"][x_key] == pytest.approx(row)
+        ]
+        assert len(positions) > 2
+        assert positions == sorted(positions)
+        assert positions[-1] > positions[0]
+
+
+async def test_fast_scan_1d_event_pages(
+    sim_motor_fly: SimThreeAxisStage, RE: RunEngine, det
+):
+    docs = defaultdict(list)
+
+    def capture_emitted(name, doc):
+        docs[name].append(doc)
+
+    RE(
+        fast_scan_1d([det], sim_motor_fly.x, 0, 0.5, 1.0, batch_size=5, batch_time=10),
+        capture_emitted,
+    )
+    assert_emitted(
+        docs, start=1, descriptor=1, event_page=len(docs["event_page"]), stop=1
+    )
+    assert set(docs["descriptor"][0]["data_keys"]) == {
+        "rand",
+        "sim_motor_fly-x-user_readback",
+    }
+    sizes = [len(page["seq_num"]) for page in docs["event_page"]]
+    assert sizes[:-1] == [5] * (len(sizes) - 1)
+    assert 0 < sizes[-1] <= 5
+    seq_num = [seq for page in docs["event_page"] for seq in page["seq_num"]]
+    assert seq_num == list(range(1, len(seq_num) + 1))
+    assert docs["stop"][0]["num_events"] == {"primary": len(seq_num)}
+
+
+async def test_fast_scan_grid_event_pages(sim_motor: ThreeAxisStage, RE: RunEngine, det):
+    docs = defaultdict(list)
+
+    def capture_emitted(name, doc):
+        docs[name].append(doc)
+
+    RE(
+        fast_scan_grid([det], sim_motor.x, 0, 2, 3, sim_motor.y, -1, 1, 1, batch_size=10),
+        capture_emitted,
+    )
+    # each row is flushed when it ends
+    assert_emitted(docs, start=1, descriptor=1, event_page=3, stop=1)
+    for page in docs["event_page"]:
+        assert len(page["seq_num"]) == 1
+        assert set(page["data"]) == {"rand", "sim_motor-x", "sim_motor-y"}
+
+
+async def test_fast_scan_event_pages_not_with_area_detector(
+    sim_motor: ThreeAxisStage, RE: RunEngine, andor2: Andor2Ad
+):
+    docs = defaultdict(list)
+
+    def capture_emitted(name, doc):
+        docs[name].append(doc)
+
+    # the frames would be written with nothing in the run saying where
+    with pytest.raises(ValueError):
+        RE(fast_scan_1d([andor2], sim_motor.x, 1, 2, 1.0, batch_size=5), capture_emitted)
+    with pytest.raises(ValueError):
+        RE(
+            fast_scan_grid(
+                [andor2], sim_motor.x, 0, 2, 3, sim_motor.y, 1, 2, 1, batch_size=5
+            ),
+            capture_emitted,
+        )
+    assert docs["event_page"] == []
+
+
+def test_event_page_buffer_due():
+    now = [100.0]
+    with use_clock(lambda: now[0]):
+        buffer = EventPageBuffer([], size=3, period=0.5)
+        assert not buffer.due()
+        buffer.add({"x": {"value": 1, "timestamp": 1.0}})
+        now[0] = 100.4
+        assert not buffer.due()
+        now[0] = 100.5
+        assert buffer.due()
+        buffer.add({"x": {"value": 2, "timestamp": 2.0}})
+        (page,) = buffer.collect_pages()
+        assert page == {"data": {"x": [1, 2]}, "timestamps": {"x": [1.0, 2.0]}}
+        assert len(buffer) == 0
+        assert not buffer.due()
+        for value in range(3):
+            buffer.add({"x": {"value": value, "timestamp": 3.0}})
+        assert buffer.due()
+    assert list(EventPageBuffer([], size=1).collect_pages()) == []
+    with pytest.raises(ValueError):
+        EventPageBuffer([], size=0)
+
+
+async def test_adaptive_fast_scan_grid_refine_edge(
+    sim_motor_fly: SimThreeAxisStage, RE: RunEngine
+):
+    step_position = [0.0]
+    sim_motor_fly.x.user_readback.subscribe_value(
+        lambda value: step_position.__setitem__(0, value)
+    )
+    edge = SynSignal(func=lambda: float(step_position[0] >= 1), name="edge")
+    docs = defaultdict(list)
+
+    def capture_emitted(name, doc):
+        docs[name].append(doc)
+
+    RE(
+        adaptive_fast_scan_grid(
+            [edge],
+            sim_motor_fly.x,
+            0,
+            1,
+            3,
+            sim_motor_fly.y,
+            1,
+            1.5,
+            signal="edge",
+            threshold=0.6,
+            refine=2,
+            motor_speed=5,
+            snake_axes=True,
+        ),
+        capture_emitted,
+    )
+    assert docs["start"][0]["refinement"]["signal"] == "edge"
+    steps = {
+        round(event["data"]["sim_motor_fly-x-user_readback"], 3)
+        for event in docs["event"]
+        if event["descriptor"] == docs["descriptor"][0]["uid"]
+    }
+    # only the gap next to the edge is refined
+    assert steps == {0, 0.5, 1, 0.667, 0.833}
+
+
+async def test_adaptive_fast_scan_grid_needs_signal(
+    sim_motor: ThreeAxisStage, RE: RunEngine, det
+):
+    with pytest.raises(ValueError):
+        RE(
+            adaptive_fast_scan_grid(
+                [det], sim_motor.x, 0, 2, 1, sim_motor.y, -1, 1, "rand"
+            )
+        )
+    with pytest.raises(ValueError):
+        RE(adaptive_fast_scan_grid([det], sim_motor.x, 0, 2, 3, sim_motor.y, -1, 1, "no"))
+
+
+async def test_fast_scan_spiral(sim_motor_fly: SimThreeAxisStage, RE: RunEngine):
+    # Timestamped when triggered, so the positions are those during the fly
+    det = SynSignal(func=lambda: 1, name="signal")
+    docs = defaultdict(list)
+    msgs = []
+
+    def capture_emitted(name, doc):
+        docs[name].append(doc)
+
+    RE.msg_hook = msgs.append
+    RE(
+        fast_scan_spiral(
+            [det],
+            sim_motor_fly.x,
+            sim_motor_fly.y,
+            1,
+            1,
+            radius=0.2,
+            pitch=0.1,
+            speed=2,
+            segments_per_turn=4,
+        ),
+        capture_emitted,
+    )
+    RE.msg_hook = None
+    # sent on from vertex to vertex, never stopped for a prepare
+    assert not [
+        msg
+        for msg in msgs
+        if msg.command in ("prepare", "kickoff")
+        and msg.obj in (sim_motor_fly.x, sim_motor_fly.y)
+    ]
+    path = docs["start"][0]["path"]
+    assert path["kind"] == "spiral"
+    assert path["num_segments"] == 8
+    assert_emitted(docs, start=1, descriptor=1, event=len(docs["event"]), stop=1)
+    assert len(docs["event"]) >= 8
+    x = [event["data"]["sim_motor_fly-x-user_readback"] for event in docs["event"]]
+    y = [event["data"]["sim_motor_fly-y-user_readback"] for event in docs["event"]]
+    # the motors only update at 10 Hz, so the samples can miss the outer corners
+    radius = np.hypot(np.array(x) - 1, np.array(y) - 1)
+    assert 0.1 < radius.max() <= 0.22
+    assert await sim_motor_fly.x.user_readback.get_value() == pytest.approx(1.2)
+    assert await sim_motor_fly.x.velocity.get_value() == 1
+
+
+async def test_fast_scan_spiral_chains_setpoints(
+    sim_motor: ThreeAxisStage, RE: RunEngine, det
+):
+    RE(
+        fast_scan_spiral(
+            [det],
+            sim_motor.x,
+            sim_motor.y,
+            1,
+            0,
+            radius=0.2,
+            pitch=0.1,
+            speed=2,
+            segments_per_turn=4,
+        )
+    )
+    for motor in (sim_motor.x, sim_motor.y):
+        puts = get_mock_put(motor.user_setpoint).call_args_list
+        # moved to the run-up and to the run-down, sent on without a put callback
+        # for every vertex in between
+        assert len(puts) > 2
+        assert puts[0].kwargs == puts[-1].kwargs == {"wait": True}
+        assert all(put.kwargs == {"wait": False} for put in puts[1:-1])
+
+
+async def test_fast_scan_lissajous_fail_limit_before_run(
+    sim_motor: ThreeAxisStage, RE: RunEngine, det
+):
+    docs = defaultdict(list)
+
+    def capture_emitted(name, doc):
+        docs[name].append(doc)
+
+    with pytest.raises(ValueError):
+        RE(
+            fast_scan_lissajous(
+                [det], sim_motor.x, sim_motor.y, 0, 0, 1, 200, 3, 2, period=10
+            ),
+            capture_emitted,
+        )
+    assert_emitted(docs)
+    assert 0 == get_mock_put(sim_motor.y.user_setpoint).call_count
+
+
+async def test_fast_scan_grid_step_move_overlaps_turnaround(
+    sim_motor: ThreeAxisStage, RE: RunEngine, det
+):
+    msgs = []
+    RE.msg_hook = msgs.append
+    try:
+        RE(fast_scan_grid([det], sim_motor.x, 0, 2, 3, sim_motor.y, -1, 1, 1))
+    finally:
+        RE.msg_hook = None
+
+    step_groups = [
+        msg.kwargs["group"]
+        for msg in msgs
+        if msg.command == "set" and msg.obj is sim_motor.x
+    ]
+    prepare_groups = [
+        msg.kwargs["group"]
+        for msg in msgs
+        if msg.command == "prepare" and msg.obj is sim_motor.y
+    ]
+    assert len(step_groups) == 3
+    assert step_groups == prepare_groups
+    # only one wait between the step move and the scan motor kickoff
+    for group in step_groups:
+        row = [msg for msg in msgs if msg.kwargs.get("group") == group]
+        assert [msg.command for msg in row][:3] == ["set", "prepare", "wait"]
+
+
+async def test_fast_scan_grid_restore_speed_on_fail(
+    sim_motor: ThreeAxisStage, RE: RunEngine, det
+):
+    set_mock_value(sim_motor.y.max_velocity, 0.5)
+    with pytest.raises(FailedStatus):
+        RE(fast_scan_grid([det], sim_motor.x, 0, 2, 3, sim_motor.y, -1, 1, 1))
+    assert [mock.call(2.88, wait=True)] == get_mock_put(
+        sim_motor.y.velocity
+    ).call_args_list
+
+
+async def test_fast_scan_grid_trajectory_in_start(
+    sim_motor: ThreeAxisStage, RE: RunEngine, det
+):
+    docs = defaultdict(list)
+
+    def capture_emitted(name, doc):
+        docs[name].append(doc)
+
+    RE(
+        fast_scan_grid(
+            [det],
+            sim_motor.x,
+            0,
+            2,
+            3,
+            sim_motor.y,
+            -1,
+            1,
+            1,
+            snake_axes=True,
+            md={"sample": "test"},
+        ),
+        capture_emitted,
+    )
+    start = docs["start"][0]
+    assert start["sample"] == "test"
+    trajectory = start["trajectory"]
+    assert trajectory["num_rows"] == 3
+    assert trajectory["step_positions"] == [0, 1, 2]
+    assert trajectory["row_starts"] == [-1, 1, -1]
+    assert trajectory["estimated_duration"] == pytest.approx(6 + 2 / 2.78)
+
+
+async def test_fast_scan_grid_fail_limit_before_run(
+    sim_motor: ThreeAxisStage, RE: RunEngine, det
+):
+    docs = defaultdict(list)
+
+    def capture_emitted(name, doc):
+        docs[name].append(doc)
+
+    with pytest.raises(ValueError):
+        RE(
+            fast_scan_grid([det], sim_motor.x, 0, 9, 3, sim_motor.y, -1, 1, 1),
+            capture_emitted,
+        )
+    assert_emitted(docs)
+    assert 0 == get_mock_put(sim_motor.y.user_setpoint).call_count
@@ -3,14 +3,35 @@ from collections import defaultdict
 
 import pytest
 from bluesky.run_engine import RunEngine
+from bluesky.utils import FailedStatus
 from ophyd_async.core import (
+    AsyncStatus,
+    Device,
     DeviceCollector,
+    Reference,
+)
+from ophyd_async.testing import (
+    assert_emitted,
+    callback_on_mock_put,
+    get_mock_put,
+    set_mock_value,
 )
-from ophyd_async.testing import assert_emitted, set_mock_value
 
 from p99_bluesky.devices.andorAd import Andor2Ad, Andor3Ad
+from p99_bluesky.devices.epics.drivers.andor3_driver import (
+    Andor3TriggerMode,
+    ImageMode,
+)
 from p99_bluesky.devices.stages import ThreeAxisStage
-from p99_bluesky.plans.stxm import stxm_fast, stxm_step
+from p99_bluesky.plans import fast_scan
+from p99_bluesky.plans.stxm import (
+    resume_stxm_fast,
+    resume_stxm_step,
+    stxm_fast,
+    stxm_multi_region,
+    stxm_stack,
+    stxm_step,
+)
 from p99_bluesky.sim.sim_stages import SimThreeAxisStage
 from p99_bluesky.utility.utility import step_size_to_step_num
 
@@ -31,6 +52,20 @@ async def sim_motor_fly():
     yield sim_motor_fly
 
 
+class FrameTrigger(Device):
+    """Pretend to be the external trigger of a mocked Andor, one frame a trigger."""
+
+    def __init__(self, det: Andor2Ad, name: str = "") -> None:
+        self.det_ref = Reference(det)
+        super().__init__(name=name)
+
+    @AsyncStatus.wrap
+    async def trigger(self):
+        det = self.det_ref()
+        frames = await det.hdf.num_captured.get_value()
+        set_mock_value(det.hdf.num_captured, frames + 1)
+
+
 async def test_stxm_fast_zero_velocity_fail(
     andor2: Andor2Ad, sim_motor: ThreeAxisStage, RE: RunEngine
 ):
@@ -92,15 +127,23 @@ async def test_stxm_fast(andor2: Andor2Ad, sim_motor: ThreeAxisStage, RE: RunEng
         ),
         capture_emitted,
     )
+    # primary, speed correction and checkpoint after every row and duration streams
     assert_emitted(
         docs,
         start=1,
-        descriptor=1,
+        descriptor=4,
         stream_resource=1,
         stream_datum=num_of_step,
-        event=num_of_step,
+        event=3 * num_of_step + 1,
         stop=1,
     )
+    time_budget = docs["start"][0]["time_budget"]
+    assert time_budget["num_step"] == num_of_step
+    assert time_budget["predicted_duration"] == pytest.approx(plan_time)
+    duration = docs["event"][-1]["data"]
+    assert duration["duration-plan_time"] == plan_time
+    assert duration["duration-predicted_duration"] == pytest.approx(plan_time)
+    assert duration["duration-actual_duration"] > 0
 
 
 async def test_stxm_fast_unknown_step(
@@ -143,16 +186,63 @@ async def test_stxm_fast_unknown_step(
         capture_emitted,
     )
 
-    # speed capped at half ideal so expecting 5 events
+    # speed capped at half ideal so expecting 5 rows
     assert_emitted(
         docs,
         start=1,
-        descriptor=1,
+        descriptor=4,
         stream_resource=1,
         stream_datum=5,
-        event=5,
+        event=16,
         stop=1,
     )
+    assert docs["start"][0]["time_budget"]["step_size"] == pytest.approx(0.5)
+
+
+async def test_stxm_fast_budget_includes_acceleration(
+    andor2: Andor2Ad,
+    sim_motor: ThreeAxisStage,
+    RE: RunEngine,
+    monkeypatch: pytest.MonkeyPatch,
+):
+    docs = defaultdict(list)
+
+    def capture_emitted(name, doc):
+        docs[name].append(doc)
+
+    def get_grid_trajectory(*args, **kwargs):
+        raise AssertionError("The grid of stxm_fast is worked out again.")
+
+    # the grid checked against the limits is the one scanned
+    monkeypatch.setattr(fast_scan, "get_grid_trajectory", get_grid_trajectory)
+    plan_time = 20
+    set_mock_value(sim_motor.y.acceleration_time, 0.1)
+    RE(
+        stxm_fast(
+            det=andor2,
+            count_time=0.2,
+            step_motor=sim_motor.x,
+            step_start=-2,
+            step_end=3,
+            scan_motor=sim_motor.y,
+            scan_start=1,
+            scan_end=2,
+            plan_time=plan_time,
+            step_size=0.2,
+            row_overhead=0.1,
+        ),
+        capture_emitted,
+    )
+    trajectory = docs["start"][0]["trajectory"]
+    # 25 rows of 0.2 s acceleration and 0.1 s overhead and the step moves leave
+    # less than 12.5 s to scan
+    assert trajectory["num_rows"] == 25
+    assert trajectory["estimated_duration"] == pytest.approx(plan_time)
+    assert trajectory["speed"] > 25 / 12.5
+    assert (
+        docs["start"][0]["time_budget"]["predicted_duration"]
+        == trajectory["estimated_duration"]
+    )
 
 
 async def test_stxm_step_with_home(
@@ -187,10 +277,10 @@ async def test_stxm_step_with_home(
     assert_emitted(
         docs,
         start=1,
-        descriptor=1,
+        descriptor=2,
         stream_resource=1,
         stream_datum=99,
-        event=99,
+        event=110,
         stop=1,
     )
     assert -1 == await sim_motor_step.x.user_readback.get_value()
@@ -229,10 +319,10 @@ async def test_stxm_step_without_home(
     assert_emitted(
         docs,
         start=1,
-        descriptor=1,
+        descriptor=2,
         stream_resource=1,
         stream_datum=99,
-        event=99,
+        event=110,
         stop=1,
     )
     assert x_step_end == await sim_motor_step.x.user_readback.get_value()
@@ -273,4 +363,554 @@ async def test_stxm_fast_sim_flyable_motor(
     # The overhead is about 3 sec in pytest
     assert time.monotonic() <= start_monotonic + plan_time * 1.1 + 3
 
-    assert docs["event"].__len__() == docs["stream_datum"].__len__()
+    streams = {descriptor["name"]: descriptor["uid"] for descriptor in docs["descriptor"]}
+    events = defaultdict(list)
+    for event in docs["event"]:
+        events[event["descriptor"]].append(event["data"])
+    assert events[streams["primary"]].__len__() == docs["stream_datum"].__len__()
+    # one correction per row, all within the motor maximum speed
+    corrections = events[streams["speed_correction"]]
+    assert [c["speed_correction-row"] for c in corrections] == list(
+        range(len(corrections))
+    )
+    assert corrections[-1]["speed_correction-rows_left"] == 0
+    max_velocity = await sim_motor_fly.y.max_velocity.get_value()
+    assert all(c["speed_correction-speed"] <= max_velocity for c in corrections)
+
+
+async def test_stxm_step_row_burst(
+    RE: RunEngine, sim_motor_step: SimThreeAxisStage, andor2: Andor2Ad
+):
+    docs = defaultdict(list)
+
+    def capture_emitted(name, doc):
+        docs[name].append(doc)
+
+    # frames only come from the trigger, not from arming
+    callback_on_mock_put(andor2.drv.acquire, lambda *_, **__: None)
+    frame_trigger = FrameTrigger(andor2, name="frame_trigger")
+    RE(
+        stxm_step(
+            det=andor2,
+            count_time=0.2,
+            x_step_motor=sim_motor_step.x,
+            x_step_start=0,
+            x_step_end=2,
+            x_step_size=1,
+            y_step_motor=sim_motor_step.y,
+            y_step_start=-1,
+            y_step_end=1,
+            y_step_size=0.5,
+            snake=True,
+            row_burst=True,
+            frame_trigger=frame_trigger,
+        ),
+        capture_emitted,
+    )
+    # one collect of 5 frames for each of the 3 rows, all in one file
+    assert_emitted(
+        docs,
+        start=1,
+        descriptor=3,
+        event=6,
+        stream_resource=1,
+        stream_datum=3,
+        stop=1,
+    )
+    assert [
+        (datum["indices"]["start"], datum["indices"]["stop"])
+        for datum in docs["stream_datum"]
+    ] == [(0, 5), (5, 10), (10, 15)]
+    # armed once for the whole grid
+    acquire = get_mock_put(andor2.drv.acquire)
+    assert acquire.call_args_list.count(((True,), {"wait": True})) == 1
+    start = docs["start"][0]
+    assert tuple(start["shape"]) == (3, 5)
+    assert start["row_burst"]["y_positions"] == [-1, -0.5, 0, 0.5, 1]
+    streams = {descriptor["uid"]: descriptor["name"] for descriptor in docs["descriptor"]}
+    rows = [
+        event["data"]
+        for event in docs["event"]
+        if streams[event["descriptor"]] == "burst_rows"
+    ]
+    assert [row["sim_motor-x-user_readback"] for row in rows] == [0, 1, 2]
+    # snake, the middle row goes backward
+    assert [row["sim_motor-y-user_readback"] for row in rows] == [-1, 1, -1]
+    assert await sim_motor_step.y.user_readback.get_value() == 1
+
+
+async def test_stxm_step_row_burst_needs_trigger_source(
+    RE: RunEngine, sim_motor_step: SimThreeAxisStage, andor2: Andor2Ad
+):
+    docs = defaultdict(list)
+
+    def capture_emitted(name, doc):
+        docs[name].append(doc)
+
+    grid = {
+        "det": andor2,
+        "count_time": 0.2,
+        "x_step_motor": sim_motor_step.x,
+        "x_step_start": 0,
+        "x_step_end": 1,
+        "x_step_size": 1,
+        "y_step_motor": sim_motor_step.y,
+        "y_step_start": 0,
+        "y_step_end": 1,
+        "y_step_size": 1,
+        "row_burst": True,
+    }
+    # nothing would trigger the frames
+    with pytest.raises(ValueError):
+        RE(stxm_step(**grid))
+    with pytest.raises(ValueError):
+        RE(
+            stxm_step(
+                **grid,
+                frame_trigger=FrameTrigger(andor2, name="frame_trigger"),
+                external_gate=True,
+            )
+        )
+    # the motor in position gates a frame, as its controller output would
+    callback_on_mock_put(andor2.drv.acquire, lambda *_, **__: None)
+    frames = iter(range(1, 100))
+    sim_motor_step.y.user_readback.subscribe_value(
+        lambda _: set_mock_value(andor2.hdf.num_captured, next(frames))
+    )
+    RE(stxm_step(**grid, external_gate=True), capture_emitted)
+    assert_emitted(
+        docs,
+        start=1,
+        descriptor=3,
+        event=4,
+        stream_resource=1,
+        stream_datum=2,
+        stop=1,
+    )
+
+
+async def test_stxm_step_row_burst_needs_andor(
+    RE: RunEngine, sim_motor_step: SimThreeAxisStage, andor2: Andor2Ad
+):
+    with pytest.raises(ValueError):
+        RE(
+            stxm_step(
+                det=sim_motor_step.z,
+                count_time=0.2,
+                x_step_motor=sim_motor_step.x,
+                x_step_start=0,
+                x_step_end=1,
+                x_step_size=1,
+                y_step_motor=sim_motor_step.y,
+                y_step_start=0,
+                y_step_end=1,
+                y_step_size=1,
+                row_burst=True,
+            )
+        )
+
+
+async def test_stxm_step_software_trigger(
+    RE: RunEngine, sim_motor_step: SimThreeAxisStage, andor3: Andor3Ad
+):
+    docs = defaultdict(list)
+
+    def capture_emitted(name, doc):
+        docs[name].append(doc)
+
+    # frames only come from the software trigger, not from arming
+    callback_on_mock_put(andor3.drv.acquire, lambda *_, **__: None)
+    frames = iter(range(1, 100))
+    callback_on_mock_put(
+        andor3.drv.software_trigger,
+        lambda *_, **__: set_mock_value(andor3.hdf.num_captured, next(frames)),
+    )
+    msgs = []
+    RE.msg_hook = msgs.append
+    RE(
+        stxm_step(
+            det=andor3,
+            count_time=0.2,
+            x_step_motor=sim_motor_step.x,
+            x_step_start=0,
+            x_step_end=2,
+            x_step_size=1,
+            y_step_motor=sim_motor_step.y,
+            y_step_start=-1,
+            y_step_end=1,
+            y_step_size=1,
+            software_trigger=True,
+        ),
+        capture_emitted,
+    )
+    RE.msg_hook = None
+    # set before the grid stages the detector, which it does once
+    stages = [msg for msg in msgs if msg.command == "stage" and msg.obj is andor3]
+    assert len(stages) == 1
+    assert len(_stream_data(docs, "primary")) == 9
+    assert get_mock_put(andor3.drv.software_trigger).call_count == 9
+    # armed once for the whole grid, in continuous acquisition
+    acquire = get_mock_put(andor3.drv.acquire)
+    assert acquire.call_args_list.count(((True,), {"wait": True})) == 1
+    assert await andor3.drv.trigger_mode.get_value() == Andor3TriggerMode.SOFT
+    assert await andor3.drv.image_mode.get_value() == ImageMode.CONTINUOUS
+    # disarmed on unstage and back to arming for every frame
+    assert await andor3.drv.acquire.get_value() is False
+    assert await andor3.software_trigger.get_value() is False
+    with pytest.raises(ValueError):
+        RE(
+            stxm_step(
+                det=andor3,
+                count_time=0.2,
+                x_step_motor=sim_motor_step.x,
+                x_step_start=0,
+                x_step_end=1,
+                x_step_size=1,
+                y_step_motor=sim_motor_step.y,
+                y_step_start=0,
+                y_step_end=1,
+                y_step_size=1,
+                row_burst=True,
+                software_trigger=True,
+            )
+        )
+
+
+async def test_stxm_step_software_trigger_reset_on_fail(
+    RE: RunEngine, sim_motor_step: SimThreeAxisStage, andor3: Andor3Ad
+):
+    def fail(*_, **__):
+        raise RuntimeError("Camera gone")
+
+    callback_on_mock_put(andor3.drv.software_trigger, fail)
+    with pytest.raises(FailedStatus):
+        RE(
+            stxm_step(
+                det=andor3,
+                count_time=0.2,
+                x_step_motor=sim_motor_step.x,
+                x_step_start=0,
+                x_step_end=1,
+                x_step_size=1,
+                y_step_motor=sim_motor_step.y,
+                y_step_start=0,
+                y_step_end=1,
+                y_step_size=1,
+                software_trigger=True,
+            )
+        )
+    assert get_mock_put(andor3.drv.software_trigger).call_count == 1
+    assert await andor3.software_trigger.get_value() is False
+
+
+def _stream_data(docs: dict, name: str) -> list[dict]:
+    streams = {descriptor["uid"]: descriptor["name"] for descriptor in docs["descriptor"]}
+    return [
+        event["data"] for event in docs["event"] if streams[event["descriptor"]] == name
+    ]
+
+
+async def test_resume_stxm_step(
+    RE: RunEngine, sim_motor_step: SimThreeAxisStage, andor2: Andor2Ad
+):
+    docs = defaultdict(list)
+
+    def capture_emitted(name, doc):
+        docs[name].append(doc)
+
+    RE(
+        resume_stxm_step(
+            run_uid="interrupted",
+            last_row=0,
+            det=andor2,
+            count_time=0.2,
+            x_step_motor=sim_motor_step.x,
+            x_step_start=0,
+            x_step_end=2,
+            x_step_size=1,
+            y_step_motor=sim_motor_step.y,
+            y_step_start=-1,
+            y_step_end=1,
+            y_step_size=1,
+            snake=True,
+        ),
+        capture_emitted,
+    )
+    start = docs["start"][0]
+    assert start["resume"] == {"run_uid": "interrupted", "last_row": 0}
+    points = _stream_data(docs, "primary")
+    # the rows after the first, the second going backward as it would have
+    assert [point["sim_motor-x-user_readback"] for point in points] == [1] * 3 + [2] * 3
+    assert [point["sim_motor-y-user_readback"] for point in points] == [
+        1,
+        0,
+        -1,
+        -1,
+        0,
+        1,
+    ]
+    checkpoints = _stream_data(docs, "row_checkpoint")
+    assert [c["row_checkpoint-row"] for c in checkpoints] == [1, 2]
+    assert [c["row_checkpoint-step_position"] for c in checkpoints] == [1, 2]
+
+
+async def test_resume_stxm_step_past_last_row(
+    RE: RunEngine, sim_motor_step: SimThreeAxisStage, andor2: Andor2Ad
+):
+    with pytest.raises(ValueError):
+        RE(
+            resume_stxm_step(
+                run_uid="interrupted",
+                last_row=2,
+                det=andor2,
+                count_time=0.2,
+                x_step_motor=sim_motor_step.x,
+                x_step_start=0,
+                x_step_end=2,
+                x_step_size=1,
+                y_step_motor=sim_motor_step.y,
+                y_step_start=-1,
+                y_step_end=1,
+                y_step_size=1,
+            )
+        )
+
+
+async def test_resume_stxm_fast(
+    andor2: Andor2Ad,
+    andor3: Andor3Ad,
+    sim_motor_fly: SimThreeAxisStage,
+    RE: RunEngine,
+):
+    docs = defaultdict(list)
+
+    def capture_emitted(name, doc):
+        docs[name].append(doc)
+
+    plan = {
+        "det": andor2,
+        "count_time": 0.2,
+        "step_motor": sim_motor_fly.x,
+        "step_start": -0.5,
+        "step_end": 0.5,
+        "scan_motor": sim_motor_fly.y,
+        "scan_start": 1,
+        "scan_end": 2,
+        "plan_time": 1.5,
+        "step_size": 0.25,
+        "correct_speed": False,
+    }
+    RE(stxm_fast(**plan), capture_emitted)
+    planned = docs["start"][0]["trajectory"]
+    assert planned["num_rows"] > 3
+    checkpoints = _stream_data(docs, "row_checkpoint")
+    assert [c["row_checkpoint-row"] for c in checkpoints] == list(
+        range(planned["num_rows"])
+    )
+    assert [c["row_checkpoint-step_position"] for c in checkpoints] == pytest.approx(
+        planned["step_positions"]
+    )
+
+    docs.clear()
+    # a fresh detector, the mocked one keeps counting frames between runs
+    last_step_position = checkpoints[2]["row_checkpoint-step_position"]
+    RE(
+        resume_stxm_fast("interrupted", last_step_position, **(plan | {"det": andor3})),
+        capture_emitted,
+    )
+    start = docs["start"][0]
+    assert start["resume"] == {
+        "run_uid": "interrupted",
+        "last_step_position": last_step_position,
+    }
+    assert start["time_budget"]["first_row"] == 3
+    # the rows as planned from the fourth on, the fourth going backward
+    resumed = start["trajectory"]
+    assert resumed["step_positions"] == pytest.approx(planned["step_positions"][3:])
+    assert resumed["row_starts"] == pytest.approx(planned["row_starts"][3:])
+    assert resumed["row_starts"][0] == 2
+    assert resumed["speed"] == pytest.approx(planned["speed"])
+    checkpoints = _stream_data(docs, "row_checkpoint")
+    assert [c["row_checkpoint-row"] for c in checkpoints] == list(
+        range(3, planned["num_rows"])
+    )
+
+
+async def test_stxm_multi_region(
+    andor2: Andor2Ad, sim_motor: ThreeAxisStage, RE: RunEngine
+):
+    docs = defaultdict(list)
+
+    def capture_emitted(name, doc):
+        docs[name].append(doc)
+
+    regions = [
+        {"step_start": 2, "step_end": 3, "scan_start": 2, "scan_end": 3, "plan_time": 3},
+        # no row ending at 0, the mocked motor would not kickoff
+        {"step_start": 0, "step_end": 1, "scan_start": 1, "scan_end": 2, "plan_time": 3},
+    ]
+    RE(
+        stxm_multi_region(
+            det=andor2,
+            count_time=0.2,
+            step_motor=sim_motor.x,
+            scan_motor=sim_motor.y,
+            regions=regions,
+        ),
+        capture_emitted,
+    )
+    assert len(docs["start"]) == 1
+    order = docs["start"][0]["regions"]
+    # the region nearest the motors is scanned first
+    assert [region["index"] for region in order] == [1, 0]
+    assert [region["stream_name"] for region in order] == ["region1", "region0"]
+    assert {descriptor["name"] for descriptor in docs["descriptor"]} == {
+        "region0",
+        "region1",
+    }
+    time_budget = docs["start"][0]["time_budget"]
+    assert time_budget["predicted_durations"] == pytest.approx([3, 3])
+    assert _stream_data(docs, "region0")
+    assert _stream_data(docs, "region1")
+
+
+async def test_stxm_multi_region_no_region(
+    andor2: Andor2Ad, sim_motor: ThreeAxisStage, RE: RunEngine
+):
+    with pytest.raises(ValueError):
+        RE(stxm_multi_region(andor2, 0.2, sim_motor.x, sim_motor.y, regions=[]))
+
+
+async def test_stxm_stack(
+    RE: RunEngine, sim_motor_step: SimThreeAxisStage, andor2: Andor2Ad
+):
+    docs = defaultdict(list)
+
+    def capture_emitted(name, doc):
+        docs[name].append(doc)
+
+    await sim_motor_step.z.set(-1)
+    RE(
+        stxm_stack(
+            det=andor2,
+            count_time=0.2,
+            stack_axis=sim_motor_step.z,
+            stack_positions=[0.5, 0.7, 1.2],
+            x_step_motor=sim_motor_step.x,
+            x_step_start=0,
+            x_step_end=1,
+            x_step_size=1,
+            y_step_motor=sim_motor_step.y,
+            y_step_start=-1,
+            y_step_end=1,
+            y_step_size=1,
+            home=True,
+            snake=True,
+        ),
+        capture_emitted,
+    )
+    # staged once, every frame of the stack in the same file
+    assert_emitted(
+        docs,
+        start=1,
+        descriptor=1,
+        stream_resource=1,
+        stream_datum=18,
+        event=18,
+        stop=1,
+    )
+    assert tuple(docs["start"][0]["shape"]) == (3, 2, 3)
+    points = _stream_data(docs, "primary")
+    assert [point["sim_motor-z-user_readback"] for point in points[::6]] == [
+        0.5,
+        0.7,
+        1.2,
+    ]
+    # every map is the same snaking grid
+    y_key = "sim_motor-y-user_readback"
+    assert [point[y_key] for point in points[:6]] == [-1, 0, 1, 1, 0, -1]
+    assert [point[y_key] for point in points[6:12]] == [-1, 0, 1, 1, 0, -1]
+    assert -1 == await sim_motor_step.z.user_readback.get_value()
+
+
+async def test_stxm_stack_no_position(
+    RE: RunEngine, sim_motor_step: SimThreeAxisStage, andor2: Andor2Ad
+):
+    with pytest.raises(ValueError):
+        RE(
+            stxm_stack(
+                andor2,
+                0.2,
+                sim_motor_step.z,
+                [],
+                sim_motor_step.x,
+                0,
+                1,
+                1,
+                sim_motor_step.y,
+                -1,
+                1,
+                1,
+            )
+        )
+
+
+async def test_stxm_step_sparse(
+    RE: RunEngine, sim_motor_step: SimThreeAxisStage, andor2: Andor2Ad
+):
+    docs = defaultdict(list)
+
+    def capture_emitted(name, doc):
+        docs[name].append(doc)
+
+    RE(
+        stxm_step(
+            det=andor2,
+            count_time=0.2,
+            x_step_motor=sim_motor_step.x,
+            x_step_start=0,
+            x_step_end=2,
+            x_step_size=0.5,
+            y_step_motor=sim_motor_step.y,
+            y_step_start=-1,
+            y_step_end=1,
+            y_step_size=0.5,
+            sparse_fraction=0.24,
+            sparse_seed=2,
+        ),
+        capture_emitted,
+    )
+    # 6 of the 25 points, each once
+    assert_emitted(
+        docs, start=1, descriptor=1, stream_resource=1, stream_datum=6, event=6, stop=1
+    )
+    start = docs["start"][0]
+    assert tuple(start["shape"]) == (5, 5)
+    points = start["sparse"]["points"]
+    assert len({tuple(point) for point in points}) == 6
+    x_positions = [event["data"]["sim_motor-x-user_readback"] for event in docs["event"]]
+    y_positions = [event["data"]["sim_motor-y-user_readback"] for event in docs["event"]]
+    assert x_positions == [row * 0.5 for row, _ in points]
+    assert y_positions == [column * 0.5 - 1 for _, column in points]
+
+
+async def test_stxm_step_sparse_not_in_row_burst(
+    RE: RunEngine, sim_motor_step: SimThreeAxisStage, andor2: Andor2Ad
+):
+    with pytest.raises(ValueError):
+        RE(
+            stxm_step(
+                andor2,
+                0.2,
+                sim_motor_step.x,
+                0,
+                2,
+                0.5,
+                sim_motor_step.y,
+                -1,
+                1,
+                0.5,
+                row_burst=True,
+                sparse_fraction=0.5,
+            )
+        )
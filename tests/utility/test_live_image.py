@@ -0,0 +1,151 @@
+import bluesky.plans as bp
+import numpy as np
+import pytest
+from bluesky.run_engine import RunEngine
+from ophyd.sim import SynSignal
+from ophyd_async.core import DeviceCollector
+
+from p99_bluesky.plans.fast_scan import fast_scan_grid
+from p99_bluesky.sim.sim_stages import SimThreeAxisStage
+from p99_bluesky.utility.live_image import StxmImageAssembler
+
+
+def test_fly_image_bins_points():
+    assembler = StxmImageAssembler("signal")
+    assembler(
+        "start",
+        {
+            "uid": "start",
+            "time": 0,
+            "trajectory": {
+                "step_positions": [0.0, 0.5, 1.0],
+                "row_starts": [0.0, 2.0, 0.0],
+                "row_ends": [2.0, 0.0, 2.0],
+            },
+            "hints": {"dimensions": [(["step"], "primary"), (["scan"], "primary")]},
+        },
+    )
+    image = assembler.image
+    # square pixels of the 0.5 step size
+    assert image.shape == (3, 4)
+    assert np.all(np.isnan(image))
+    assert assembler.extent == (0.0, 2.0, 0.0, 1.0)
+    assembler("descriptor", {"uid": "primary", "run_start": "start", "name": "primary"})
+    assembler("descriptor", {"uid": "other", "run_start": "start", "name": "other"})
+    for seq_num, (step, scan, signal) in enumerate(
+        [(0.01, 0.1, 1.0), (0.0, 0.3, 3.0), (0.49, 1.9, 5.0), (1.0, 2.0, 7.0)], 1
+    ):
+        assembler(
+            "event",
+            {
+                "uid": f"event{seq_num}",
+                "descriptor": "primary",
+                "seq_num": seq_num,
+                "time": 0,
+                "data": {"step": step, "scan": scan, "signal": signal},
+                "timestamps": {},
+            },
+        )
+    assembler(
+        "event",
+        {
+            "uid": "ignored",
+            "descriptor": "other",
+            "seq_num": 1,
+            "time": 0,
+            "data": {"step": 0, "scan": 0, "signal": 100.0},
+            "timestamps": {},
+        },
+    )
+    # filled in place, the points in the same pixel averaged
+    assert assembler.image is image
+    assert image[0, 0] == 2.0
+    assert image[1, 3] == 5.0
+    assert image[2, 3] == 7.0
+    assert np.count_nonzero(~np.isnan(image)) == 3
+
+
+@pytest.fixture
+async def sim_motor_step():
+    async with DeviceCollector():
+        sim_motor_step = SimThreeAxisStage(name="sim_motor", instant=True)
+    yield sim_motor_step
+
+
+async def test_step_image_follows_snake(sim_motor_step: SimThreeAxisStage, RE: RunEngine):
+    count = iter(range(100))
+    det = SynSignal(func=lambda: float(next(count)), name="det")
+    assembler = StxmImageAssembler("det")
+    RE(
+        bp.grid_scan(
+            [det],
+            sim_motor_step.x,
+            0,
+            1,
+            2,
+            sim_motor_step.y,
+            0,
+            2,
+            3,
+            snake_axes=True,
+        ),
+        assembler,
+    )
+    np.testing.assert_array_equal(
+        assembler.image - assembler.image[0, 0], [[0, 1, 2], [5, 4, 3]]
+    )
+    assert assembler.extent == (0, 2, 0, 1)
+
+
+@pytest.fixture
+async def sim_motor_fly():
+    async with DeviceCollector():
+        sim_motor_fly = SimThreeAxisStage(name="sim_motor_fly", instant=False)
+    yield sim_motor_fly
+
+
+async def test_fly_image_from_fast_scan_grid(
+    sim_motor_fly: SimThreeAxisStage, RE: RunEngine
+):
+    det = SynSignal(func=lambda: 1.0, name="det")
+    assembler = StxmImageAssembler("det", num_bins=4)
+    RE(
+        fast_scan_grid(
+            [det], sim_motor_fly.y, 1, 1.5, 2, sim_motor_fly.x, 1, 1.4, 2, snake_axes=True
+        ),
+        assembler,
+    )
+    image = assembler.image
+    assert image.shape == (2, 4)
+    # every row has points and every point is the signal
+    assert np.all(np.any(~np.isnan(image), axis=1))
+    assert np.all(image[~np.isnan(image)] == 1.0)
+
+
+def test_sparse_image_follows_points():
+    assembler = StxmImageAssembler("signal")
+    assembler(
+        "start",
+        {
+            "uid": "start",
+            "time": 0,
+            "shape": (2, 3),
+            "sparse": {"points": [[1, 2], [0, 1]]},
+        },
+    )
+    assembler("descriptor", {"uid": "primary", "run_start": "start", "name": "primary"})
+    for seq_num, signal in enumerate([4.0, 6.0, 8.0], 1):
+        assembler(
+            "event",
+            {
+                "uid": f"event{seq_num}",
+                "descriptor": "primary",
+                "seq_num": seq_num,
+                "time": 0,
+                "data": {"signal": signal},
+                "timestamps": {},
+            },
+        )
+    np.testing.assert_array_equal(
+        assembler.image, [[np.nan, 6.0, np.nan], [np.nan, np.nan, 4.0]]
+    )
@@ -0,0 +1,69 @@
+import numpy as np
+import pytest
+
+from p99_bluesky.utility.refinement import (
+    GridDataCollector,
+    RefineMetric,
+    metric_map,
+    refine_rows,
+    regrid_rows,
+)
+
+
+def test_regrid_rows():
+    step = np.array([0.0, 0.1, 0.9, 1.0, 1.1])
+    scan = np.array([0.1, 0.2, 0.6, 0.9, 0.7])
+    values = np.array([1.0, 3.0, 5.0, 7.0, 9.0])
+    image = regrid_rows(step, scan, values, np.array([0.0, 1.0]), np.linspace(0, 1, 3))
+    np.testing.assert_allclose(image, [[2.0, np.nan], [np.nan, 7.0]])
+    # bins follow the scan direction
+    image = regrid_rows(step, scan, values, np.array([0.0, 1.0]), np.linspace(1, 0, 3))
+    np.testing.assert_allclose(image, [[np.nan, 2.0], [7.0, np.nan]])
+
+
+def test_metric_map():
+    image = np.zeros((3, 4))
+    image[2, :] = 1
+    np.testing.assert_allclose(
+        metric_map(image, RefineMetric.GRADIENT), [[0] * 4, [0.5] * 4, [1] * 4]
+    )
+    variance = metric_map(image, RefineMetric.VARIANCE)
+    assert np.all(variance[0] == 0)
+    assert np.all(variance[1:] == pytest.approx(2 / 9))
+    # empty points count as the mean
+    image[0, 0] = np.nan
+    assert not np.any(np.isnan(metric_map(image, RefineMetric.GRADIENT)))
+
+
+def test_refine_rows():
+    step_positions = np.array([0.0, 1.0, 2.0])
+    scan_edges = np.linspace(0, 5, 6)
+    metric = np.zeros((3, 5))
+    metric[2, 2] = 1.0
+    rows = refine_rows(step_positions, scan_edges, metric, 0.5, 3)
+    assert rows == [(1.25, 1.0, 4.0), (1.5, 1.0, 4.0), (1.75, 1.0, 4.0)]
+    assert refine_rows(step_positions, scan_edges, np.zeros((3, 5)), 0.5, 3) == []
+
+
+def test_grid_data_collector():
+    collector = GridDataCollector("x", "y", "det")
+    collector("descriptor", {"uid": "p", "name": "primary"})
+    collector("descriptor", {"uid": "b", "name": "baseline"})
+    collector("event", {"descriptor": "p", "data": {"x": 1, "y": 2, "det": 3}})
+    collector("event", {"descriptor": "b", "data": {"x": 4, "y": 5, "det": 6}})
+    collector(
+        "event_page",
+        {
+            "descriptor": "p",
+            "data": {"x": [7, 8], "y": [9, 10], "det": [11, 12]},
+            "timestamps": {"x": [0, 0], "y": [0, 0], "det": [0, 0]},
+            "time": [0, 0],
+            "seq_num": [2, 3],
+            "uid": ["a", "b"],
+            "filled": {},
+        },
+    )
+    step, scan, det = collector.arrays()
+    np.testing.assert_array_equal(step, [1, 7, 8])
+    np.testing.assert_array_equal(scan, [2, 9, 10])
+    np.testing.assert_array_equal(det, [3, 11, 12])
@@ -0,0 +1,45 @@
+import pytest
+
+from p99_bluesky.utility.region_order import (
+    EXACT_ORDER_LIMIT,
+    order_regions,
+    regions_travel_time,
+)
+from p99_bluesky.utility.trajectory import GridTrajectory
+
+
+def _grids(*corners: tuple[float, float]) -> list[GridTrajectory]:
+    return [
+        GridTrajectory(step, step + 1, 2, scan, scan + 1, 1) for step, scan in corners
+    ]
+
+
+def test_order_regions():
+    grids = _grids((10, 10), (0, 0), (5, 5))
+    order = order_regions(grids, (0, 0), step_speed=1, scan_speed=1)
+    assert [index for index, _ in order] == [1, 2, 0]
+    ordered = [grid for _, grid in order]
+    assert regions_travel_time(ordered, (0, 0), 1, 1) < regions_travel_time(
+        grids, (0, 0), 1, 1
+    )
+
+
+def test_order_regions_start_corner():
+    # coming from the far side, the grid is entered from its far corner
+    (index, grid), *_ = order_regions(_grids((0, 0)), (2, 2), 1, 1)
+    assert index == 0
+    assert (grid.step_positions[0], grid.row_starts[0]) == (1, 1)
+    assert regions_travel_time([grid], (2, 2), 1, 1) == pytest.approx(1)
+
+
+def test_order_regions_slow_axis():
+    # a slow step axis makes the grid in line on the step axis the nearest
+    grids = _grids((0, 6), (3, 0))
+    order = order_regions(grids, (0, 0), step_speed=0.1, scan_speed=10)
+    assert order[0][0] == 0
+
+
+def test_order_regions_greedy():
+    corners = [(2 * i, 0) for i in range(EXACT_ORDER_LIMIT + 2)][::-1]
+    order = order_regions(_grids(*corners), (0, 0), 1, 1)
+    assert [index for index, _ in order] == list(range(len(corners)))[::-1]
@@ -0,0 +1,64 @@
+import pytest
+
+from p99_bluesky.utility.plan_clock import use_clock
+from p99_bluesky.utility.row_speed_controller import RowSpeedController
+from p99_bluesky.utility.trajectory import GridTrajectory
+
+
+@pytest.fixture
+def clock():
+    now = [0.0]
+    with use_clock(lambda: now[0]):
+        yield now
+
+
+async def test_row_speed_controller_drops_rows_when_late(clock: list[float]):
+    # 5 rows of 1 s
+    trajectory = GridTrajectory(0, 1, 5, 0, 1, speed=1, snake_axes=True)
+    controller = RowSpeedController(trajectory, 5, max_speed=4, name="correction")
+    controller.start()
+    rows = iter(controller)
+
+    assert next(rows) == (0, 0, 1)
+    clock[0] = 2.0
+    controller.end_row()
+    # 1 s late on every row leaves room for 2 rows at 2 in the 3 s left
+    assert await controller.rows_left.get_value() == 2
+    assert await controller.speed.get_value() == pytest.approx(2)
+    assert await controller.step_size.get_value() == pytest.approx(0.75)
+    assert await controller.row_duration.get_value() == 2
+    assert await controller.estimated_row_duration.get_value() == 1
+
+    assert next(rows) == (0.25, 1, 0)
+    assert controller.current_speed == pytest.approx(2)
+    clock[0] = 3.5
+    controller.end_row()
+    assert await controller.row.get_value() == 1
+    assert await controller.rows_left.get_value() == 1
+    assert await controller.speed.get_value() == pytest.approx(2)
+
+    assert next(rows) == (1, 0, 1)
+    clock[0] = 5.0
+    controller.end_row()
+    assert await controller.rows_left.get_value() == 0
+    assert list(rows) == []
+
+
+async def test_row_speed_controller_slows_down_when_early(clock: list[float]):
+    trajectory = GridTrajectory(0, 1, 3, 0, 1, speed=1, snake_axes=True, row_overhead=1)
+    controller = RowSpeedController(trajectory, 6, max_speed=4)
+    controller.start()
+    next(iter(controller))
+    # no overhead after all, the 2 rows left get 5 s
+    clock[0] = 1.0
+    controller.end_row()
+    assert await controller.rows_left.get_value() == 2
+    assert await controller.speed.get_value() == pytest.approx(0.4)
+    assert await controller.estimated_duration_left.get_value() == pytest.approx(5)
+
+
+def test_grid_speed_limit():
+    trajectory = GridTrajectory(0, 1, 2, 1, 2, speed=1, acceleration_time=0.5)
+    # 1 of room either side for the run-up of acceleration_time * speed / 2
+    assert trajectory.speed_limit((0, 4)) == pytest.approx(4)
+    assert GridTrajectory(0, 1, 2, 1, 2, speed=1).speed_limit((0, 4)) == float("inf")
@@ -0,0 +1,51 @@
+import numpy as np
+import pytest
+
+from p99_bluesky.utility.snake_lag import correct_snake_lag, estimate_snake_lag
+
+
+def _snake_grid(shift: float, num_rows: int = 6, num_points: int = 200):
+    step_positions = np.linspace(0, 1, num_rows)
+    true_scan = np.linspace(-1, 1, num_points)
+    step, scan, values = [], [], []
+    for row, position in enumerate(step_positions):
+        direction = -1 if row % 2 else 1
+        row_scan = true_scan[::direction]
+        step.append(np.full(num_points, position))
+        # the position is read ahead of the data in the direction of travel
+        scan.append(row_scan + direction * shift)
+        values.append(np.exp(-(((row_scan - 0.2) / 0.1) ** 2)))
+    return (
+        np.concatenate(step),
+        np.concatenate(scan),
+        np.concatenate(values),
+        step_positions,
+    )
+
+
+def test_estimate_snake_lag():
+    step, scan, values, step_positions = _snake_grid(0.05)
+    scan_edges = np.linspace(-1.2, 1.2, 241)
+    shift = estimate_snake_lag(step, scan, values, step_positions, scan_edges)
+    assert shift == pytest.approx(0.05, abs=0.005)
+    corrected = correct_snake_lag(step, scan, step_positions, shift)
+    assert estimate_snake_lag(
+        step, corrected, values, step_positions, scan_edges
+    ) == pytest.approx(0, abs=0.005)
+    # a position behind the data gives a negative shift
+    step, scan, values, step_positions = _snake_grid(-0.08)
+    shift = estimate_snake_lag(step, scan, values, step_positions, scan_edges)
+    assert shift == pytest.approx(-0.08, abs=0.005)
+
+
+def test_estimate_snake_lag_no_snake():
+    step, scan, values, step_positions = _snake_grid(0.05)
+    forward = np.concatenate(
+        [np.sort(scan[step == position]) for position in step_positions]
+    )
+    assert (
+        estimate_snake_lag(
+            step, forward, values, step_positions, np.linspace(-1.2, 1.2, 241)
+        )
+        == 0
+    )
@@ -0,0 +1,49 @@
+import numpy as np
+import pytest
+
+from p99_bluesky.utility.sparse_sampling import (
+    SparseSampling,
+    inpaint_sparse,
+    nearest_neighbour_tour,
+    reconstruct_sparse,
+    sparse_grid_points,
+)
+
+
+@pytest.mark.parametrize("sampling", list(SparseSampling))
+def test_sparse_grid_points(sampling: SparseSampling):
+    points = sparse_grid_points((20, 30), 0.25, sampling, seed=1)
+    assert points.shape == (150, 2)
+    assert len({tuple(point) for point in points}) == 150
+    assert points[:, 0].max() < 20 and points[:, 1].max() < 30
+    # spread over the whole grid
+    assert np.ptp(points[:, 0]) >= 15 and np.ptp(points[:, 1]) >= 25
+    np.testing.assert_array_equal(
+        points, sparse_grid_points((20, 30), 0.25, sampling, seed=1)
+    )
+    with pytest.raises(ValueError):
+        sparse_grid_points((20, 30), 0, sampling)
+
+
+def test_nearest_neighbour_tour():
+    positions = np.array([[5.0, 0.0], [0.0, 0.0], [3.0, 0.0], [1.0, 0.0]])
+    np.testing.assert_array_equal(
+        nearest_neighbour_tour(positions, start=(0.0, 0.0)), [1, 3, 2, 0]
+    )
+    # a slow second axis makes moves along it longer
+    positions = np.array([[0.0, 1.0], [2.0, 0.0]])
+    assert nearest_neighbour_tour(positions, (0.0, 0.0), speeds=(1, 0.1))[0] == 1
+
+
+def test_reconstruct_sparse():
+    rows, columns = np.mgrid[0:20, 0:30]
+    full = 2.0 * rows + columns
+    points = sparse_grid_points(full.shape, 0.25, seed=3)
+    image = reconstruct_sparse(full.shape, points, full[points[:, 0], points[:, 1]])
+    assert not np.any(np.isnan(image))
+    np.testing.assert_array_equal(
+        image[points[:, 0], points[:, 1]], full[points[:, 0], points[:, 1]]
+    )
+    assert np.abs(image - full).mean() < 1
+    with pytest.raises(ValueError):
+        inpaint_sparse(np.full((2, 2), np.nan))
@@ -0,0 +1,107 @@
+import numpy as np
+import pytest
+
+from p99_bluesky.utility.trajectory import GridTrajectory, PathTrajectory
+
+
+def test_spiral_path():
+    path = PathTrajectory.spiral(
+        1, 2, radius=0.5, pitch=0.25, speed=2, segments_per_turn=8
+    )
+    assert path.kind == "spiral"
+    assert path.num_segments == 16
+    assert (path.x[0], path.y[0]) == (1, 2)
+    assert np.hypot(path.x[-1] - 1, path.y[-1] - 2) == pytest.approx(0.5)
+    # constant speed along the path
+    speed = np.hypot(path.x_velocities, path.y_velocities)
+    np.testing.assert_allclose(speed, 2)
+    assert path.to_md()["estimated_duration"] == path.total_duration
+    with pytest.raises(ValueError):
+        PathTrajectory.spiral(0, 0, radius=1, pitch=0, speed=1)
+
+
+def test_lissajous_path():
+    path = PathTrajectory.lissajous(0, 0, 1, 2, 3, 2, period=4, num_segments=100)
+    assert path.kind == "lissajous"
+    assert path.total_duration == 4
+    assert (path.x[0], path.y[0]) == pytest.approx((0, -2))
+    # closed figure
+    assert (path.x[-1], path.y[-1]) == pytest.approx((path.x[0], path.y[0]))
+    assert path.x.max() == pytest.approx(1, abs=1e-3)
+    assert path.y.min() == pytest.approx(-2)
+
+
+def test_path_check_limits():
+    path = PathTrajectory([0, 1, 2], [0, 1, 3], [0, -1, 0])
+    path.check_limits((-1, 4), (-2, 1), 2, 1)
+    with pytest.raises(ValueError, match="x motor move request of 3.0"):
+        path.check_limits((-1, 3), (-2, 1))
+    with pytest.raises(ValueError, match="y motor move request of -1.0"):
+        path.check_limits((-1, 4), (-1, 1))
+    with pytest.raises(ValueError, match="x motor speed of 2.0"):
+        path.check_limits((-1, 4), (-2, 1), 1.5, 1)
+    with pytest.raises(ValueError):
+        PathTrajectory([0, 1, 1], [0, 1, 2], [0, 1, 2])
+
+
+def test_path_run_up_within_limits():
+    path = PathTrajectory([0, 1, 2], [0, 1, 3], [0, -1, 0])
+    assert path.prepared_positions(1, 1) == pytest.approx((-0.5, 0.5))
+    assert path.completed_positions(1, 1) == pytest.approx((4, 0.5))
+    path.check_limits((-1, 4), (-2, 1), x_acceleration_time=1, y_acceleration_time=1)
+    with pytest.raises(ValueError, match="x motor move request of 4.5"):
+        path.check_limits((-1, 4), (-2, 1), x_acceleration_time=1.5)
+    with pytest.raises(ValueError, match="x motor move request of -1.5"):
+        path.check_limits((-1, 5), (-2, 1), x_acceleration_time=3)
+
+
+def test_grid_for_plan_time():
+    # fixed step size, only the speed is solved for
+    grid = GridTrajectory.for_plan_time(
+        10, 0.2, -2, 3, 1, 2, 10, step_size=0.2, snake_axes=True, step_speed=2.78
+    )
+    assert grid.num_rows == 25
+    assert grid.total_duration == pytest.approx(10)
+    # even spacing, too slow at max speed so rows are dropped
+    grid = GridTrajectory.for_plan_time(
+        12, 0.1, 0, 2, -1, 1, 1, snake_axes=True, step_speed=1
+    )
+    assert grid.num_rows == 5
+    assert grid.speed == pytest.approx(1)
+    # a single row does not fit
+    grid = GridTrajectory.for_plan_time(1, 0.1, 0, 2, -1, 1, 1, row_overhead=1)
+    assert grid.num_rows == 1
+    assert grid.total_duration > 1
+    with pytest.raises(ValueError):
+        GridTrajectory.for_plan_time(10, 0.1, 0, 2, -1, 1, 1, step_size=0)
+
+
+def test_grid_from_row():
+    grid = GridTrajectory(0, 2, 5, 1, 2, speed=1, acceleration_time=0.2, snake_axes=True)
+    rest = grid.from_row(3)
+    np.testing.assert_allclose(rest.step_positions, grid.step_positions[3:])
+    np.testing.assert_allclose(rest.row_starts, grid.row_starts[3:])
+    np.testing.assert_allclose(rest.row_durations, grid.row_durations[3:])
+    assert rest.speed == grid.speed
+    with pytest.raises(ValueError):
+        grid.from_row(5)
+
+
+def test_grid_row_after():
+    grid = GridTrajectory(0, 2, 5, 1, 2, speed=1)
+    assert grid.row_after(1.0) == 3
+    # rows of an interrupted grid spaced differently, dropped to keep to its time
+    assert grid.row_after(0.7) == 2
+    assert grid.row_after(-1) == 0
+    assert GridTrajectory(2, 0, 5, 1, 2, speed=1).row_after(1.0) == 3
+    with pytest.raises(ValueError):
+        grid.row_after(2.0)
+
+
+def test_grid_flipped():
+    grid = GridTrajectory(0, 2, 3, 1, 2, speed=1, acceleration_time=0.2, snake_axes=True)
+    flipped = grid.flipped(step=True, scan=True)
+    np.testing.assert_allclose(flipped.step_positions, [2, 1, 0])
+    np.testing.assert_allclose(flipped.row_starts, [2, 1, 2])
+    assert flipped.total_duration == pytest.approx(grid.total_duration)
+    np.testing.assert_allclose(grid.flipped().row_starts, grid.row_starts)